@@ -73,9 +73,9 @@ class PasswordResetTokenAdmin(admin.ModelAdmin):
     Admin interface for PasswordResetToken model.
     """
     
-    list_display = ['user', 'token', 'is_used', 'expires_at', 'created_at']
+    list_display = ['user', 'token_hash', 'is_used', 'expires_at', 'created_at']
     list_filter = ['is_used', 'created_at', 'expires_at']
-    search_fields = ['user__email', 'token']
+    search_fields = ['user__email']
     readonly_fields = ['created_at', 'updated_at']
     ordering = ['-created_at']
     
@@ -90,9 +90,9 @@ class EmailVerificationTokenAdmin(admin.ModelAdmin):
     Admin interface for EmailVerificationToken model.
     """
     
-    list_display = ['user', 'token', 'is_used', 'expires_at', 'created_at']
+    list_display = ['user', 'token_hash', 'is_used', 'expires_at', 'created_at']
     list_filter = ['is_used', 'created_at', 'expires_at']
-    search_fields = ['user__email', 'token']
+    search_fields = ['user__email']
     readonly_fields = ['created_at', 'updated_at']
     ordering = ['-created_at']
     
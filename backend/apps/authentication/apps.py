@@ -7,3 +7,7 @@ class AuthenticationConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.authentication"
     verbose_name = "Authentication"
+
+    def ready(self):
+        import apps.authentication.checks
+        import apps.authentication.signals
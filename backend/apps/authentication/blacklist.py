@@ -0,0 +1,149 @@
+"""
+File: backend/apps/authentication/blacklist.py
+Purpose: In-process bloom filter in front of the JWT blacklist tables
+"""
+
+import hashlib
+import math
+import threading
+import time
+from functools import partial
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from apps.core.cache import is_shared_cache
+
+
+class BloomFilter:
+    """
+    Fixed-size bloom filter over strings.
+
+    Membership tests never give false negatives; false positives happen
+    at roughly `error_rate` once `capacity` items have been added.
+    Positions come from double hashing a single SHA-256 digest.
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(capacity, 1)
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hash_count = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, item):
+        digest = hashlib.sha256(item.encode()).digest()
+        first = int.from_bytes(digest[:8], "big")
+        second = int.from_bytes(digest[8:16], "big") | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        for position in self.positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self.positions(item)
+        )
+
+
+class TokenBlacklist:
+    """
+    Blacklist lookups that only reach the database on a bloom filter hit.
+
+    Each process keeps a filter of the jtis of unexpired blacklisted
+    tokens. A version number in the shared cache is bumped whenever a
+    token is blacklisted; a process seeing a new version (or holding a
+    filter older than TOKEN_BLACKLIST_REBUILD_INTERVAL) rebuilds its
+    filter with one query. Tokens missing from the filter are accepted
+    without a query, and hits are confirmed against BlacklistedToken.
+
+    The version only reaches other processes through a shared cache, so
+    with a process-local one every lookup queries BlacklistedToken.
+    """
+
+    version_key = "token_blacklist:version"
+    error_rate = 0.001
+    min_capacity = 1024
+
+    lock = threading.Lock()
+    bloom = None
+    version = None
+    built_at = 0.0
+
+    @staticmethod
+    def get_rebuild_interval():
+        return getattr(settings, "TOKEN_BLACKLIST_REBUILD_INTERVAL", 60 * 60)
+
+    @classmethod
+    def get_version(cls):
+        """
+        Return the shared blacklist version. A missing version is seeded
+        from the clock so an evicted key never rolls back to a number a
+        stale filter was built for.
+        """
+        version = cache.get(cls.version_key)
+        if version is None:
+            cache.add(cls.version_key, int(time.time() * 1000), None)
+            version = cache.get(cls.version_key)
+        return version
+
+    @classmethod
+    def bump_version(cls):
+        try:
+            cache.incr(cls.version_key)
+        except ValueError:
+            cache.set(cls.version_key, int(time.time() * 1000), None)
+
+    @classmethod
+    def build(cls):
+        """Build a filter from the jtis of unexpired blacklisted tokens."""
+        jtis = list(
+            BlacklistedToken.objects.filter(
+                token__expires_at__gt=timezone.now()
+            ).values_list("token__jti", flat=True)
+        )
+        bloom = BloomFilter(max(len(jtis) * 2, cls.min_capacity), cls.error_rate)
+        for jti in jtis:
+            bloom.add(jti)
+        return bloom
+
+    @classmethod
+    def get_filter(cls):
+        """Return this process's filter, rebuilding it if it is out of date."""
+        version = cls.get_version()
+        with cls.lock:
+            expired = time.monotonic() - cls.built_at > cls.get_rebuild_interval()
+            if cls.bloom is None or cls.version != version or expired:
+                # The version is read before querying, so a token
+                # blacklisted while building bumps it past the one recorded.
+                cls.bloom = cls.build()
+                cls.version = version
+                cls.built_at = time.monotonic()
+            return cls.bloom
+
+    @classmethod
+    def reset(cls):
+        """Drop this process's filter."""
+        with cls.lock:
+            cls.bloom = None
+            cls.version = None
+            cls.built_at = 0.0
+
+    @classmethod
+    def is_blacklisted(cls, jti):
+        if is_shared_cache() and jti not in cls.get_filter():
+            return False
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+    @classmethod
+    def added(cls, jti):
+        """
+        Record a newly blacklisted jti: add it to this process's filter
+        and, once committed, bump the version so other processes rebuild.
+        """
+        with cls.lock:
+            if cls.bloom is not None:
+                cls.bloom.add(jti)
+        transaction.on_commit(partial(cls.bump_version))
@@ -0,0 +1,58 @@
+"""
+File: backend/apps/authentication/cache.py
+Purpose: Short-lived cache of users resolved during token authentication
+"""
+
+from functools import partial
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from apps.core.cache import is_shared_cache
+
+
+class UserCache:
+    """
+    Cache of User instances keyed by id, used so that token-authenticated
+    requests do not load the user row every time.
+
+    Entries are dropped whenever the user is saved or deleted (profile
+    updates, password changes, deactivation), and the short TTL bounds
+    staleness after writes that bypass model signals such as
+    ``QuerySet.update()``. Invalidations only reach other processes
+    through a shared cache, so with a process-local one nothing is
+    cached and every request loads the user.
+    """
+
+    key_prefix = "auth_user"
+
+    @staticmethod
+    def get_timeout():
+        return getattr(settings, "AUTH_USER_CACHE_TIMEOUT", 300)
+
+    @staticmethod
+    def make_key(user_id):
+        return f"{UserCache.key_prefix}:{user_id}"
+
+    @staticmethod
+    def get(user_id):
+        if not is_shared_cache():
+            return None
+        return cache.get(UserCache.make_key(user_id))
+
+    @staticmethod
+    def set(user_id, user):
+        if is_shared_cache():
+            cache.set(UserCache.make_key(user_id), user, UserCache.get_timeout())
+
+    @staticmethod
+    def delete(user_id):
+        cache.delete(UserCache.make_key(user_id))
+
+    @staticmethod
+    def invalidate(user_id):
+        """
+        Drop the entry now and again once the transaction commits, so a
+        user cached from pre-commit data during the write is dropped too.
+        """
+        UserCache.delete(user_id)
+        transaction.on_commit(partial(UserCache.delete, user_id))
@@ -0,0 +1,24 @@
+"""
+File: backend/apps/authentication/checks.py
+Purpose: System checks for authentication settings
+"""
+
+from django.core.checks import Tags, Warning, register
+from apps.core.cache import is_shared_cache
+
+
+@register(Tags.caches, deploy=True)
+def check_login_throttle_cache(app_configs=None, **kwargs):
+    """Warn when login limits are counted in a cache only one worker can see."""
+    if is_shared_cache():
+        return []
+    return [
+        Warning(
+            "Login attempts are counted in a cache that is not shared between processes.",
+            hint=(
+                "Each worker counts its own attempts, multiplying the login limits "
+                "by the number of workers. Use a shared cache such as Redis."
+            ),
+            id="authentication.W001",
+        )
+    ]
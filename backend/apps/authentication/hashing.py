@@ -0,0 +1,108 @@
+"""
+File: backend/apps/authentication/hashing.py
+Purpose: Bounded worker pool for password hashing on the login path
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from functools import lru_cache
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from apps.core.exceptions import ServiceUnavailableError
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHashingPool:
+    """
+    Fixed set of threads that run password hashing for this process.
+
+    PBKDF2 runs in OpenSSL with the GIL released, so `workers` threads
+    use up to `workers` cores while request threads just wait. At most
+    `max_pending` jobs may queue behind busy workers; beyond that (or
+    when a job is not finished within `timeout` seconds) callers get a
+    ServiceUnavailableError instead of piling more work onto the CPU.
+    """
+
+    def __init__(self, workers=None, max_pending=None, timeout=None):
+        self.workers = workers or getattr(settings, "PASSWORD_HASH_WORKERS", 0) or (
+            os.cpu_count() or 1
+        )
+        self.max_pending = (
+            max_pending
+            if max_pending is not None
+            else getattr(settings, "PASSWORD_HASH_MAX_PENDING", self.workers * 4)
+        )
+        self.timeout = timeout or getattr(settings, "PASSWORD_HASH_TIMEOUT", 5)
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="password-hash"
+        )
+        self.slots = threading.BoundedSemaphore(self.workers + self.max_pending)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.rejected = 0
+
+    def release(self, future):
+        with self.lock:
+            self.in_flight -= 1
+        self.slots.release()
+
+    def run(self, func, *args, **kwargs):
+        """Run func on the pool and return its result."""
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.rejected += 1
+            logger.warning("Password hashing pool is saturated, rejecting login")
+            raise ServiceUnavailableError("Too many logins in progress, please retry shortly")
+
+        with self.lock:
+            self.in_flight += 1
+        try:
+            future = self.executor.submit(func, *args, **kwargs)
+        except Exception:
+            self.release(None)
+            raise
+        # The slot is held until the job finishes, even if the caller
+        # stops waiting, so timed-out jobs still count against the limit
+        future.add_done_callback(self.release)
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            logger.warning(f"Password hashing took longer than {self.timeout}s")
+            raise ServiceUnavailableError("Too many logins in progress, please retry shortly")
+
+    def check_password(self, password, encoded):
+        """
+        Verify password against encoded on the pool.
+        Returns (is_correct, must_update); must_update is True when the
+        stored hash uses an outdated hasher or work factor.
+        """
+        upgrade = []
+
+        def verify():
+            is_correct = check_password(password, encoded, setter=upgrade.append)
+            return is_correct, bool(upgrade)
+
+        return self.run(verify)
+
+    def make_password(self, password):
+        return self.run(make_password, password)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "in_flight": self.in_flight,
+                "rejected": self.rejected,
+            }
+
+
+@lru_cache(maxsize=None)
+def get_password_hashing_pool():
+    """Return the process-wide password hashing pool."""
+    return PasswordHashingPool()
@@ -0,0 +1,107 @@
+"""
+File: backend/apps/authentication/management/commands/benchmark_login.py
+Purpose: Measure sustained password verifications per core on the hashing pool
+"""
+
+import os
+import threading
+import time
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from apps.authentication.hashing import PasswordHashingPool
+from apps.core.exceptions import ServiceUnavailableError
+
+
+class Command(BaseCommand):
+    """
+    Drive the login hashing path from concurrent clients and report
+    throughput, latency and overload rejections.
+    """
+
+    help = "Benchmark password verification throughput on the hashing pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=10.0,
+            help="Seconds to keep the pool busy",
+        )
+        parser.add_argument(
+            "--clients",
+            type=int,
+            default=None,
+            help="Concurrent callers (default: twice the number of workers)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Pool worker threads (default: PASSWORD_HASH_WORKERS or one per core)",
+        )
+        parser.add_argument(
+            "--max-pending",
+            type=int,
+            default=None,
+            help="Jobs allowed to queue before callers are rejected",
+        )
+
+    def handle(self, *args, **options):
+        pool = PasswordHashingPool(
+            workers=options["workers"], max_pending=options["max_pending"]
+        )
+        clients = options["clients"] or pool.workers * 2
+        password = "benchmark-Passw0rd"
+        encoded = make_password(password)
+
+        latencies = []
+        rejected = [0]
+        failures = [0]
+        lock = threading.Lock()
+        deadline = time.monotonic() + options["duration"]
+
+        def client():
+            while time.monotonic() < deadline:
+                start = time.monotonic()
+                try:
+                    is_correct, _ = pool.check_password(password, encoded)
+                except ServiceUnavailableError:
+                    with lock:
+                        rejected[0] += 1
+                    time.sleep(0.01)
+                    continue
+                with lock:
+                    latencies.append(time.monotonic() - start)
+                    failures[0] += int(not is_correct)
+
+        started = time.monotonic()
+        threads = [threading.Thread(target=client) for _ in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+        pool.executor.shutdown()
+
+        if failures[0]:
+            raise CommandError(f"{failures[0]} verification(s) returned a wrong result")
+
+        cores = min(pool.workers, os.cpu_count() or 1)
+        throughput = len(latencies) / elapsed
+        latencies.sort()
+
+        def percentile(fraction):
+            if not latencies:
+                return 0.0
+            return latencies[min(int(len(latencies) * fraction), len(latencies) - 1)] * 1000
+
+        self.stdout.write(f"Hasher:           {encoded.split('$', 1)[0]}")
+        self.stdout.write(f"Workers/clients:  {pool.workers}/{clients}")
+        self.stdout.write(f"Verifications:    {len(latencies)} in {elapsed:.1f}s")
+        self.stdout.write(f"Rejected (503):   {rejected[0]}")
+        self.stdout.write(f"Latency p50/p95:  {percentile(0.5):.0f}ms / {percentile(0.95):.0f}ms")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{throughput:.1f} logins/s, {throughput / cores:.1f} logins/s per core"
+            )
+        )
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:06
+
+import hashlib
+from django.db import migrations, models
+
+
+def hash_existing_tokens(apps, schema_editor):
+    # Outstanding links keep working: lookups hash the presented token
+    for model_name in ("PasswordResetToken", "EmailVerificationToken"):
+        model = apps.get_model("authentication", model_name)
+        for token in model.objects.only("pk", "token_hash").iterator():
+            token.token_hash = hashlib.sha256(token.token_hash.encode()).hexdigest()
+            token.save(update_fields=["token_hash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentication", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="emailverificationtoken",
+            name="authenticat_token_e79b2f_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="passwordresettoken",
+            name="authenticat_token_3288c7_idx",
+        ),
+        migrations.RenameField(
+            model_name="emailverificationtoken",
+            old_name="token",
+            new_name="token_hash",
+        ),
+        migrations.RenameField(
+            model_name="passwordresettoken",
+            old_name="token",
+            new_name="token_hash",
+        ),
+        migrations.RunPython(hash_existing_tokens, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="emailverificationtoken",
+            name="token_hash",
+            field=models.CharField(
+                help_text="SHA-256 digest of the token",
+                max_length=64,
+                unique=True,
+                verbose_name="token hash",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="passwordresettoken",
+            name="token_hash",
+            field=models.CharField(
+                help_text="SHA-256 digest of the token",
+                max_length=64,
+                unique=True,
+                verbose_name="token hash",
+            ),
+        ),
+    ]
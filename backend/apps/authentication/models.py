@@ -1,8 +1,11 @@
+import secrets
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 from django.db import models
+from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 from apps.core.models import TimeStampedModel
+from apps.core.utils import generate_hash
 from .managers import UserManager
 
 
@@ -83,22 +86,21 @@ class User(AbstractBaseUser, PermissionsMixin, TimeStampedModel):
         return self.first_name or self.email
 
 
-class PasswordResetToken(TimeStampedModel):
+class OneTimeToken(TimeStampedModel):
     """
-    Model for storing password reset tokens.
+    Abstract base for single-use tokens sent to users by email.
+
+    Only the SHA-256 digest of a token is stored, so rows are fixed
+    width and a leaked table cannot be replayed. Issuing a token marks
+    the user's earlier unused ones as used, and used or expired rows are
+    removed by a periodic chunked purge.
     """
 
-    user = models.ForeignKey(
-        User,
-        on_delete=models.CASCADE,
-        related_name="password_reset_tokens",
-        help_text=_("User associated with this reset token"),
-    )
-    token = models.CharField(
-        _("token"),
-        max_length=255,
+    token_hash = models.CharField(
+        _("token hash"),
+        max_length=64,
         unique=True,
-        help_text=_("Unique token for password reset"),
+        help_text=_("SHA-256 digest of the token"),
     )
     is_used = models.BooleanField(
         _("is used"), default=False, help_text=_("Indicates if the token has been used")
@@ -108,17 +110,48 @@ class PasswordResetToken(TimeStampedModel):
     )
 
     class Meta:
-        verbose_name = _("password reset token")
-        verbose_name_plural = _("password reset tokens")
-        ordering = ["-created_at"]
-        indexes = [
-            models.Index(fields=["token"]),
-            models.Index(fields=["user", "is_used"]),
-        ]
+        abstract = True
 
-    def __str__(self):
-        """Return string representation of the token."""
-        return f"Reset token for {self.user.email}"
+    @classmethod
+    def issue(cls, user, lifetime):
+        """
+        Invalidate the user's unused tokens and create a new one.
+        Returns the raw token, which is not stored anywhere.
+        """
+        token = secrets.token_urlsafe(48)
+        cls.objects.filter(user=user, is_used=False).update(
+            is_used=True, updated_at=timezone.now()
+        )
+        cls.objects.create(
+            user=user,
+            token_hash=generate_hash(token),
+            expires_at=timezone.now() + lifetime,
+        )
+        return token
+
+    @classmethod
+    def get_by_token(cls, token):
+        """Return the row for a raw token; raises DoesNotExist if unknown."""
+        return cls.objects.select_related("user").get(token_hash=generate_hash(token))
+
+    @classmethod
+    def purge(cls, now=None, batch_size=1000):
+        """
+        Delete used and expired rows in primary-key batches, so each
+        statement only touches one short batch of rows. The stale rows
+        are selected in SQL; live tokens are never read.
+        Returns the number of rows deleted.
+        """
+        now = now or timezone.now()
+        stale = cls.objects.filter(Q(is_used=True) | Q(expires_at__lte=now)).order_by("pk")
+        deleted = 0
+        last_pk = 0
+        while True:
+            pks = list(stale.filter(pk__gt=last_pk).values_list("pk", flat=True)[:batch_size])
+            if not pks:
+                return deleted
+            deleted += cls.objects.filter(pk__in=pks).delete()[0]
+            last_pk = pks[-1]
 
     def is_valid(self):
         """
@@ -129,10 +162,35 @@ class PasswordResetToken(TimeStampedModel):
     def mark_as_used(self):
         """Mark the token as used."""
         self.is_used = True
-        self.save(update_fields=["is_used"])
+        self.save(update_fields=["is_used", "updated_at"])
 
 
-class EmailVerificationToken(TimeStampedModel):
+class PasswordResetToken(OneTimeToken):
+    """
+    Model for storing password reset tokens.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="password_reset_tokens",
+        help_text=_("User associated with this reset token"),
+    )
+
+    class Meta:
+        verbose_name = _("password reset token")
+        verbose_name_plural = _("password reset tokens")
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["user", "is_used"]),
+        ]
+
+    def __str__(self):
+        """Return string representation of the token."""
+        return f"Reset token for {self.user.email}"
+
+
+class EmailVerificationToken(OneTimeToken):
     """
     Model for storing email verification tokens.
     """
@@ -143,39 +201,15 @@ class EmailVerificationToken(TimeStampedModel):
         related_name="email_verification_tokens",
         help_text=_("User associated with this verification token"),
     )
-    token = models.CharField(
-        _("token"),
-        max_length=255,
-        unique=True,
-        help_text=_("Unique token for email verification"),
-    )
-    is_used = models.BooleanField(
-        _("is used"), default=False, help_text=_("Indicates if the token has been used")
-    )
-    expires_at = models.DateTimeField(
-        _("expires at"), help_text=_("Token expiration date and time")
-    )
 
     class Meta:
         verbose_name = _("email verification token")
         verbose_name_plural = _("email verification tokens")
         ordering = ["-created_at"]
         indexes = [
-            models.Index(fields=["token"]),
             models.Index(fields=["user", "is_used"]),
         ]
 
     def __str__(self):
         """Return string representation of the token."""
         return f"Verification token for {self.user.email}"
-
-    def is_valid(self):
-        """
-        Check if the token is valid and not expired.
-        """
-        return not self.is_used and self.expires_at > timezone.now()
-
-    def mark_as_used(self):
-        """Mark the token as used."""
-        self.is_used = True
-        self.save(update_fields=["is_used"])
@@ -1,6 +1,10 @@
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
+from rest_framework_simplejwt.serializers import (
+    TokenRefreshSerializer as BaseTokenRefreshSerializer,
+)
 from .models import User
+from .tokens import RefreshToken
 from .validators import validate_phone_number_format
 
 
@@ -220,4 +224,12 @@ class EmailVerificationSerializer(serializers.Serializer):
     Serializer for email verification.
     """
 
-    token = serializers.CharField(required=True)
\ No newline at end of file
+    token = serializers.CharField(required=True)
+
+
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    """
+    Token refresh serializer checking the blacklist through the bloom filter.
+    """
+
+    token_class = RefreshToken
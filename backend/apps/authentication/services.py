@@ -1,21 +1,32 @@
 import logging
 from datetime import timedelta
 from django.utils import timezone
-from django.contrib.auth import authenticate
 from django.db import transaction
 from django.conf import settings
-from rest_framework_simplejwt.tokens import RefreshToken
-from apps.core.utils import generate_random_string, send_email
-from apps.core.exceptions import AuthenticationError, ValidationError, NotFoundError
+from django.contrib.auth import authenticate
+from django.contrib.auth.signals import user_login_failed
+from apps.core.utils import send_email
+from apps.core.exceptions import (
+    AuthenticationError,
+    NotFoundError,
+    ServiceUnavailableError,
+    ValidationError,
+)
+from apps.cart.services import CartService
+from .hashing import get_password_hashing_pool
 from .models import User, PasswordResetToken, EmailVerificationToken
+from .throttling import LoginThrottle
+from .tokens import RefreshToken
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_AUTHENTICATION_BACKEND = "django.contrib.auth.backends.ModelBackend"
+
 
 class AuthenticationService:
 
     @staticmethod
-    def register_user(validated_data):
+    def register_user(validated_data, cart_token=None):
         with transaction.atomic():
             data = validated_data.copy()
             password = data.pop("password")
@@ -23,17 +34,65 @@ class AuthenticationService:
             user = User.objects.create_user(password=password, **data)
             tokens = AuthenticationService.generate_tokens(user)
             AuthenticationService.send_verification_email(user)
+            if cart_token:
+                CartService.merge_guest_cart(user, cart_token)
 
             logger.info(f"New user registered: {user.email}")
 
         return user, tokens
 
     @staticmethod
-    def login_user(email, password, ip_address=None):
+    def authenticate_credentials(email, password):
+        """
+        Return the active user matching email and password, or None.
+
+        With the default ModelBackend this does the same checks as
+        django.contrib.auth.authenticate(), including sending
+        user_login_failed, but hashes on the bounded hashing pool.
+        Unknown emails still pay for one hash so response times do not
+        reveal which accounts exist. A correct password stored with an
+        outdated hasher or work factor is re-hashed and saved. Other
+        AUTHENTICATION_BACKENDS go through authenticate() itself.
+        """
+        if settings.AUTHENTICATION_BACKENDS != [DEFAULT_AUTHENTICATION_BACKEND]:
+            return authenticate(email=email, password=password)
+
+        pool = get_password_hashing_pool()
+        try:
+            user = User.objects.get_by_natural_key(email)
+        except User.DoesNotExist:
+            pool.make_password(password)
+            user = None
+
+        if user is not None:
+            is_correct, must_update = pool.check_password(password, user.password)
+            # Inactive users are rejected like wrong passwords, as ModelBackend does
+            if not is_correct or not user.is_active:
+                user = None
+
+        if user is None:
+            user_login_failed.send(
+                sender=__name__,
+                credentials={"email": email, "password": "********************"},
+                request=None,
+            )
+            return None
+
+        if must_update:
+            user.password = pool.make_password(password)
+            user.save(update_fields=["password"])
+            logger.info(f"Upgraded password hash for {email}")
+        return user
+
+    @staticmethod
+    def login_user(email, password, ip_address=None, cart_token=None):
+        LoginThrottle.check(email, ip_address)
+        LoginThrottle.record_attempt(ip_address)
         try:
-            user = authenticate(email=email, password=password)
+            user = AuthenticationService.authenticate_credentials(email, password)
 
             if user is None:
+                LoginThrottle.record_failure(email)
                 logger.warning(f"Failed login attempt for {email} from {ip_address}")
                 raise AuthenticationError("Invalid email or password")
 
@@ -41,16 +100,22 @@ class AuthenticationService:
                 logger.warning(f"Login attempt for inactive account: {email} from {ip_address}")
                 raise AuthenticationError("Account is deactivated")
 
+            LoginThrottle.clear_failures(email)
+            user.last_login = timezone.now()
+            update_fields = ["last_login"]
             if ip_address:
                 user.last_login_ip = ip_address
-                user.save(update_fields=["last_login_ip", "last_login"])
+                update_fields.append("last_login_ip")
+            user.save(update_fields=update_fields)
 
             tokens = AuthenticationService.generate_tokens(user)
+            if cart_token:
+                CartService.merge_guest_cart(user, cart_token)
 
             logger.info(f"Successful login: {email} from {ip_address}")
 
             return user, tokens
-        except AuthenticationError:
+        except (AuthenticationError, ServiceUnavailableError):
             raise
         except Exception as e:
             logger.error(f"Login error for {email}: {str(e)}")
@@ -83,10 +148,7 @@ class AuthenticationService:
             logger.info(f"Password reset requested for non-existent email: {email}")
             return
 
-        token = generate_random_string(64)
-        expires_at = timezone.now() + timedelta(hours=24)
-
-        PasswordResetToken.objects.create(user=user, token=token, expires_at=expires_at)
+        token = PasswordResetToken.issue(user, timedelta(hours=24))
 
         AuthenticationService.send_password_reset_email(user, token)
 
@@ -95,7 +157,7 @@ class AuthenticationService:
     @staticmethod
     def reset_password(token, new_password):
         try:
-            reset_token = PasswordResetToken.objects.get(token=token)
+            reset_token = PasswordResetToken.get_by_token(token)
         except PasswordResetToken.DoesNotExist:
             logger.warning(f"Invalid password reset token attempted: {token[:10]}...")
             raise NotFoundError("Invalid or expired reset token")
@@ -114,12 +176,7 @@ class AuthenticationService:
 
     @staticmethod
     def send_verification_email(user):
-        token = generate_random_string(64)
-        expires_at = timezone.now() + timedelta(days=7)
-
-        EmailVerificationToken.objects.create(
-            user=user, token=token, expires_at=expires_at
-        )
+        token = EmailVerificationToken.issue(user, timedelta(days=7))
 
         frontend_url = getattr(settings, 'FRONTEND_URL', 'http://localhost:5173')
         verification_url = f"{frontend_url}/email/verify?token={token}"
@@ -131,12 +188,12 @@ class AuthenticationService:
             context={'user': user, 'token': token, 'verification_url': verification_url}
         )
 
-        logger.info(f"Verification email sent to {user.email}")
+        logger.info(f"Verification email queued for {user.email}")
 
     @staticmethod
     def verify_email(token):
         try:
-            verification_token = EmailVerificationToken.objects.get(token=token)
+            verification_token = EmailVerificationToken.get_by_token(token)
         except EmailVerificationToken.DoesNotExist:
             logger.warning(f"Invalid email verification token attempted: {token[:10]}...")
             raise NotFoundError("Invalid or expired verification token")
@@ -153,6 +210,17 @@ class AuthenticationService:
 
         logger.info(f"Email verified successfully for {user.email}")
 
+    @staticmethod
+    def purge_tokens(now=None):
+        """Delete used and expired reset and verification tokens in batches."""
+        batch_size = getattr(settings, "AUTH_TOKEN_PURGE_BATCH_SIZE", 1000)
+        deleted = {
+            "password_reset": PasswordResetToken.purge(now, batch_size),
+            "email_verification": EmailVerificationToken.purge(now, batch_size),
+        }
+        logger.info(f"Purged tokens: {deleted}")
+        return deleted
+
     @staticmethod
     def send_password_reset_email(user, token):
         frontend_url = getattr(settings, 'FRONTEND_URL', 'http://localhost:5173')
@@ -165,4 +233,4 @@ class AuthenticationService:
             context={'user': user, 'token': token, 'reset_url': reset_url}
         )
 
-        logger.info(f"Password reset email sent to {user.email}")
+        logger.info(f"Password reset email queued for {user.email}")
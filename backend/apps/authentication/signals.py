@@ -0,0 +1,25 @@
+"""
+File: backend/apps/authentication/signals.py
+Purpose: Signal handlers keeping authentication caches in sync
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from .blacklist import TokenBlacklist
+from .cache import UserCache
+from .models import User
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Drop the cached user on any change (profile, password, deactivation)."""
+    UserCache.invalidate(getattr(instance, api_settings.USER_ID_FIELD))
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def update_token_blacklist(sender, instance, created, **kwargs):
+    """Add newly blacklisted tokens to the bloom filters."""
+    if created:
+        TokenBlacklist.added(instance.token.jti)
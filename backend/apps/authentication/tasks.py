@@ -0,0 +1,13 @@
+"""
+File: backend/apps/authentication/tasks.py
+Purpose: Celery tasks for authentication models
+"""
+
+from celery import shared_task
+from .services import AuthenticationService
+
+
+@shared_task
+def purge_auth_tokens():
+    """Delete used and expired password reset and email verification tokens."""
+    return AuthenticationService.purge_tokens()
@@ -1 +1,397 @@
-from django.test import TestCase
+import threading
+import time
+from unittest import mock
+from datetime import timedelta
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.signals import user_login_failed
+from django.core.cache import cache
+from django.utils import timezone
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from apps.core.exceptions import NotFoundError, ServiceUnavailableError, ValidationError
+from apps.core.utils import generate_hash
+from .blacklist import BloomFilter, TokenBlacklist
+from .cache import UserCache
+from .checks import check_login_throttle_cache
+from .hashing import PasswordHashingPool
+from .models import EmailVerificationToken, PasswordResetToken, User
+from .services import AuthenticationService
+from .throttling import SlidingWindowCounter
+from .tokens import RefreshToken
+
+
+class BloomFilterTests(TestCase):
+    """Tests for the bloom filter used in front of the token blacklist."""
+
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(1000)
+        items = [f"jti-{index}" for index in range(1000)]
+        for item in items:
+            bloom.add(item)
+
+        self.assertTrue(all(item in bloom for item in items))
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter(1000, error_rate=0.01)
+        for index in range(1000):
+            bloom.add(f"jti-{index}")
+
+        hits = sum(f"other-{index}" in bloom for index in range(10000))
+        self.assertLess(hits, 300)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class CachedJWTAuthenticationTests(TestCase):
+    """Tests for cached user lookup and blacklist checks on authenticated requests."""
+
+    def setUp(self):
+        cache.clear()
+        TokenBlacklist.reset()
+        self.user = User.objects.create_user(
+            email="member@example.com",
+            password="x-Passw0rd",
+            first_name="Jane",
+            last_name="Doe",
+        )
+        self.refresh = RefreshToken.for_user(self.user)
+        self.access = self.refresh.access_token
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {self.access}"}
+
+    def get_profile(self):
+        return self.client.get(reverse("authentication:profile"), **self.auth)
+
+    def test_warm_request_does_not_query(self):
+        self.assertEqual(self.get_profile().status_code, 200)
+
+        with self.assertNumQueries(0):
+            response = self.get_profile()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"]["email"], "member@example.com")
+
+    def test_user_save_invalidates_cache(self):
+        self.get_profile()
+        self.assertIsNotNone(UserCache.get(self.user.pk))
+
+        self.user.first_name = "Janet"
+        self.user.save(update_fields=["first_name"])
+
+        self.assertIsNone(UserCache.get(self.user.pk))
+        self.assertEqual(self.get_profile().json()["data"]["first_name"], "Janet")
+
+    def test_deactivated_user_is_rejected(self):
+        self.get_profile()
+
+        self.user.is_active = False
+        self.user.save(update_fields=["is_active"])
+
+        self.assertEqual(self.get_profile().status_code, 401)
+
+    def test_password_change_invalidates_cache(self):
+        self.get_profile()
+
+        AuthenticationService.change_password(self.user, "x-Passw0rd", "n3w-Passw0rd")
+
+        self.assertIsNone(UserCache.get(self.user.pk))
+        with self.assertNumQueries(1):
+            self.get_profile()
+
+    @mock.patch.object(api_settings, "CHECK_REVOKE_TOKEN", True)
+    def test_password_change_revokes_tokens_when_enabled(self):
+        access = RefreshToken.for_user(self.user).access_token
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {access}"}
+        self.assertEqual(self.get_profile().status_code, 200)
+
+        AuthenticationService.change_password(self.user, "x-Passw0rd", "n3w-Passw0rd")
+
+        self.assertEqual(self.get_profile().status_code, 401)
+
+    def test_blacklist_filter_skips_database_on_miss(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            RefreshToken.for_user(self.user).blacklist()
+        TokenBlacklist.get_filter()
+
+        with self.assertNumQueries(0):
+            self.assertFalse(TokenBlacklist.is_blacklisted(self.refresh["jti"]))
+
+    def test_other_process_rebuilds_after_blacklisting(self):
+        TokenBlacklist.get_filter()
+        stale_version = TokenBlacklist.version
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.refresh.blacklist()
+        # Simulate a process whose filter predates the blacklisting
+        TokenBlacklist.bloom = BloomFilter(TokenBlacklist.min_capacity)
+        TokenBlacklist.version = stale_version
+
+        self.assertTrue(TokenBlacklist.is_blacklisted(self.refresh["jti"]))
+
+    @override_settings(CACHE_SINGLE_PROCESS=False)
+    def test_process_local_cache_checks_database(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.refresh.blacklist()
+        # A filter built before the blacklisting would miss the token
+        TokenBlacklist.bloom = BloomFilter(TokenBlacklist.min_capacity)
+        TokenBlacklist.version = TokenBlacklist.get_version()
+        TokenBlacklist.built_at = time.monotonic()
+
+        self.assertTrue(TokenBlacklist.is_blacklisted(self.refresh["jti"]))
+
+    @override_settings(CACHE_SINGLE_PROCESS=False)
+    def test_process_local_cache_does_not_cache_users(self):
+        self.get_profile()
+
+        self.assertIsNone(UserCache.get(self.user.pk))
+        with self.assertNumQueries(1):
+            self.get_profile()
+
+    def test_rotated_refresh_token_is_rejected(self):
+        url = reverse("authentication:token-refresh")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, {"refresh": str(self.refresh)})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(
+            BlacklistedToken.objects.filter(token__jti=self.refresh["jti"]).exists()
+        )
+
+        response = self.client.post(url, {"refresh": str(self.refresh)})
+        self.assertEqual(response.status_code, 401)
+
+
+class SlidingWindowCounterTests(TestCase):
+    """Tests for the cache-backed sliding-window counter."""
+
+    def setUp(self):
+        cache.clear()
+
+    def get_count(self, counter, now):
+        values = cache.get_many(list(counter.get_keys("client", now)))
+        return counter.count(values, "client", now)
+
+    def test_previous_window_decays(self):
+        counter = SlidingWindowCounter("test", limit=10, window=60)
+        for _ in range(4):
+            counter.hit("client", 600)
+
+        self.assertEqual(self.get_count(counter, 630), 4)
+        self.assertEqual(self.get_count(counter, 690), 2)
+        self.assertEqual(self.get_count(counter, 720), 0)
+
+    def test_clear(self):
+        counter = SlidingWindowCounter("test", limit=10, window=60)
+        counter.hit("client", 600)
+        counter.clear("client", 610)
+
+        self.assertEqual(self.get_count(counter, 610), 0)
+
+    def test_check_needs_shared_cache(self):
+        self.assertEqual(check_login_throttle_cache(), [])
+        with override_settings(CACHE_SINGLE_PROCESS=False):
+            self.assertEqual(
+                [m.id for m in check_login_throttle_cache()], ["authentication.W001"]
+            )
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False,
+    LOGIN_EMAIL_FAILURE_LIMIT=2,
+    LOGIN_IP_ATTEMPT_LIMIT=4,
+    PASSWORD_HASHERS=[
+        "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+        "django.contrib.auth.hashers.MD5PasswordHasher",
+    ],
+)
+class LoginPipelineTests(TestCase):
+    """Tests for login limits, the hashing pool and hash upgrades."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="member@example.com",
+            password="x-Passw0rd",
+            first_name="Jane",
+            last_name="Doe",
+        )
+
+    def login(self, password="x-Passw0rd", email="member@example.com", ip="10.0.0.1"):
+        return self.client.post(
+            reverse("authentication:login"),
+            {"email": email, "password": password},
+            REMOTE_ADDR=ip,
+        )
+
+    def test_login_succeeds(self):
+        response = self.login()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("access", response.json()["data"]["tokens"])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.last_login_ip, "10.0.0.1")
+        self.assertIsNotNone(self.user.last_login)
+
+    def test_email_failures_block_before_hashing(self):
+        self.assertEqual(self.login("wrong", ip="10.0.0.1").status_code, 401)
+        self.assertEqual(self.login("wrong", ip="10.0.0.2").status_code, 401)
+
+        with mock.patch.object(PasswordHashingPool, "run") as run:
+            response = self.login(ip="10.0.0.3")
+
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+        run.assert_not_called()
+
+    def test_successful_login_clears_email_failures(self):
+        self.login("wrong")
+        self.assertEqual(self.login().status_code, 200)
+
+        self.assertEqual(self.login("wrong").status_code, 401)
+        self.assertEqual(self.login().status_code, 200)
+
+    def test_ip_attempts_are_limited(self):
+        for index in range(4):
+            self.login("wrong", email=f"nobody{index}@example.com")
+
+        response = self.login()
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(self.login(ip="10.0.0.9").status_code, 200)
+
+    def test_saturated_pool_returns_503(self):
+        pool = PasswordHashingPool(workers=1, max_pending=0)
+        started = threading.Event()
+        release = threading.Event()
+
+        def block():
+            started.set()
+            release.wait(5)
+
+        blocker = threading.Thread(target=pool.run, args=(block,))
+        blocker.start()
+        started.wait(5)
+        try:
+            with self.assertRaises(ServiceUnavailableError):
+                pool.make_password("x-Passw0rd")
+
+            with mock.patch(
+                "apps.authentication.services.get_password_hashing_pool",
+                return_value=pool,
+            ):
+                response = self.login()
+        finally:
+            release.set()
+            blocker.join()
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(pool.stats()["rejected"], 2)
+
+    def test_outdated_hash_is_upgraded(self):
+        self.user.password = make_password("x-Passw0rd", hasher="md5")
+        self.user.save(update_fields=["password"])
+
+        self.assertEqual(self.login().status_code, 200)
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$"))
+        self.assertTrue(self.user.check_password("x-Passw0rd"))
+
+    def test_inactive_user_gets_generic_error(self):
+        self.user.is_active = False
+        self.user.save(update_fields=["is_active"])
+
+        response = self.login()
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()["message"], "Invalid email or password")
+
+    def test_failures_send_user_login_failed(self):
+        handler = mock.Mock()
+        user_login_failed.connect(handler)
+        self.addCleanup(user_login_failed.disconnect, handler)
+
+        self.login("wrong")
+
+        credentials = handler.call_args.kwargs["credentials"]
+        self.assertEqual(credentials["email"], "member@example.com")
+        self.assertNotEqual(credentials["password"], "wrong")
+
+
+class OneTimeTokenTests(TestCase):
+    """Tests for hashed reset/verification tokens and their purge."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="member@example.com",
+            password="x-Passw0rd",
+            first_name="Jane",
+            last_name="Doe",
+        )
+
+    def request_reset(self):
+        with mock.patch.object(AuthenticationService, "send_password_reset_email") as send:
+            AuthenticationService.request_password_reset("member@example.com")
+        return send.call_args.args[1]
+
+    def test_only_digest_is_stored(self):
+        token = self.request_reset()
+
+        stored = PasswordResetToken.objects.get()
+        self.assertEqual(stored.token_hash, generate_hash(token))
+        self.assertFalse(PasswordResetToken.objects.filter(token_hash=token).exists())
+
+        AuthenticationService.reset_password(token, "n3w-Passw0rd")
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("n3w-Passw0rd"))
+
+        with self.assertRaises(ValidationError):
+            AuthenticationService.reset_password(token, "an0ther-Passw0rd")
+        with self.assertRaises(NotFoundError):
+            AuthenticationService.reset_password(stored.token_hash, "an0ther-Passw0rd")
+
+    def test_new_token_invalidates_older_ones(self):
+        first = self.request_reset()
+        second = self.request_reset()
+
+        with self.assertRaises(ValidationError):
+            AuthenticationService.reset_password(first, "n3w-Passw0rd")
+        AuthenticationService.reset_password(second, "n3w-Passw0rd")
+
+    def test_verification_tokens(self):
+        EmailVerificationToken.issue(self.user, timedelta(days=7))
+        token = EmailVerificationToken.issue(self.user, timedelta(days=7))
+
+        self.assertEqual(
+            EmailVerificationToken.objects.filter(user=self.user, is_used=False).count(), 1
+        )
+        AuthenticationService.verify_email(token)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_email_verified)
+
+    def test_purge_deletes_used_and_expired_in_batches(self):
+        live = []
+        for index in range(5):
+            PasswordResetToken.issue(self.user, timedelta(hours=1))
+            live.append(PasswordResetToken.objects.latest("pk").pk)
+        other = User.objects.create_user(email="other@example.com", password="x-Passw0rd")
+        PasswordResetToken.issue(other, timedelta(hours=-1))
+        PasswordResetToken.issue(other, timedelta(hours=1))
+
+        # Three batches of stale rows, each selected then deleted, and a final empty select
+        with self.assertNumQueries(7):
+            deleted = PasswordResetToken.purge(batch_size=2)
+
+        self.assertEqual(deleted, 5)
+        self.assertEqual(
+            set(PasswordResetToken.objects.values_list("pk", flat=True)),
+            {live[-1], PasswordResetToken.objects.get(user=other).pk},
+        )
+
+    def test_purge_tokens_covers_both_tables(self):
+        EmailVerificationToken.issue(self.user, timedelta(days=7))
+        PasswordResetToken.issue(self.user, timedelta(hours=1))
+
+        deleted = AuthenticationService.purge_tokens(now=timezone.now() + timedelta(days=8))
+
+        self.assertEqual(deleted, {"password_reset": 1, "email_verification": 1})
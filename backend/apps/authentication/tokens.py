@@ -0,0 +1,18 @@
+"""
+File: backend/apps/authentication/tokens.py
+Purpose: JWT token classes checking the blacklist through the bloom filter
+"""
+
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+from .blacklist import TokenBlacklist
+
+
+class RefreshToken(BaseRefreshToken):
+    """Refresh token whose blacklist check skips the database on a filter miss."""
+
+    def check_blacklist(self):
+        if TokenBlacklist.is_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
@@ -5,6 +5,7 @@ from rest_framework.throttling import AnonRateThrottle
 from apps.core.responses import (success_response,
                                  error_response, created_response)
 from apps.core.utils import get_client_ip
+from apps.cart.guest import GuestCart
 from .serializers import (
     UserRegistrationSerializer,
     UserLoginSerializer,
@@ -19,10 +20,6 @@ from .services import AuthenticationService
 from .permissions import IsAccountOwner
 
 
-class AuthRateThrottle(AnonRateThrottle):
-    rate = '5/hour'
-
-
 class RegisterRateThrottle(AnonRateThrottle):
     rate = '3/hour'
 
@@ -40,7 +37,10 @@ class UserRegistrationView(APIView):
         serializer = self.serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        user, tokens = AuthenticationService.register_user(serializer.validated_data)
+        user, tokens = AuthenticationService.register_user(
+            serializer.validated_data,
+            cart_token=request.headers.get(GuestCart.header),
+        )
 
         return created_response(
             data={"user": UserSerializer(user).data, "tokens": tokens},
@@ -51,7 +51,8 @@ class UserRegistrationView(APIView):
 class UserLoginView(APIView):
     permission_classes = [AllowAny]
     serializer_class = UserLoginSerializer
-    throttle_classes = [AuthRateThrottle]
+    # Limited per IP and per email by LoginThrottle in the service
+    throttle_classes = []
 
     def post(self, request):
         serializer = self.serializer_class(data=request.data)
@@ -62,6 +63,7 @@ class UserLoginView(APIView):
             email=serializer.validated_data["email"],
             password=serializer.validated_data["password"],
             ip_address=ip_address,
+            cart_token=request.headers.get(GuestCart.header),
         )
 
         return success_response(
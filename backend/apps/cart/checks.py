@@ -0,0 +1,24 @@
+"""
+File: backend/apps/cart/checks.py
+Purpose: System checks for cart settings
+"""
+
+from django.core.checks import Tags, Warning, register
+from apps.core.cache import is_shared_cache
+
+
+@register(Tags.caches, deploy=True)
+def check_guest_cart_cache(app_configs=None, **kwargs):
+    """Warn when guest carts live in a cache only one worker can see."""
+    if is_shared_cache():
+        return []
+    return [
+        Warning(
+            "Guest carts are stored in a cache that is not shared between processes.",
+            hint=(
+                "A guest cart vanishes whenever a request lands on another worker. "
+                "Use a shared cache such as Redis."
+            ),
+            id="cart.W001",
+        )
+    ]
@@ -0,0 +1,108 @@
+"""
+File: backend/apps/cart/guest.py
+Purpose: Cache-backed storage for anonymous (guest) carts
+"""
+
+import re
+import secrets
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+
+class GuestCart:
+    """
+    Anonymous cart stored as a single cache entry keyed by an opaque token.
+
+    The client keeps the token and sends it back in the ``X-Cart-Token``
+    header. The entry maps line ids to product, variant and quantity, and
+    its TTL is renewed on every change, so abandoned carts simply expire.
+
+    Changes read, modify and write back the whole entry, so of two
+    concurrent changes to the same cart the last write wins. A guest
+    cart is driven by one browser, where that is acceptable. The entry
+    must live in a cache every worker sees (see cart.W001).
+    """
+
+    header = "X-Cart-Token"
+    key_prefix = "guest_cart"
+    token_re = re.compile(r"^[A-Za-z0-9_-]{32}$")
+
+    def __init__(self, token=None, data=None):
+        now = timezone.now()
+        data = data or {}
+        self.token = token
+        self.id = None
+        self.created_at = data.get("created_at", now)
+        self.updated_at = data.get("updated_at", now)
+        self.next_id = data.get("next_id", 1)
+        self.lines = data.get("lines", {})
+
+    @staticmethod
+    def get_timeout():
+        return getattr(settings, "GUEST_CART_TTL", 60 * 60 * 24 * 7)
+
+    @classmethod
+    def make_key(cls, token):
+        return f"{cls.key_prefix}:{token}"
+
+    @classmethod
+    def is_valid_token(cls, token):
+        return bool(token) and bool(cls.token_re.match(token))
+
+    @classmethod
+    def load(cls, token):
+        """Return the stored cart for token, or None if it is unknown or expired."""
+        if not cls.is_valid_token(token):
+            return None
+        data = cache.get(cls.make_key(token))
+        if data is None:
+            return None
+        return cls(token, data)
+
+    @classmethod
+    def from_request(cls, request):
+        """Return the request's guest cart, or a new unsaved one."""
+        token = request.headers.get(cls.header)
+        return cls.load(token) or cls()
+
+    def find_line(self, product_id, variant_id):
+        """Return the id of the line holding product/variant, or None."""
+        for line_id, line in self.lines.items():
+            if line["product_id"] == product_id and line["variant_id"] == variant_id:
+                return line_id
+        return None
+
+    def set_line(self, product_id, variant_id, quantity):
+        """Create or update the line for product/variant and return its id."""
+        line_id = self.find_line(product_id, variant_id)
+        if line_id is None:
+            line_id = self.next_id
+            self.next_id += 1
+            self.lines[line_id] = {
+                "product_id": product_id,
+                "variant_id": variant_id,
+                "quantity": quantity,
+                "created_at": timezone.now(),
+            }
+        else:
+            self.lines[line_id]["quantity"] = quantity
+        return line_id
+
+    def save(self):
+        """Persist the cart, issuing a token on first save."""
+        if self.token is None:
+            self.token = secrets.token_urlsafe(24)
+        self.updated_at = timezone.now()
+        data = {
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "next_id": self.next_id,
+            "lines": self.lines,
+        }
+        cache.set(self.make_key(self.token), data, self.get_timeout())
+
+    def delete(self):
+        """Remove the stored cart."""
+        if self.token is not None:
+            cache.delete(self.make_key(self.token))
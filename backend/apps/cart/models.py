@@ -1,3 +1,4 @@
+from decimal import Decimal
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator
@@ -25,15 +26,24 @@ class Cart(TimeStampedModel):
         """Return string representation of the cart."""
         return f"Cart for {self.user.email}"
 
+    def get_totals(self):
+        """Return (total items, subtotal) in a single pass over the items."""
+        total_items = 0
+        subtotal = Decimal("0.00")
+        for item in self.items.all():
+            total_items += item.quantity
+            subtotal += item.total_price
+        return total_items, subtotal
+
     @property
     def total_items(self):
         """Get total number of items in cart."""
-        return sum(item.quantity for item in self.items.all())
+        return self.get_totals()[0]
 
     @property
     def subtotal(self):
         """Calculate cart subtotal."""
-        return sum(item.total_price for item in self.items.all())
+        return self.get_totals()[1]
 
     def clear(self):
         """Remove all items from cart."""
@@ -90,7 +100,8 @@ class CartItem(TimeStampedModel):
     def price(self):
         """Get price per unit."""
         if self.variant:
-            return self.variant.final_price
+            # Same as variant.final_price, without walking variant.product
+            return self.product.price + self.variant.price_adjustment
         return self.product.price
 
     @property
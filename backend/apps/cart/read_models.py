@@ -0,0 +1,62 @@
+"""
+File: backend/apps/cart/read_models.py
+Purpose: Read-models used to serialize carts without extra queries
+"""
+
+from decimal import Decimal
+from django.db.models import DecimalField, F, IntegerField, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+class CartSummary:
+    """
+    Read-only view of a cart: its lines plus totals.
+    Lines must come with product, category, variant and images loaded;
+    unit prices, line prices and totals are then computed in one pass.
+    """
+
+    def __init__(self, cart, items):
+        self.id = cart.id
+        self.created_at = cart.created_at
+        self.updated_at = cart.updated_at
+        self.items = list(items)
+        self.total_items = 0
+        self.subtotal = Decimal("0.00")
+        for item in self.items:
+            if item.variant is not None:
+                item.variant.product = item.product
+            self.total_items += item.quantity
+            self.subtotal += item.total_price
+
+
+class CartLineSummary:
+    """
+    A single changed cart line plus the cart totals.
+    ``item`` is None when the line was removed.
+    """
+
+    def __init__(self, item, total_items, subtotal):
+        self.item = item
+        self.total_items = total_items
+        self.subtotal = subtotal
+        if item is not None and item.variant is not None:
+            item.variant.product = item.product
+
+    @classmethod
+    def from_items(cls, items, item=None):
+        """Build the summary from a queryset of the cart's lines in one aggregate query."""
+        totals = items.aggregate(
+            total_items=Coalesce(Sum("quantity"), Value(0), output_field=IntegerField()),
+            subtotal=Coalesce(
+                Sum(
+                    F("quantity")
+                    * (
+                        F("product__price")
+                        + Coalesce(F("variant__price_adjustment"), Value(Decimal("0.00")))
+                    )
+                ),
+                Value(Decimal("0.00")),
+                output_field=DecimalField(max_digits=10, decimal_places=2),
+            ),
+        )
+        return cls(item, totals["total_items"], totals["subtotal"])
@@ -47,7 +47,7 @@ class CartItemSerializer(serializers.ModelSerializer):
 
 
 class CartSerializer(serializers.ModelSerializer):
-    """Serializer for cart."""
+    """Serializer for cart summaries (see read_models.CartSummary)."""
 
     items = CartItemSerializer(many=True, read_only=True)
     total_items = serializers.IntegerField(read_only=True)
@@ -68,6 +68,16 @@ class CartSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "created_at", "updated_at"]
 
 
+class CartLineSerializer(serializers.Serializer):
+    """Serializer for a changed cart line plus the cart totals."""
+
+    item = CartItemSerializer(read_only=True, allow_null=True)
+    total_items = serializers.IntegerField(read_only=True)
+    subtotal = serializers.DecimalField(
+        max_digits=10, decimal_places=2, read_only=True
+    )
+
+
 class AddToCartSerializer(serializers.Serializer):
     """Serializer for adding items to cart."""
 
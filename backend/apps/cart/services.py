@@ -1,8 +1,12 @@
 import logging
 from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
 from apps.core.exceptions import NotFoundError, ValidationError
 from apps.products.models import Product, ProductVariant
+from .guest import GuestCart
 from .models import Cart, CartItem
+from .read_models import CartLineSummary, CartSummary
 
 logger = logging.getLogger(__name__)
 
@@ -18,26 +22,54 @@ class CartService:
             logger.info(f"Created new cart for user {user.email}")
         return cart
 
+    @staticmethod
+    def get_cart_items_queryset():
+        """Cart items with everything their serialization reads."""
+        return CartItem.objects.select_related(
+            "product__category", "variant"
+        ).prefetch_related("product__images")
+
     @staticmethod
     def get_cart(user):
         """Get user's cart with items."""
         try:
             cart = Cart.objects.prefetch_related(
-                "items__product__images",
-                "items__product__category",
-                "items__variant",
+                Prefetch("items", queryset=CartService.get_cart_items_queryset())
             ).get(user=user)
             return cart
         except Cart.DoesNotExist:
             return CartService.get_or_create_cart(user)
 
     @staticmethod
-    @transaction.atomic
-    def add_to_cart(user, product_id, variant_id=None, quantity=1):
-        """Add item to cart or update quantity if exists."""
-        cart = CartService.get_or_create_cart(user)
+    def get_cart_summary(user):
+        """Get a read-model of the user's cart with lines and totals."""
+        cart = CartService.get_cart(user)
+        return CartSummary(cart, cart.items.all())
+
+    @staticmethod
+    def get_line_summary(user, item_id=None):
+        """
+        Get a read-model of one cart line plus the cart totals.
+        Pass no item_id (or the id of a removed line) to get only the totals.
+        """
+        item = None
+        if item_id is not None:
+            item = (
+                CartService.get_cart_items_queryset()
+                .filter(id=item_id, cart__user=user)
+                .first()
+            )
+        items = CartItem.objects.filter(cart__user=user)
+        return CartLineSummary.from_items(items, item)
+
+    @staticmethod
+    def get_purchasable(product_id, variant_id, quantity):
+        """
+        Return (product, variant) for an item that may be added to a cart,
+        raising if either is unavailable or lacks stock for quantity.
+        """
         try:
-            product = Product.objects.get(id=product_id, is_active=True, is_deleted=False)
+            product = Product.objects.get(id=product_id, is_active=True)
         except Product.DoesNotExist:
             raise NotFoundError("Product not found")
         variant = None
@@ -47,24 +79,29 @@ class CartService:
                     id=variant_id,
                     product=product,
                     is_active=True,
-                    is_deleted=False,
                 )
             except ProductVariant.DoesNotExist:
                 raise NotFoundError("Product variant not found")
             if not variant.is_in_stock:
                 raise ValidationError("Product variant is out of stock")
-            if variant.stock_quantity < quantity:
-                raise ValidationError(
-                    f"Only {variant.stock_quantity} items available"
-                )
-        else:
-            if not product.is_in_stock:
-                raise ValidationError("Product is out of stock")
+        elif not product.is_in_stock:
+            raise ValidationError("Product is out of stock")
+        CartService.check_stock(product, variant, quantity)
+        return product, variant
 
-            if product.stock_quantity < quantity:
-                raise ValidationError(
-                    f"Only {product.stock_quantity} items available"
-                )
+    @staticmethod
+    def check_stock(product, variant, quantity):
+        """Raise if quantity exceeds the stock of the variant (or product)."""
+        max_stock = variant.stock_quantity if variant else product.stock_quantity
+        if quantity > max_stock:
+            raise ValidationError(f"Only {max_stock} items available")
+
+    @staticmethod
+    @transaction.atomic
+    def add_to_cart(user, product_id, variant_id=None, quantity=1):
+        """Add item to cart or update quantity if exists. Returns the cart item."""
+        cart = CartService.get_or_create_cart(user)
+        product, variant = CartService.get_purchasable(product_id, variant_id, quantity)
         cart_item, created = CartItem.objects.get_or_create(
             cart=cart,
             product=product,
@@ -74,10 +111,7 @@ class CartService:
 
         if not created:
             new_quantity = cart_item.quantity + quantity
-
-            max_stock = variant.stock_quantity if variant else product.stock_quantity
-            if new_quantity > max_stock:
-                raise ValidationError(f"Only {max_stock} items available")
+            CartService.check_stock(product, variant, new_quantity)
 
             cart_item.quantity = new_quantity
             cart_item.save(update_fields=["quantity"])
@@ -86,28 +120,19 @@ class CartService:
             f"Added {quantity}x {product.name} to cart for {user.email}"
         )
 
-        return cart
+        return cart_item
 
     @staticmethod
     @transaction.atomic
     def update_cart_item(user, item_id, quantity):
-        """Update cart item quantity."""
+        """Update cart item quantity. Returns the cart item."""
         try:
             cart_item = CartItem.objects.select_related(
                 "cart", "product", "variant"
             ).get(id=item_id, cart__user=user)
         except CartItem.DoesNotExist:
             raise NotFoundError("Cart item not found")
-        if cart_item.variant:
-            if quantity > cart_item.variant.stock_quantity:
-                raise ValidationError(
-                    f"Only {cart_item.variant.stock_quantity} items available"
-                )
-        else:
-            if quantity > cart_item.product.stock_quantity:
-                raise ValidationError(
-                    f"Only {cart_item.product.stock_quantity} items available"
-                )
+        CartService.check_stock(cart_item.product, cart_item.variant, quantity)
 
         cart_item.quantity = quantity
         cart_item.save(update_fields=["quantity"])
@@ -116,14 +141,16 @@ class CartService:
             f"Updated cart item {item_id} quantity to {quantity} for {user.email}"
         )
 
-        return cart_item.cart
+        return cart_item
 
     @staticmethod
     @transaction.atomic
     def remove_from_cart(user, item_id):
         """Remove item from cart."""
         try:
-            cart_item = CartItem.objects.get(id=item_id, cart__user=user)
+            cart_item = CartItem.objects.select_related("cart").get(
+                id=item_id, cart__user=user
+            )
         except CartItem.DoesNotExist:
             raise NotFoundError("Cart item not found")
 
@@ -138,9 +165,199 @@ class CartService:
     @transaction.atomic
     def clear_cart(user):
         """Clear all items from cart."""
-        cart = CartService.get_cart(user)
+        cart = CartService.get_or_create_cart(user)
         cart.clear()
 
         logger.info(f"Cleared cart for {user.email}")
 
         return cart
+
+
+    @staticmethod
+    def merge_guest_cart(user, token):
+        """
+        Merge a guest cart into the user's persistent cart.
+
+        Runs in one transaction with the user's cart row locked. Every
+        guest line is re-validated against current stock: quantities are
+        added to any existing line and capped at the available stock, and
+        lines for products or variants that are gone are dropped. The
+        guest cart is discarded once the merge commits.
+        """
+        with transaction.atomic():
+            cart = CartService.get_or_create_cart(user)
+            Cart.objects.select_for_update().filter(pk=cart.pk).exists()
+
+            guest = GuestCart.load(token)
+            if guest is None or not guest.lines:
+                return cart
+
+            lines = list(guest.lines.values())
+            products = Product.objects.in_bulk(
+                {line["product_id"] for line in lines}
+            )
+            variants = ProductVariant.objects.in_bulk(
+                {line["variant_id"] for line in lines if line["variant_id"]}
+            )
+            existing = {
+                (item.product_id, item.variant_id): item for item in cart.items.all()
+            }
+
+            to_create = []
+            to_update = []
+            now = timezone.now()
+            for line in lines:
+                product = products.get(line["product_id"])
+                variant = variants.get(line["variant_id"]) if line["variant_id"] else None
+                if product is None or not product.is_active:
+                    continue
+                if line["variant_id"] and (
+                    variant is None
+                    or not variant.is_active
+                    or variant.product_id != product.pk
+                ):
+                    continue
+
+                item = existing.get((product.pk, line["variant_id"]))
+                current = item.quantity if item else 0
+                max_stock = variant.stock_quantity if variant else product.stock_quantity
+                quantity = min(current + line["quantity"], max_stock)
+                if quantity <= current:
+                    continue
+
+                if item is None:
+                    to_create.append(
+                        CartItem(
+                            cart=cart, product=product, variant=variant, quantity=quantity
+                        )
+                    )
+                else:
+                    item.quantity = quantity
+                    item.updated_at = now
+                    to_update.append(item)
+
+            CartItem.objects.bulk_create(to_create)
+            CartItem.objects.bulk_update(to_update, ["quantity", "updated_at"])
+            transaction.on_commit(guest.delete)
+
+        logger.info(
+            f"Merged {len(to_create) + len(to_update)} guest cart line(s) for {user.email}"
+        )
+
+        return cart
+
+
+class GuestCartService:
+    """
+    Cart operations for anonymous visitors, backed by GuestCart.
+    Mirrors CartService, taking a GuestCart where it takes a user, and
+    returns unsaved CartItem instances so the same serializers apply.
+    Cart writes never touch the database.
+    """
+
+    @staticmethod
+    def build_items(guest):
+        """
+        Return the guest cart's lines as unsaved CartItems, newest first,
+        leaving out products and variants that are gone or inactive.
+        """
+        lines = guest.lines
+        products = (
+            Product.objects.select_related("category")
+            .prefetch_related("images")
+            .in_bulk({line["product_id"] for line in lines.values()})
+        )
+        variant_ids = {line["variant_id"] for line in lines.values() if line["variant_id"]}
+        variants = ProductVariant.objects.in_bulk(variant_ids) if variant_ids else {}
+
+        items = []
+        for line_id in sorted(lines, reverse=True):
+            line = lines[line_id]
+            product = products.get(line["product_id"])
+            variant = variants.get(line["variant_id"]) if line["variant_id"] else None
+            if product is None or not product.is_active:
+                continue
+            if line["variant_id"] and (variant is None or not variant.is_active):
+                continue
+            items.append(
+                CartItem(
+                    id=line_id,
+                    product=product,
+                    variant=variant,
+                    quantity=line["quantity"],
+                    created_at=line["created_at"],
+                )
+            )
+        return items
+
+    @staticmethod
+    def get_item(guest, item_id):
+        item = next(
+            (item for item in GuestCartService.build_items(guest) if item.id == item_id),
+            None,
+        )
+        if item is None:
+            raise NotFoundError("Cart item not found")
+        return item
+
+    @staticmethod
+    def get_cart_summary(guest):
+        """Get a read-model of the guest cart with lines and totals."""
+        return CartSummary(guest, GuestCartService.build_items(guest))
+
+    @staticmethod
+    def get_line_summary(guest, item_id=None):
+        """Get a read-model of one guest cart line plus the cart totals."""
+        summary = GuestCartService.get_cart_summary(guest)
+        item = next((item for item in summary.items if item.id == item_id), None)
+        return CartLineSummary(item, summary.total_items, summary.subtotal)
+
+    @staticmethod
+    def add_to_cart(guest, product_id, variant_id=None, quantity=1):
+        """Add item to the guest cart or update quantity if exists."""
+        product, variant = CartService.get_purchasable(product_id, variant_id, quantity)
+        variant_id = variant.pk if variant else None
+
+        line_id = guest.find_line(product.pk, variant_id)
+        if line_id is not None:
+            quantity += guest.lines[line_id]["quantity"]
+            CartService.check_stock(product, variant, quantity)
+
+        line_id = guest.set_line(product.pk, variant_id, quantity)
+        guest.save()
+
+        return CartItem(
+            id=line_id,
+            product=product,
+            variant=variant,
+            quantity=quantity,
+            created_at=guest.lines[line_id]["created_at"],
+        )
+
+    @staticmethod
+    def update_cart_item(guest, item_id, quantity):
+        """Update guest cart item quantity."""
+        item = GuestCartService.get_item(guest, item_id)
+        CartService.check_stock(item.product, item.variant, quantity)
+
+        guest.lines[item_id]["quantity"] = quantity
+        guest.save()
+
+        item.quantity = quantity
+        return item
+
+    @staticmethod
+    def remove_from_cart(guest, item_id):
+        """Remove item from the guest cart."""
+        if guest.lines.pop(item_id, None) is None:
+            raise NotFoundError("Cart item not found")
+        guest.save()
+        return guest
+
+    @staticmethod
+    def clear_cart(guest):
+        """Clear all items from the guest cart."""
+        guest.lines = {}
+        if guest.token is not None:
+            guest.save()
+        return guest
@@ -1,3 +1,245 @@
-from django.test import TestCase
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.authentication.models import User
+from apps.authentication.services import AuthenticationService
+from apps.products.models import Category, Product, ProductImage, ProductVariant
+from .checks import check_guest_cart_cache
+from .guest import GuestCart
+from .models import Cart, CartItem
 
-# Create your tests here.
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class CartReadModelTests(TestCase):
+    """Tests for cart serialization and mutation responses."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="shopper@example.com",
+            password="x-Passw0rd",
+            first_name="Jane",
+            last_name="Doe",
+        )
+        cls.category = Category.objects.create(name="Shirts")
+        cls.cart = Cart.objects.create(user=cls.user)
+        cls.variants = cls.add_lines(1)
+
+    @classmethod
+    def add_lines(cls, count, offset=0):
+        variants = []
+        for index in range(offset, offset + count):
+            product = Product.objects.create(
+                name=f"Shirt {index}",
+                description="Cotton shirt",
+                category=cls.category,
+                gender="men",
+                price=Decimal("20.00"),
+                sku=f"SHIRT-{index}",
+                brand="Acme",
+            )
+            ProductImage.objects.create(
+                product=product, image=f"products/shirt-{index}.jpg", is_primary=True
+            )
+            variant = ProductVariant.objects.create(
+                product=product,
+                size="M",
+                color="Blue",
+                color_hex="#0000ff",
+                sku=f"SHIRT-{index}-M",
+                stock_quantity=10,
+                price_adjustment=Decimal("2.50"),
+            )
+            CartItem.objects.create(
+                cart=cls.cart, product=product, variant=variant, quantity=2
+            )
+            variants.append(variant)
+        return variants
+
+    def setUp(self):
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse("cart:cart"))
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries), response.json()["data"]
+
+    def test_cart_queries_are_constant(self):
+        # Warm the cached user and token blacklist filter first
+        self.count_queries()
+        small, _ = self.count_queries()
+        self.add_lines(10, offset=100)
+        large, data = self.count_queries()
+
+        self.assertEqual(small, large)
+        self.assertEqual(len(data["items"]), 11)
+        self.assertEqual(data["total_items"], 22)
+        self.assertEqual(Decimal(data["subtotal"]), Decimal("495.00"))
+        self.assertEqual(Decimal(data["items"][0]["price"]), Decimal("22.50"))
+        self.assertTrue(data["items"][0]["product"]["primary_image"])
+
+    def test_mutation_returns_full_cart_by_default(self):
+        item = CartItem.objects.get()
+        response = self.client.patch(
+            reverse("cart:cart-item", args=[item.pk]),
+            {"quantity": 3},
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()["data"]
+        self.assertEqual(data["total_items"], 3)
+        self.assertEqual(len(data["items"]), 1)
+
+    def test_mutation_can_return_changed_line_only(self):
+        self.add_lines(3, offset=100)
+        variant = self.variants[0]
+        response = self.client.post(
+            reverse("cart:add-to-cart") + "?response=line",
+            {"product_id": variant.product_id, "variant_id": variant.pk, "quantity": 1},
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 201)
+        data = response.json()["data"]
+        self.assertNotIn("items", data)
+        self.assertEqual(data["item"]["quantity"], 3)
+        self.assertEqual(Decimal(data["item"]["total_price"]), Decimal("67.50"))
+        self.assertEqual(data["total_items"], 9)
+        self.assertEqual(Decimal(data["subtotal"]), Decimal("202.50"))
+
+    def test_removing_line_returns_totals(self):
+        item = CartItem.objects.get()
+        response = self.client.delete(
+            reverse("cart:cart-item", args=[item.pk]) + "?response=line"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()["data"]
+        self.assertIsNone(data["item"])
+        self.assertEqual(data["total_items"], 0)
+        self.assertEqual(Decimal(data["subtotal"]), Decimal("0.00"))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class GuestCartTests(TestCase):
+    """Tests for cache-backed guest carts and merging them on login."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="guest@example.com",
+            password="x-Passw0rd",
+            first_name="Jane",
+            last_name="Doe",
+        )
+        category = Category.objects.create(name="Shirts")
+        cls.product = Product.objects.create(
+            name="Shirt",
+            description="Cotton shirt",
+            category=category,
+            gender="men",
+            price=Decimal("20.00"),
+            sku="SHIRT",
+            brand="Acme",
+        )
+        cls.variant = ProductVariant.objects.create(
+            product=cls.product,
+            size="M",
+            color="Blue",
+            color_hex="#0000ff",
+            sku="SHIRT-M",
+            stock_quantity=4,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def add_as_guest(self, quantity, token=None):
+        headers = {"HTTP_X_CART_TOKEN": token} if token else {}
+        return self.client.post(
+            reverse("cart:add-to-cart"),
+            {"product_id": self.product.pk, "variant_id": self.variant.pk, "quantity": quantity},
+            content_type="application/json",
+            **headers,
+        )
+
+    def test_guest_cart_never_writes_to_database(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.add_as_guest(1)
+            token = response["X-Cart-Token"]
+            self.add_as_guest(2, token)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(
+            all(query["sql"].startswith("SELECT") for query in context.captured_queries)
+        )
+        self.assertFalse(Cart.objects.exists())
+
+        response = self.client.get(reverse("cart:cart"), HTTP_X_CART_TOKEN=token)
+        data = response.json()["data"]
+        self.assertEqual(data["total_items"], 3)
+        self.assertEqual(Decimal(data["subtotal"]), Decimal("60.00"))
+        self.assertEqual(data["items"][0]["variant_details"]["size"], "M")
+
+    def test_guest_cart_checks_stock(self):
+        token = self.add_as_guest(3)["X-Cart-Token"]
+        response = self.add_as_guest(2, token)
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_guest_line_can_be_updated_and_removed(self):
+        response = self.add_as_guest(1)
+        token = response["X-Cart-Token"]
+        item_id = response.json()["data"]["items"][0]["id"]
+        url = reverse("cart:cart-item", args=[item_id])
+
+        response = self.client.patch(
+            url + "?response=line",
+            {"quantity": 2},
+            content_type="application/json",
+            HTTP_X_CART_TOKEN=token,
+        )
+        self.assertEqual(response.json()["data"]["item"]["quantity"], 2)
+
+        response = self.client.delete(url, HTTP_X_CART_TOKEN=token)
+        self.assertEqual(response.json()["data"]["items"], [])
+
+    def test_login_merges_guest_cart_within_stock(self):
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(
+            cart=cart, product=self.product, variant=self.variant, quantity=2
+        )
+        token = self.add_as_guest(3)["X-Cart-Token"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            AuthenticationService.login_user(
+                "guest@example.com", "x-Passw0rd", cart_token=token
+            )
+
+        self.assertEqual(CartItem.objects.get(cart=cart).quantity, 4)
+        self.assertIsNone(GuestCart.load(token))
+
+    def test_inactive_variants_are_hidden_and_not_merged(self):
+        token = self.add_as_guest(1)["X-Cart-Token"]
+        ProductVariant.objects.filter(pk=self.variant.pk).update(is_active=False)
+
+        response = self.client.get(reverse("cart:cart"), HTTP_X_CART_TOKEN=token)
+        self.assertEqual(response.json()["data"]["items"], [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            AuthenticationService.login_user(
+                "guest@example.com", "x-Passw0rd", cart_token=token
+            )
+        self.assertFalse(CartItem.objects.filter(cart__user=self.user).exists())
+
+    def test_check_needs_shared_cache(self):
+        self.assertEqual(check_guest_cart_cache(), [])
+        with override_settings(CACHE_SINGLE_PROCESS=False):
+            self.assertEqual([m.id for m in check_guest_cart_cache()], ["cart.W001"])
@@ -1,43 +1,90 @@
 from rest_framework import status
 from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny
 from apps.core.responses import success_response, error_response
+from .guest import GuestCart
+from .read_models import CartSummary
 from .serializers import (
     CartSerializer,
+    CartLineSerializer,
     AddToCartSerializer,
     UpdateCartItemSerializer,
 )
-from .services import CartService
+from .services import CartService, GuestCartService
 
 
-class CartView(APIView):
+class CartOwnerMixin:
+    """
+    Resolve who owns the cart for a request.
+    Authenticated users get their persistent cart through CartService;
+    anonymous visitors get a cache-backed guest cart through
+    GuestCartService, identified by the ``X-Cart-Token`` header, which
+    is echoed back once the guest cart has been saved.
+    """
+
+    guest_cart = None
+
+    def get_cart_owner(self):
+        """Return (service, owner) for the current request."""
+        if self.request.user.is_authenticated:
+            return CartService, self.request.user
+        self.guest_cart = GuestCart.from_request(self.request)
+        return GuestCartService, self.guest_cart
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if self.guest_cart is not None and self.guest_cart.token:
+            response[GuestCart.header] = self.guest_cart.token
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class CartMutationMixin(CartOwnerMixin):
+    """
+    Response shaping for cart mutation endpoints.
+    By default the full cart is returned; with ``?response=line`` only
+    the changed line and the cart totals are serialized.
+    """
+
+    def wants_line_response(self):
+        return self.request.query_params.get("response") == "line"
+
+    def get_mutation_data(self, service, owner, item_id=None):
+        if self.wants_line_response():
+            summary = service.get_line_summary(owner, item_id)
+            return CartLineSerializer(summary).data
+        summary = service.get_cart_summary(owner)
+        return CartSerializer(summary).data
+
+
+class CartView(CartOwnerMixin, APIView):
     """API view for retrieving and clearing cart."""
 
-    permission_classes = [IsAuthenticated]
+    permission_classes = [AllowAny]
 
     def get(self, request):
         """Get user's cart."""
-        cart = CartService.get_cart(request.user)
-        serializer = CartSerializer(cart)
+        service, owner = self.get_cart_owner()
+        summary = service.get_cart_summary(owner)
+        serializer = CartSerializer(summary)
         return success_response(
             data=serializer.data, message="Cart retrieved successfully"
         )
 
     def delete(self, request):
         """Clear cart."""
-        cart = CartService.clear_cart(request.user)
-        serializer = CartSerializer(cart)
+        service, owner = self.get_cart_owner()
+        cart = service.clear_cart(owner)
+        serializer = CartSerializer(CartSummary(cart, []))
         return success_response(
             data=serializer.data, message="Cart cleared successfully"
         )
 
 
-class AddToCartView(APIView):
+class AddToCartView(CartMutationMixin, APIView):
     """
     API view for adding items to cart.
     """
 
-    permission_classes = [IsAuthenticated]
+    permission_classes = [AllowAny]
     serializer_class = AddToCartSerializer
 
     def post(self, request):
@@ -45,52 +92,51 @@ class AddToCartView(APIView):
         serializer = self.serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        cart = CartService.add_to_cart(
-            user=request.user,
+        service, owner = self.get_cart_owner()
+        cart_item = service.add_to_cart(
+            owner,
             product_id=serializer.validated_data["product_id"],
             variant_id=serializer.validated_data.get("variant_id"),
             quantity=serializer.validated_data.get("quantity", 1),
         )
 
-        response_serializer = CartSerializer(cart)
         return success_response(
-            data=response_serializer.data,
+            data=self.get_mutation_data(service, owner, cart_item.id),
             message="Item added to cart successfully",
             status_code=status.HTTP_201_CREATED,
         )
 
 
-class CartItemView(APIView):
+class CartItemView(CartMutationMixin, APIView):
     """
     API view for updating and removing cart items.
     """
 
-    permission_classes = [IsAuthenticated]
+    permission_classes = [AllowAny]
 
     def patch(self, request, item_id):
         """Update cart item quantity."""
         serializer = UpdateCartItemSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        cart = CartService.update_cart_item(
-            user=request.user,
+        service, owner = self.get_cart_owner()
+        cart_item = service.update_cart_item(
+            owner,
             item_id=item_id,
             quantity=serializer.validated_data["quantity"],
         )
 
-        response_serializer = CartSerializer(cart)
         return success_response(
-            data=response_serializer.data,
+            data=self.get_mutation_data(service, owner, cart_item.id),
             message="Cart item updated successfully",
         )
 
     def delete(self, request, item_id):
         """Remove item from cart."""
-        cart = CartService.remove_from_cart(
-            user=request.user, item_id=item_id
-        )
+        service, owner = self.get_cart_owner()
+        service.remove_from_cart(owner, item_id=item_id)
 
-        serializer = CartSerializer(cart)
         return success_response(
-            data=serializer.data, message="Item removed from cart successfully"
+            data=self.get_mutation_data(service, owner),
+            message="Item removed from cart successfully",
         )
@@ -1 +1,54 @@
 from django.contrib import admin
+from .models import ArchivedRecord, OutboxEmail
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    """Admin interface for the email outbox."""
+
+    list_display = ["subject", "status", "attempts", "created_at", "sent_at"]
+    list_filter = ["status", "created_at"]
+    search_fields = ["subject", "recipients"]
+    readonly_fields = [
+        "subject",
+        "from_email",
+        "recipients",
+        "body_text",
+        "body_html",
+        "attempts",
+        "last_error",
+        "locked_at",
+        "sent_at",
+        "created_at",
+        "updated_at",
+    ]
+    actions = ["retry_emails"]
+
+    @admin.action(description="Retry selected emails")
+    def retry_emails(self, request, queryset):
+        """Reset selected emails to pending so the next flush sends them."""
+        updated = queryset.exclude(status=OutboxEmail.STATUS_SENT).update(
+            status=OutboxEmail.STATUS_PENDING,
+            attempts=0,
+            next_attempt_at=None,
+            locked_at=None,
+        )
+        self.message_user(request, f"{updated} email(s) queued for retry")
+
+    def has_add_permission(self, request):
+        """Emails are only created by the application."""
+        return False
+
+
+@admin.register(ArchivedRecord)
+class ArchivedRecordAdmin(admin.ModelAdmin):
+    """Read-only admin for rows moved out by archive_soft_deleted."""
+
+    list_display = ["model", "object_pk", "deleted_at", "archived_at"]
+    list_filter = ["model", "archived_at"]
+    search_fields = ["object_pk"]
+    readonly_fields = ["model", "object_pk", "data", "deleted_at", "archived_at"]
+
+    def has_add_permission(self, request):
+        """Records are only created by the archive command."""
+        return False
@@ -0,0 +1,139 @@
+"""
+File: backend/apps/core/archive.py
+Purpose: Move long soft-deleted rows out of live tables into ArchivedRecord
+"""
+
+import json
+import logging
+from datetime import timedelta
+from django.apps import apps
+from django.core import serializers
+from django.db import transaction
+from django.db.models import ProtectedError, RestrictedError
+from django.db.models.deletion import Collector
+from django.utils import timezone
+from .models import ArchivedRecord, SoftDeleteModel
+
+logger = logging.getLogger(__name__)
+
+
+class SoftDeleteArchiver:
+    """
+    Archive rows that were soft deleted more than a given time ago.
+
+    Rows are processed in primary-key batches, one transaction per batch.
+    Each row is hard deleted together with everything its deletion
+    cascades to, after all of it has been serialized into ArchivedRecord.
+    Rows whose deletion is blocked (e.g. products referenced by order
+    items) or would cascade into rows that are still live are skipped.
+    """
+
+    @staticmethod
+    def get_models():
+        """
+        Concrete models using soft delete, in reverse registry order so
+        dependent models (variants, images) are archived before the rows
+        that protect them from deletion (products, categories).
+        """
+        return [
+            model
+            for model in reversed(apps.get_models())
+            if issubclass(model, SoftDeleteModel)
+        ]
+
+    @staticmethod
+    def is_live(instance):
+        return isinstance(instance, SoftDeleteModel) and not instance.is_deleted
+
+    @staticmethod
+    def collect(instance):
+        """
+        Return a collector holding instance and its cascade, or None if
+        it cannot be archived on its own.
+        """
+        collector = Collector(using=instance._state.db)
+        try:
+            collector.collect([instance])
+        except (ProtectedError, RestrictedError):
+            return None
+        for model, instances in collector.data.items():
+            if any(SoftDeleteArchiver.is_live(obj) for obj in instances):
+                return None
+        # Cascades resolved as bulk deletes: refuse if they hit live rows
+        for queryset in collector.fast_deletes:
+            if issubclass(queryset.model, SoftDeleteModel) and queryset.filter(
+                is_deleted=False
+            ).exists():
+                return None
+        return collector
+
+    @staticmethod
+    def make_records(collector):
+        records = []
+        objects = [obj for instances in collector.data.values() for obj in instances]
+        for queryset in collector.fast_deletes:
+            objects.extend(queryset)
+        for obj in objects:
+            serialized = json.loads(serializers.serialize("json", [obj]))[0]
+            records.append(
+                ArchivedRecord(
+                    model=serialized["model"],
+                    object_pk=str(obj.pk),
+                    data=serialized["fields"],
+                    deleted_at=getattr(obj, "deleted_at", None),
+                )
+            )
+        return records
+
+    @staticmethod
+    def archive_batch(model, pks):
+        """Archive the given rows of model. Returns (archived, skipped)."""
+        archived = 0
+        skipped = 0
+        removed = set()
+        with transaction.atomic():
+            instances = model.all_objects.select_for_update().filter(pk__in=pks).order_by("pk")
+            for instance in instances:
+                if instance.pk in removed:
+                    # Already archived in the cascade of an earlier row
+                    archived += 1
+                    continue
+                collector = SoftDeleteArchiver.collect(instance)
+                if collector is None:
+                    skipped += 1
+                    continue
+                ArchivedRecord.objects.bulk_create(SoftDeleteArchiver.make_records(collector))
+                removed.update(obj.pk for obj in collector.data.get(model, ()))
+                collector.delete()
+                archived += 1
+        return archived, skipped
+
+    @staticmethod
+    def archive(model, older_than_days, batch_size=500, dry_run=False):
+        """
+        Archive rows of model soft deleted more than older_than_days ago.
+        Returns (archived, skipped); with dry_run, (candidates, 0).
+        """
+        cutoff = timezone.now() - timedelta(days=older_than_days)
+        candidates = model.all_objects.filter(is_deleted=True, deleted_at__lt=cutoff)
+        if dry_run:
+            return candidates.count(), 0
+
+        archived = 0
+        skipped = 0
+        last_pk = 0
+        while True:
+            pks = list(
+                candidates.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not pks:
+                break
+            batch_archived, batch_skipped = SoftDeleteArchiver.archive_batch(model, pks)
+            archived += batch_archived
+            skipped += batch_skipped
+            last_pk = pks[-1]
+
+        logger.info(f"Archived {archived} {model._meta.label} row(s), skipped {skipped}")
+        return archived, skipped
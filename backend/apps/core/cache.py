@@ -0,0 +1,27 @@
+"""
+File: backend/apps/core/cache.py
+Purpose: Tell whether cache writes are seen by every process
+"""
+
+from django.conf import settings
+
+# Cache backends whose contents are private to one process
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def is_process_local_cache(alias="default"):
+    """Whether the cache backend keeps its entries inside one process."""
+    return settings.CACHES[alias]["BACKEND"] in PROCESS_LOCAL_CACHES
+
+
+def is_shared_cache(alias="default"):
+    """
+    Whether every process serving requests sees the same cache entries:
+    the backend is shared (Redis, Memcached, database), or
+    CACHE_SINGLE_PROCESS says a single process serves them (runserver,
+    tests).
+    """
+    return getattr(settings, "CACHE_SINGLE_PROCESS", False) or not is_process_local_cache(alias)
@@ -0,0 +1,93 @@
+"""
+File: backend/apps/core/checks.py
+Purpose: System checks for the database configuration
+"""
+
+import time
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+from django.db import DatabaseError, connections
+
+
+@register(Tags.database, deploy=True)
+def check_database_settings(app_configs=None, **kwargs):
+    """Flag database settings that cost a connection per request or break pooling."""
+    messages = []
+    for alias, database in settings.DATABASES.items():
+        if database["ENGINE"] == "django.db.backends.sqlite3":
+            if alias == "default":
+                messages.append(
+                    Warning(
+                        "The default database is SQLite.",
+                        hint="Set DB_ENGINE=postgresql for production.",
+                        id="core.W001",
+                    )
+                )
+            continue
+        if database.get("CONN_MAX_AGE", 0) == 0:
+            messages.append(
+                Warning(
+                    f"Database '{alias}' opens a new connection for every request.",
+                    hint="Set DB_CONN_MAX_AGE to keep connections open between requests.",
+                    id="core.W002",
+                )
+            )
+        elif not database.get("CONN_HEALTH_CHECKS"):
+            messages.append(
+                Warning(
+                    f"Database '{alias}' reuses connections without health checks.",
+                    hint="Set DB_CONN_HEALTH_CHECKS=True so broken connections are replaced.",
+                    id="core.W003",
+                )
+            )
+        options = database.get("OPTIONS", {}).get("options", "")
+        if database.get("DISABLE_SERVER_SIDE_CURSORS") and "-c " in options:
+            messages.append(
+                Error(
+                    f"Database '{alias}' uses pgbouncer but sets startup options.",
+                    hint="Set statement_timeout on the database role instead.",
+                    id="core.E001",
+                )
+            )
+    for alias in getattr(settings, "DATABASE_REPLICAS", []):
+        if alias not in settings.DATABASES:
+            messages.append(
+                Error(
+                    f"DATABASE_REPLICAS lists '{alias}', which is not in DATABASES.",
+                    id="core.E002",
+                )
+            )
+    return messages
+
+
+@register(Tags.database)
+def check_database_connections(app_configs=None, databases=None, **kwargs):
+    """
+    Connect to each database given with --database and report those that
+    fail or are slow to answer. Runs only when databases are passed.
+    """
+    messages = []
+    for alias in databases or []:
+        connection = connections[alias]
+        started = time.monotonic()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        except DatabaseError as e:
+            messages.append(
+                Error(f"Database '{alias}' is unreachable: {e}", id="core.E003")
+            )
+            continue
+        finally:
+            # Checks run before serving; do not hand the connection to a request
+            connection.close()
+        elapsed = (time.monotonic() - started) * 1000
+        if elapsed > getattr(settings, "DATABASE_CHECK_SLOW_MS", 500):
+            messages.append(
+                Warning(
+                    f"Database '{alias}' took {elapsed:.0f}ms to connect and answer.",
+                    hint="Check the network path, or whether pgbouncer is saturated.",
+                    id="core.W004",
+                )
+            )
+    return messages
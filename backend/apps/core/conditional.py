@@ -0,0 +1,53 @@
+"""
+File: backend/apps/core/conditional.py
+Purpose: ETag/Last-Modified validators for conditional GET requests
+"""
+
+import hashlib
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+class Validators:
+    """
+    ETag and Last-Modified for a response, computed from a cheap
+    fingerprint of the data before the response body is built.
+
+    The ETag digests every fingerprint part and is the authoritative
+    validator; Last-Modified is sent alongside it for clients that only
+    revalidate by date. Responses are marked no-cache, so clients store
+    them but revalidate on every use.
+    """
+
+    def __init__(self, *parts, last_modified=None):
+        digest = hashlib.md5(repr(parts).encode()).hexdigest()
+        self.etag = quote_etag(digest)
+        self.last_modified = last_modified
+
+    @property
+    def timestamp(self):
+        if self.last_modified is None:
+            return None
+        return int(self.last_modified.timestamp())
+
+    def not_modified(self, request):
+        """
+        Return a 304 (or 412) response when the request's conditional
+        headers match, otherwise None.
+        """
+        if request.method not in ("GET", "HEAD"):
+            return None
+        response = get_conditional_response(
+            request, etag=self.etag, last_modified=self.timestamp
+        )
+        if response is not None:
+            self.apply(response)
+        return response
+
+    def apply(self, response):
+        """Set the validators on a response and return it."""
+        response["ETag"] = self.etag
+        if self.timestamp is not None:
+            response["Last-Modified"] = http_date(self.timestamp)
+        patch_cache_control(response, no_cache=True)
+        return response
@@ -0,0 +1,91 @@
+"""
+File: backend/apps/core/database.py
+Purpose: Per-request-class statement timeouts on persistent connections
+"""
+
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def is_pooled(connection):
+    """Whether a connection goes through pgbouncer (transaction pooling)."""
+    return bool(connection.settings_dict.get("DISABLE_SERVER_SIDE_CURSORS"))
+
+
+@receiver(connection_created)
+def reset_statement_timeout(sender, connection, **kwargs):
+    # A new connection starts with the server default
+    connection.statement_timeout = None
+
+
+class StatementTimeout:
+    """
+    Execute wrapper setting the session statement_timeout before the
+    first query that needs a different one.
+
+    The value is remembered on the connection, so a persistent
+    connection serving requests of the same class pays for the SET
+    once. Inside a transaction the SET is left out, as a rollback would
+    undo it behind our back; the transaction runs with the timeout of
+    the previous query, which for requests is usually already set by
+    the authentication lookup.
+    """
+
+    def __init__(self, milliseconds):
+        self.milliseconds = milliseconds
+
+    def __call__(self, execute, sql, params, many, context):
+        connection = context["connection"]
+        if (
+            getattr(connection, "statement_timeout", None) != self.milliseconds
+            and not connection.in_atomic_block
+        ):
+            context["cursor"].cursor.execute(
+                "SET statement_timeout = %s", [self.milliseconds]
+            )
+            connection.statement_timeout = self.milliseconds
+        return execute(sql, params, many, context)
+
+
+class StatementTimeoutMiddleware:
+    """
+    Apply DATABASE_STATEMENT_TIMEOUTS to the PostgreSQL queries of a
+    request according to its class: "admin" for the admin site, "read"
+    for safe methods and "write" for everything else.
+
+    Connections through pgbouncer are skipped, since a session setting
+    would leak to whichever client gets the server connection next.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    @staticmethod
+    def get_request_class(request):
+        if request.path.startswith("/admin/"):
+            return "admin"
+        if request.method in SAFE_METHODS:
+            return "read"
+        return "write"
+
+    @staticmethod
+    def get_connections():
+        return [
+            connections[alias]
+            for alias in settings.DATABASES
+            if connections[alias].vendor == "postgresql" and not is_pooled(connections[alias])
+        ]
+
+    def __call__(self, request):
+        timeouts = getattr(settings, "DATABASE_STATEMENT_TIMEOUTS", {})
+        milliseconds = timeouts.get(self.get_request_class(request), 0)
+        with ExitStack() as stack:
+            for connection in self.get_connections():
+                # 0 restores "no timeout" on connections a previous request limited
+                stack.enter_context(connection.execute_wrapper(StatementTimeout(milliseconds)))
+            return self.get_response(request)
@@ -90,3 +90,15 @@ class ServiceUnavailableError(BaseAPIException):
     status_code = status.HTTP_503_SERVICE_UNAVAILABLE
     default_detail = _("Service temporarily unavailable")
     default_code = "service_unavailable"
+
+
+class TooManyRequestsError(BaseAPIException):
+    """Exception raised when a client exceeds a rate limit."""
+
+    status_code = status.HTTP_429_TOO_MANY_REQUESTS
+    default_detail = _("Too many requests, please try again later")
+    default_code = "too_many_requests"
+
+    def __init__(self, detail=None, code=None, wait=None):
+        super().__init__(detail, code)
+        self.wait = wait
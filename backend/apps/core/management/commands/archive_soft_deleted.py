@@ -0,0 +1,69 @@
+"""
+File: backend/apps/core/management/commands/archive_soft_deleted.py
+Purpose: Move long soft-deleted rows out of the live tables
+"""
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from apps.core.archive import SoftDeleteArchiver
+
+
+class Command(BaseCommand):
+    """Archive rows soft deleted more than --days ago, in batches."""
+
+    help = "Move rows soft deleted long ago into the archive table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "models",
+            nargs="*",
+            help="Models to archive as app_label.ModelName (default: every soft-delete model)",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=90,
+            help="Only archive rows deleted more than this many days ago",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of rows archived per transaction",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many rows are old enough to archive",
+        )
+
+    def handle(self, *args, **options):
+        soft_delete_models = SoftDeleteArchiver.get_models()
+        if options["models"]:
+            try:
+                models = [apps.get_model(label) for label in options["models"]]
+            except (LookupError, ValueError) as e:
+                raise CommandError(str(e))
+            invalid = [model for model in models if model not in soft_delete_models]
+            if invalid:
+                raise CommandError(
+                    f"Not soft-delete models: {', '.join(m._meta.label for m in invalid)}"
+                )
+        else:
+            models = soft_delete_models
+
+        for model in models:
+            archived, skipped = SoftDeleteArchiver.archive(
+                model,
+                options["days"],
+                batch_size=options["batch_size"],
+                dry_run=options["dry_run"],
+            )
+            if options["dry_run"]:
+                self.stdout.write(f"{model._meta.label}: {archived} row(s) to archive")
+            else:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"{model._meta.label}: archived {archived}, skipped {skipped}"
+                    )
+                )
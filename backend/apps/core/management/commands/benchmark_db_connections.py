@@ -0,0 +1,114 @@
+"""
+File: backend/apps/core/management/commands/benchmark_db_connections.py
+Purpose: Compare request throughput with and without database connection reuse
+"""
+
+import time
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import RequestFactory
+
+
+class Command(BaseCommand):
+    """
+    Send requests through the full WSGI handler in-process, first with
+    CONN_MAX_AGE=0 (a new connection per request, closed when the
+    response finishes) and then with persistent connections, and report
+    requests per second and connections opened for each.
+
+    Run it against the configured database: a local PostgreSQL shows the
+    real connection setup cost, SQLite only the cost of opening the file.
+    """
+
+    help = "Benchmark requests/second with and without database connection reuse"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            default="/api/v1/products/categories/",
+            help="Path requested",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=500,
+            help="Requests sent per mode",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=20,
+            help="Untimed requests sent before each mode",
+        )
+        parser.add_argument(
+            "--host",
+            default="localhost",
+            help="Host header, which must be in ALLOWED_HOSTS",
+        )
+        parser.add_argument(
+            "--max-age",
+            type=int,
+            default=600,
+            help="CONN_MAX_AGE used for the connection reuse mode",
+        )
+
+    def handle(self, *args, **options):
+        handler = WSGIHandler()
+        environ = RequestFactory(
+            HTTP_HOST=options["host"],
+            # Satisfy SECURE_SSL_REDIRECT behind SECURE_PROXY_SSL_HEADER
+            HTTP_X_FORWARDED_PROTO="https",
+            **{"wsgi.url_scheme": "https"},
+        ).get(options["path"]).environ
+
+        opened = []
+
+        def count_connection(sender, connection, **kwargs):
+            opened.append(connection.alias)
+
+        connection_created.connect(count_connection)
+        original = {alias: connections[alias].settings_dict["CONN_MAX_AGE"] for alias in connections}
+        try:
+            results = []
+            for label, max_age in (("new connection", 0), ("reused", options["max_age"])):
+                self.set_max_age(max_age)
+                self.send(handler, environ, options["warmup"])
+                opened.clear()
+                started = time.monotonic()
+                self.send(handler, environ, options["requests"])
+                elapsed = time.monotonic() - started
+                results.append((label, options["requests"] / elapsed, len(opened)))
+        finally:
+            connection_created.disconnect(count_connection)
+            for alias, max_age in original.items():
+                connections[alias].settings_dict["CONN_MAX_AGE"] = max_age
+            connections.close_all()
+
+        vendor = connections["default"].vendor
+        self.stdout.write(f"{options['path']} on {vendor}, {options['requests']} requests")
+        self.stdout.write(f"{'mode':<16}{'requests/s':>12}{'connections':>13}")
+        for label, rate, count in results:
+            self.stdout.write(f"{label:<16}{rate:>12.1f}{count:>13}")
+        self.stdout.write(f"Connection reuse: {results[1][1] / max(results[0][1], 1e-9):.2f}x")
+
+    def set_max_age(self, max_age):
+        # The age is read when a connection opens, so close the current ones
+        connections.close_all()
+        for alias in connections:
+            connections[alias].settings_dict["CONN_MAX_AGE"] = max_age
+
+    def send(self, handler, environ, count):
+        for index in range(count):
+            status = []
+            # A client address per request keeps anonymous throttling out of the way
+            client = {"REMOTE_ADDR": f"10.{index >> 16 & 255}.{index >> 8 & 255}.{index & 255}"}
+            response = handler({**environ, **client}, lambda code, headers: status.append(code))
+            # Closing the response fires request_finished, which closes
+            # connections older than CONN_MAX_AGE
+            for _ in response:
+                pass
+            response.close()
+            if not status[0].startswith("200"):
+                raise CommandError(f"{environ['PATH_INFO']} returned {status[0]}")
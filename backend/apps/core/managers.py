@@ -1,5 +1,8 @@
+from collections import Counter
 from django.db import models
 from django.db.models import QuerySet
+from django.db.models.expressions import Col
+from django.db.models.lookups import Lookup
 
 
 class SoftDeleteQuerySet(QuerySet):
@@ -44,3 +47,30 @@ class SoftDeleteManager(models.Manager):
     def deleted_only(self):
         """Return only soft-deleted objects."""
         return SoftDeleteQuerySet(self.model, using=self._db).filter(is_deleted=True)
+
+
+def soft_delete_predicates(queryset):
+    """
+    Count the ``is_deleted`` predicates in a queryset's WHERE clause per
+    table alias. SoftDeleteManager already adds one, so a count above 1
+    means a caller stacked a redundant filter on top of it.
+    """
+    counts = Counter()
+
+    def visit(node):
+        if isinstance(node, Lookup):
+            if isinstance(node.lhs, Col) and node.lhs.target.name == "is_deleted":
+                counts[node.lhs.alias] += 1
+            return
+        for child in getattr(node, "children", ()):
+            visit(child)
+
+    visit(queryset.query.where)
+    return counts
+
+
+def duplicate_soft_delete_predicates(queryset):
+    """Return the table aliases filtered on ``is_deleted`` more than once."""
+    return sorted(
+        alias for alias, count in soft_delete_predicates(queryset).items() if count > 1
+    )
@@ -0,0 +1,184 @@
+"""
+File: backend/apps/core/media.py
+Purpose: Middleware serving uploaded media with validators, ranges and sendfile
+"""
+
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote, urlparse
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse, HttpResponseNotAllowed, Http404
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from .storage import ContentHashStorage
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeFile:
+    """
+    File object limited to `length` bytes from `start`.
+
+    Exposes fileno() so WSGI servers with a sendfile-capable
+    wsgi.file_wrapper (gunicorn, uWSGI) copy the range straight from
+    the page cache, bounded by Content-Length; other servers read it.
+    """
+
+    def __init__(self, fileobj, start, length):
+        self.fileobj = fileobj
+        self.remaining = length
+        fileobj.seek(start)
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.fileobj.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.fileobj.fileno()
+
+    def close(self):
+        self.fileobj.close()
+
+
+class MediaMiddleware:
+    """
+    Serve files under MEDIA_URL from the local media storage when
+    MEDIA_SERVE is enabled, before sessions or authentication run.
+
+    Responses carry an ETag and Last-Modified and honour conditional and
+    single-range requests. Files whose names embed a content digest
+    (ContentHashStorage) are cacheable forever; other files for
+    MEDIA_CACHE_MAX_AGE seconds. With MEDIA_SENDFILE_HEADER set (e.g.
+    X-Accel-Redirect) the body is left to the front web server.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if getattr(settings, "MEDIA_SERVE", False):
+            prefix = urlparse(settings.MEDIA_URL).path
+            if request.path.startswith(prefix):
+                return self.serve(request, request.path[len(prefix):])
+        return self.get_response(request)
+
+    def get_storage(self):
+        return default_storage
+
+    def get_validators(self, name, stat_result):
+        """Return (etag, cache_control) for a file."""
+        digest = ContentHashStorage.get_name_hash(name)
+        if digest:
+            return quote_etag(digest), "public, max-age=31536000, immutable"
+        etag = quote_etag(f"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}")
+        max_age = getattr(settings, "MEDIA_CACHE_MAX_AGE", 60 * 60)
+        return etag, f"public, max-age={max_age}"
+
+    @staticmethod
+    def etag_matches(header, etag):
+        if header.strip() == "*":
+            return True
+        tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+        return etag in tags
+
+    @staticmethod
+    def parse_range(header, size):
+        """
+        Return (start, end) of a single byte range, None to send the whole
+        file (absent, malformed or multi-range header), or False when the
+        range cannot be satisfied.
+        """
+        match = RANGE_RE.match(header.replace(" ", ""))
+        if not match or match.group(1) == match.group(2) == "":
+            return None
+        first, last = match.groups()
+        if first == "":
+            length = int(last)
+            if length == 0:
+                return False
+            return max(size - length, 0), size - 1
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if start >= size or end < start:
+            return False
+        return start, end
+
+    def serve(self, request, name):
+        if request.method not in ("GET", "HEAD"):
+            return HttpResponseNotAllowed(["GET", "HEAD"])
+
+        storage = self.get_storage()
+        try:
+            path = storage.path(name)
+            stat_result = os.stat(path)
+        except (SuspiciousFileOperation, OSError, NotImplementedError):
+            raise Http404("File not found")
+        if not stat.S_ISREG(stat_result.st_mode):
+            raise Http404("File not found")
+
+        etag, cache_control = self.get_validators(name, stat_result)
+        last_modified = http_date(stat_result.st_mtime)
+        headers = {"ETag": etag, "Last-Modified": last_modified, "Cache-Control": cache_control}
+
+        if_none_match = request.headers.get("If-None-Match")
+        if_modified_since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+        if (if_none_match and self.etag_matches(if_none_match, etag)) or (
+            not if_none_match
+            and if_modified_since
+            and int(stat_result.st_mtime) <= if_modified_since
+        ):
+            response = HttpResponse(status=304)
+            for header, value in headers.items():
+                response[header] = value
+            return response
+
+        content_type, encoding = mimetypes.guess_type(name)
+        content_type = content_type or "application/octet-stream"
+        size = stat_result.st_size
+
+        sendfile_header = getattr(settings, "MEDIA_SENDFILE_HEADER", "")
+        if sendfile_header:
+            # The front server reads the file and handles ranges itself
+            response = HttpResponse(content_type=content_type)
+            response[sendfile_header] = getattr(
+                settings, "MEDIA_SENDFILE_PREFIX", "/protected-media/"
+            ) + quote(name)
+            for header, value in headers.items():
+                response[header] = value
+            return response
+
+        byte_range = None
+        if_range = request.headers.get("If-Range")
+        if "Range" in request.headers and (not if_range or if_range in (etag, last_modified)):
+            byte_range = self.parse_range(request.headers["Range"], size)
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+        fileobj = open(path, "rb")
+        if byte_range is None:
+            response = FileResponse(fileobj, content_type=content_type)
+            response["Content-Length"] = size
+        else:
+            start, end = byte_range
+            response = FileResponse(
+                RangeFile(fileobj, start, end - start + 1), content_type=content_type, status=206
+            )
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+            response["Content-Length"] = end - start + 1
+        if encoding:
+            # Serve compressed files as-is rather than letting clients decode them
+            response["Content-Type"] = "application/octet-stream"
+        response["Accept-Ranges"] = "bytes"
+        for header, value in headers.items():
+            response[header] = value
+        return response
@@ -0,0 +1,68 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:08
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0001_outbox_email"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedRecord",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "model",
+                    models.CharField(
+                        help_text="app_label.model_name",
+                        max_length=100,
+                        verbose_name="model",
+                    ),
+                ),
+                (
+                    "object_pk",
+                    models.CharField(max_length=64, verbose_name="object id"),
+                ),
+                (
+                    "data",
+                    models.JSONField(
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        verbose_name="data",
+                    ),
+                ),
+                (
+                    "deleted_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="deleted at"
+                    ),
+                ),
+                (
+                    "archived_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="archived at"),
+                ),
+            ],
+            options={
+                "verbose_name": "archived record",
+                "verbose_name_plural": "archived records",
+                "ordering": ["-archived_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["model", "object_pk"],
+                        name="core_archiv_model_da382d_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -1,3 +1,4 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from .managers import SoftDeleteManager
@@ -77,3 +78,100 @@ class BaseModel(TimeStampedModel, SoftDeleteModel):
 
     class Meta:
         abstract = True
+
+    @staticmethod
+    def live_index(*fields, name):
+        """
+        Partial index over rows that are not soft deleted.
+        The default manager only ever reads live rows, so hot lookups
+        can use an index that dead rows never enter.
+        """
+        return models.Index(
+            fields=list(fields), name=name, condition=models.Q(is_deleted=False)
+        )
+
+
+class ArchivedRecord(models.Model):
+    """
+    Soft-deleted row moved out of its table by archive_soft_deleted.
+    Keeps the row's serialized fields so it can be inspected or restored.
+    """
+
+    model = models.CharField(_("model"), max_length=100, help_text=_("app_label.model_name"))
+    object_pk = models.CharField(_("object id"), max_length=64)
+    data = models.JSONField(_("data"), encoder=DjangoJSONEncoder)
+    deleted_at = models.DateTimeField(_("deleted at"), null=True, blank=True)
+    archived_at = models.DateTimeField(_("archived at"), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("archived record")
+        verbose_name_plural = _("archived records")
+        ordering = ["-archived_at"]
+        indexes = [
+            models.Index(fields=["model", "object_pk"]),
+        ]
+
+    def __str__(self):
+        """Return string representation of the record."""
+        return f"{self.model} #{self.object_pk}"
+
+
+class OutboxEmail(TimeStampedModel):
+    """
+    Transactional email waiting to be sent (or already sent).
+    Rows are written in the caller's transaction and delivered by Celery
+    after commit, so a rolled back request never sends mail and a slow or
+    failing SMTP server never blocks or rolls back the request.
+    """
+
+    STATUS_PENDING = "pending"
+    STATUS_SENDING = "sending"
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, _("Pending")),
+        (STATUS_SENDING, _("Sending")),
+        (STATUS_SENT, _("Sent")),
+        (STATUS_FAILED, _("Failed")),
+    ]
+
+    subject = models.CharField(_("subject"), max_length=255)
+    from_email = models.CharField(_("from email"), max_length=255)
+    recipients = models.JSONField(_("recipients"), default=list)
+    body_text = models.TextField(_("text body"))
+    body_html = models.TextField(_("HTML body"), blank=True)
+    status = models.CharField(
+        _("status"),
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+    )
+    attempts = models.PositiveIntegerField(
+        _("attempts"), default=0, help_text=_("Number of failed delivery attempts")
+    )
+    last_error = models.TextField(_("last error"), blank=True)
+    next_attempt_at = models.DateTimeField(
+        _("next attempt at"),
+        null=True,
+        blank=True,
+        help_text=_("Earliest time of the next delivery attempt"),
+    )
+    locked_at = models.DateTimeField(
+        _("locked at"),
+        null=True,
+        blank=True,
+        help_text=_("When a worker claimed this email for delivery"),
+    )
+    sent_at = models.DateTimeField(_("sent at"), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _("outbox email")
+        verbose_name_plural = _("outbox emails")
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+
+    def __str__(self):
+        """Return string representation of the email."""
+        return f"{self.subject} to {', '.join(self.recipients)}"
@@ -1,6 +1,28 @@
-from rest_framework.pagination import PageNumberPagination
-from rest_framework.response import Response
+import base64
+import json
 from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from .exceptions import ValidationError
+
+
+def positive_int(value, cutoff=None):
+    """Parse a strictly positive integer, capped at cutoff; raise ValueError otherwise."""
+    value = int(value)
+    if value <= 0:
+        raise ValueError(value)
+    if cutoff:
+        return min(value, cutoff)
+    return value
 
 
 class CustomPageNumberPagination(PageNumberPagination):
@@ -55,3 +77,288 @@ class SmallResultsSetPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 50
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination with the standardized response format.
+    Pages are addressed by the ordering values of the boundary row plus
+    the primary key as a tiebreaker, so deep pages cost the same as the
+    first one and no OFFSET is used. The total count is opt-in through
+    ?count=exact or ?count=approximate.
+    """
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    default_ordering = ("-created_at",)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Return one page of results following the cursor in the request.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        self.count = self.get_count(queryset, request)
+        cursor = self.decode_cursor(request, queryset.model)
+
+        is_reversed = cursor is not None and cursor["direction"] == "previous"
+        ordering = self.invert_ordering(self.ordering) if is_reversed else self.ordering
+
+        queryset = queryset.order_by(*ordering)
+        if cursor is not None:
+            queryset = queryset.filter(self.get_seek_filter(ordering, cursor["values"]))
+
+        results = list(queryset[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+
+        if is_reversed:
+            results.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        """
+        Return a paginated response with standardized format.
+        """
+        return Response(
+            OrderedDict(
+                [
+                    ("success", True),
+                    (
+                        "data",
+                        OrderedDict(
+                            [
+                                ("count", self.count),
+                                ("next", self.get_next_link()),
+                                ("previous", self.get_previous_link()),
+                                ("page_size", self.page_size),
+                                ("results", data),
+                            ]
+                        ),
+                    ),
+                    ("message", "Data retrieved successfully"),
+                    ("errors", None),
+                ]
+            )
+        )
+
+    def get_page_size(self, request):
+        """Return the requested page size, capped at max_page_size."""
+        try:
+            return positive_int(
+                request.query_params[self.page_size_query_param],
+                cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_ordering(self, queryset):
+        """
+        Return the queryset's ordering with a primary key tiebreaker.
+        Only plain field or annotation names can be used as cursor keys.
+        """
+        ordering = list(queryset.query.order_by) or list(
+            queryset.model._meta.ordering or self.default_ordering
+        )
+        if not all(
+            isinstance(field, str) and "__" not in field and field != "?"
+            for field in ordering
+        ):
+            ordering = list(self.default_ordering)
+
+        ordering = [field for field in ordering if field.lstrip("-") not in ("pk", "id")]
+        tiebreaker = "-pk" if ordering and ordering[0].startswith("-") else "pk"
+        return ordering + [tiebreaker]
+
+    @staticmethod
+    def invert_ordering(ordering):
+        """Reverse the direction of every ordering field."""
+        return [field[1:] if field.startswith("-") else f"-{field}" for field in ordering]
+
+    @staticmethod
+    def get_seek_filter(ordering, values):
+        """
+        Build the row-value comparison (a, b, pk) > (x, y, z) as a chain
+        of ORs, honouring the direction of each ordering field.
+        """
+        clauses = []
+        equal = Q()
+        for field, value in zip(ordering, values):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            clauses.append(equal & Q(**{f"{name}__{lookup}": value}))
+            equal &= Q(**{name: value})
+        return reduce(or_, clauses)
+
+    def get_count(self, queryset, request):
+        """Return the exact or approximate total, or None when not requested."""
+        mode = request.query_params.get(self.count_query_param)
+        if mode == "exact":
+            return queryset.count()
+        if mode == "approximate":
+            return self.get_approximate_count(queryset)
+        return None
+
+    @staticmethod
+    def get_approximate_count(queryset):
+        """
+        Return the planner's row estimate on PostgreSQL.
+        Other databases fall back to an exact count.
+        """
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql":
+            return queryset.count()
+
+        sql, params = queryset.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    def get_position(self, instance):
+        """Return the JSON-serializable ordering values of an instance."""
+        values = []
+        for field in self.ordering:
+            value = getattr(instance, field.lstrip("-"))
+            if isinstance(value, (datetime, date)):
+                value = value.isoformat()
+            elif isinstance(value, Decimal):
+                value = str(value)
+            values.append(value)
+        return values
+
+    def encode_cursor(self, direction, instance):
+        """Encode a cursor pointing past the given boundary instance."""
+        payload = json.dumps({"d": direction, "v": self.get_position(instance)})
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+        url = remove_query_param(self.request.build_absolute_uri(), "page")
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request, model):
+        """
+        Decode the cursor from the request, converting the stored values
+        back to Python types. Returns None for the first page.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            direction = payload["d"]
+            raw_values = payload["v"]
+        except (TypeError, ValueError, KeyError):
+            raise ValidationError("Invalid cursor")
+
+        if direction not in ("next", "previous") or len(raw_values) != len(self.ordering):
+            raise ValidationError("Invalid cursor")
+
+        values = []
+        for field, raw_value in zip(self.ordering, raw_values):
+            name = field.lstrip("-")
+            try:
+                model_field = model._meta.pk if name == "pk" else model._meta.get_field(name)
+            except FieldDoesNotExist:
+                values.append(raw_value)
+                continue
+            try:
+                values.append(model_field.to_python(raw_value))
+            except (DjangoValidationError, TypeError, ValueError):
+                raise ValidationError("Invalid cursor")
+
+        return {"direction": direction, "values": values}
+
+    def get_next_link(self):
+        """Return the URL of the next page, if any."""
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor("next", self.page[-1])
+
+    def get_previous_link(self):
+        """Return the URL of the previous page, if any."""
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor("previous", self.page[0])
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Include the total count: exact or approximate.",
+                "schema": {"type": "string", "enum": ["exact", "approximate"]},
+            },
+        ]
+
+
+class SelectablePagination(BasePagination):
+    """
+    Page-number pagination by default; keyset pagination when the client
+    passes ?pagination=cursor or a cursor, so existing clients keep working.
+    """
+
+    mode_query_param = "pagination"
+    page_number_class = CustomPageNumberPagination
+    cursor_class = KeysetPagination
+
+    def get_paginator(self, request):
+        """Return the paginator matching the requested mode."""
+        if (
+            request.query_params.get(self.mode_query_param) == "cursor"
+            or self.cursor_class.cursor_query_param in request.query_params
+        ):
+            return self.cursor_class()
+        return self.page_number_class()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.paginator = self.get_paginator(request)
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = [
+            {
+                "name": self.mode_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Pagination mode: page (default) or cursor.",
+                "schema": {"type": "string", "enum": ["page", "cursor"]},
+            }
+        ]
+        seen = {self.mode_query_param}
+        for paginator in (self.page_number_class(), self.cursor_class()):
+            for parameter in paginator.get_schema_operation_parameters(view):
+                if parameter["name"] not in seen:
+                    seen.add(parameter["name"])
+                    parameters.append(parameter)
+        return parameters
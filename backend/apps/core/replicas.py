@@ -0,0 +1,181 @@
+"""
+File: backend/apps/core/replicas.py
+Purpose: Read-replica routing for catalog and order-history reads
+"""
+
+import hashlib
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+@dataclass
+class ReplicaState:
+    """Routing state of the current request."""
+
+    pinned: bool = False
+    wrote: bool = False
+    # Transactions open on the primary when the request started
+    atomic_depth: int = 0
+
+    def in_transaction(self):
+        return len(connections[DEFAULT_DB_ALIAS].atomic_blocks) > self.atomic_depth
+
+
+# Replica reads are only enabled inside a request handled by
+# ReplicaPinningMiddleware; tasks, commands and shells use the primary
+_state = ContextVar("replica_state", default=None)
+
+
+def get_replicas():
+    return getattr(settings, "DATABASE_REPLICAS", [])
+
+
+def get_replica_apps():
+    return getattr(settings, "DATABASE_REPLICA_APPS", ["products", "orders"])
+
+
+@contextmanager
+def replica_reads(pinned=False):
+    """Allow routed reads to use replicas unless pinned; yields the state."""
+    state = ReplicaState(
+        pinned=pinned, atomic_depth=len(connections[DEFAULT_DB_ALIAS].atomic_blocks)
+    )
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+@contextmanager
+def use_primary():
+    """Send every read in the block to the primary."""
+    with replica_reads(pinned=True) as state:
+        yield state
+
+
+@contextmanager
+def without_pinning():
+    """
+    Let the block write without pinning the client to the primary, for
+    writes the client never reads back (counters, statistics).
+    """
+    state = _state.get()
+    wrote = state.wrote if state is not None else False
+    try:
+        yield
+    finally:
+        if state is not None:
+            state.wrote = wrote
+
+
+class ReplicaRouter:
+    """
+    Route reads of catalog and order models (DATABASE_REPLICA_APPS) to
+    a random DATABASE_REPLICAS alias, and everything else to the primary.
+
+    Reads stay on the primary outside requests, in requests pinned by
+    ReplicaPinningMiddleware and inside transactions on the primary, so
+    read-modify-write code and ``select_for_update`` (which Django routes
+    as a write) always see the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        replicas = get_replicas()
+        if (
+            state is None
+            or state.pinned
+            or not replicas
+            or model._meta.app_label not in get_replica_apps()
+            or state.in_transaction()
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaPinningMiddleware:
+    """
+    Enable replica reads for a request, pinning it to the primary when
+    its client wrote within the last DATABASE_PIN_SECONDS.
+
+    Unsafe methods always read from the primary. A request that writes
+    marks its client as pinned with a cookie and, for API clients that
+    do not keep cookies, a cache entry keyed by a digest of their
+    Authorization header, so the client reads its own writes until the
+    replicas have caught up. Writes made inside without_pinning() (such
+    as product view counts) do not pin.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    @staticmethod
+    def get_pin_seconds():
+        return getattr(settings, "DATABASE_PIN_SECONDS", 10)
+
+    @staticmethod
+    def get_cookie_name():
+        return getattr(settings, "DATABASE_PIN_COOKIE", "db_pin")
+
+    @staticmethod
+    def get_cache_key(request):
+        authorization = request.headers.get("Authorization")
+        if not authorization:
+            return None
+        return f"db_pin:{hashlib.sha256(authorization.encode()).hexdigest()}"
+
+    def is_pinned(self, request, now):
+        try:
+            if float(request.COOKIES.get(self.get_cookie_name(), 0)) > now:
+                return True
+        except ValueError:
+            pass
+        cache_key = self.get_cache_key(request)
+        return cache_key is not None and cache.get(cache_key, 0) > now
+
+    def pin(self, request, response):
+        seconds = self.get_pin_seconds()
+        until = time.time() + seconds
+        response.set_cookie(
+            self.get_cookie_name(),
+            f"{until:.0f}",
+            max_age=seconds,
+            secure=request.is_secure(),
+            httponly=True,
+            samesite="Lax",
+        )
+        cache_key = self.get_cache_key(request)
+        if cache_key is not None:
+            cache.set(cache_key, until, seconds)
+
+    def __call__(self, request):
+        if not get_replicas():
+            return self.get_response(request)
+
+        pinned = request.method not in SAFE_METHODS or self.is_pinned(request, time.time())
+        with replica_reads(pinned=pinned) as state:
+            response = self.get_response(request)
+        if state.wrote:
+            self.pin(request, response)
+        return response
@@ -0,0 +1,204 @@
+"""
+File: backend/apps/core/services.py
+Purpose: Transactional email outbox delivery
+"""
+
+import logging
+from datetime import timedelta
+from functools import partial
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+
+class EmailOutboxService:
+    """
+    Queue emails in the outbox table and deliver them in batches.
+
+    Emails are dispatched to Celery only once the enqueuing transaction
+    commits. Each batch is sent over a single SMTP connection; failed
+    emails go back to pending with an exponential backoff until they run
+    out of attempts. A periodic flush picks up anything whose dispatch
+    was lost (broker down, worker crash).
+    """
+
+    retry_base_delay = 30
+    retry_max_delay = 60 * 60
+    lock_timeout = 60 * 10
+
+    @staticmethod
+    def get_batch_size():
+        return getattr(settings, "EMAIL_OUTBOX_BATCH_SIZE", 50)
+
+    @staticmethod
+    def get_max_attempts():
+        return getattr(settings, "EMAIL_OUTBOX_MAX_ATTEMPTS", 5)
+
+    @staticmethod
+    def get_backoff(attempts):
+        """Seconds to wait before the attempt following `attempts` failures."""
+        delay = EmailOutboxService.retry_base_delay * 2 ** max(attempts - 1, 0)
+        return min(delay, EmailOutboxService.retry_max_delay)
+
+    @staticmethod
+    def enqueue(subject, recipient_list, body_text, body_html="", from_email=None):
+        """Store an email in the outbox and dispatch it after commit."""
+        email = OutboxEmail.objects.create(
+            subject=subject,
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+            recipients=list(recipient_list),
+            body_text=body_text,
+            body_html=body_html,
+        )
+        transaction.on_commit(partial(EmailOutboxService.dispatch, [email.pk]))
+        return email
+
+    @staticmethod
+    def dispatch(email_ids):
+        """
+        Hand emails to Celery, or send them in-process when
+        EMAIL_OUTBOX_EAGER is set (tests, development without a broker).
+        """
+        if getattr(settings, "EMAIL_OUTBOX_EAGER", False):
+            EmailOutboxService.send_batch(email_ids)
+            return
+
+        from .tasks import send_outbox_emails
+
+        try:
+            send_outbox_emails.delay(list(email_ids))
+        except Exception:
+            logger.exception(
+                f"Could not dispatch outbox emails {email_ids}; "
+                f"they will be sent by the next outbox flush"
+            )
+
+    @staticmethod
+    def due_filter(now):
+        """
+        Emails that may be sent at `now`: pending ones whose backoff has
+        elapsed and ones held by a worker for longer than lock_timeout.
+        """
+        stale = now - timedelta(seconds=EmailOutboxService.lock_timeout)
+        pending = Q(status=OutboxEmail.STATUS_PENDING) & (
+            Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now)
+        )
+        return pending | Q(status=OutboxEmail.STATUS_SENDING, locked_at__lt=stale)
+
+    @staticmethod
+    def claim(email_ids, now):
+        """Mark due emails as being sent and return them."""
+        OutboxEmail.objects.filter(pk__in=email_ids).filter(
+            EmailOutboxService.due_filter(now)
+        ).update(status=OutboxEmail.STATUS_SENDING, locked_at=now)
+        return list(
+            OutboxEmail.objects.filter(
+                pk__in=email_ids, status=OutboxEmail.STATUS_SENDING, locked_at=now
+            ).order_by("pk")
+        )
+
+    @staticmethod
+    def mark_failed(email, error, now):
+        email.attempts += 1
+        email.last_error = str(error)
+        email.locked_at = None
+        if email.attempts >= EmailOutboxService.get_max_attempts():
+            email.status = OutboxEmail.STATUS_FAILED
+            logger.error(f"Giving up on outbox email {email.pk}: {error}")
+        else:
+            email.status = OutboxEmail.STATUS_PENDING
+            email.next_attempt_at = now + timedelta(
+                seconds=EmailOutboxService.get_backoff(email.attempts)
+            )
+            logger.warning(f"Outbox email {email.pk} failed, will retry: {error}")
+        email.save(
+            update_fields=[
+                "attempts",
+                "last_error",
+                "locked_at",
+                "status",
+                "next_attempt_at",
+                "updated_at",
+            ]
+        )
+
+    @staticmethod
+    def send_batch(email_ids, now=None):
+        """
+        Send the given emails over one SMTP connection.
+        Returns the ids that failed and remain pending for a retry.
+        """
+        now = now or timezone.now()
+        emails = EmailOutboxService.claim(email_ids, now)
+        if not emails:
+            return []
+
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception as error:
+            for email in emails:
+                EmailOutboxService.mark_failed(email, error, now)
+            return [
+                email.pk for email in emails if email.status == OutboxEmail.STATUS_PENDING
+            ]
+
+        sent_ids = []
+        failed_ids = []
+        try:
+            for email in emails:
+                message = EmailMultiAlternatives(
+                    subject=email.subject,
+                    body=email.body_text,
+                    from_email=email.from_email,
+                    to=email.recipients,
+                    connection=connection,
+                )
+                if email.body_html:
+                    message.attach_alternative(email.body_html, "text/html")
+                try:
+                    message.send()
+                except Exception as error:
+                    EmailOutboxService.mark_failed(email, error, now)
+                    if email.status == OutboxEmail.STATUS_PENDING:
+                        failed_ids.append(email.pk)
+                else:
+                    sent_ids.append(email.pk)
+        finally:
+            connection.close()
+
+        OutboxEmail.objects.filter(pk__in=sent_ids).update(
+            status=OutboxEmail.STATUS_SENT,
+            sent_at=timezone.now(),
+            locked_at=None,
+            last_error="",
+        )
+        logger.info(f"Sent {len(sent_ids)} outbox email(s), {len(failed_ids)} failed")
+        return failed_ids
+
+    @staticmethod
+    def flush(now=None):
+        """
+        Send every email that is due, batch by batch.
+        Returns the number of emails that were attempted.
+        """
+        now = now or timezone.now()
+        due = OutboxEmail.objects.filter(EmailOutboxService.due_filter(now)).order_by("pk")
+
+        attempted = 0
+        last_id = 0
+        batch_size = EmailOutboxService.get_batch_size()
+        while True:
+            email_ids = list(
+                due.filter(pk__gt=last_id).values_list("pk", flat=True)[:batch_size]
+            )
+            if not email_ids:
+                return attempted
+            EmailOutboxService.send_batch(email_ids, now)
+            attempted += len(email_ids)
+            last_id = email_ids[-1]
@@ -0,0 +1,107 @@
+"""
+File: backend/apps/core/storage.py
+Purpose: Content-hashed file storage and cheap media URL building
+"""
+
+import hashlib
+import posixpath
+import re
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.encoding import filepath_to_uri
+
+# Hex digest length embedded in stored file names
+HASH_LENGTH = 16
+
+HASHED_NAME_RE = re.compile(rf"\.([0-9a-f]{{{HASH_LENGTH}}})(?:_[A-Za-z0-9]{{7}})?\.[^./]+$")
+
+
+class ContentHashStorage(FileSystemStorage):
+    """
+    Local filesystem storage that embeds a digest of the content in every
+    stored name: ``products/2026/01/02/shirt.jpg`` is saved as
+    ``products/2026/01/02/shirt.3f9a0c1e7b2d4a65.jpg``.
+
+    Files are never rewritten in place (an existing name gets a random
+    suffix, as with FileSystemStorage), so the URL of a stored file
+    always serves the same bytes and can be cached immutably.
+    """
+
+    def get_content_hash(self, content):
+        digest = hashlib.sha256()
+        if hasattr(content, "seek"):
+            content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk if isinstance(chunk, bytes) else chunk.encode())
+        if hasattr(content, "seek"):
+            content.seek(0)
+        return digest.hexdigest()[:HASH_LENGTH]
+
+    def get_hashed_name(self, name, content, max_length=None):
+        """
+        Insert the digest before the extension. When max_length is given,
+        the original file name is shortened instead of the digest, leaving
+        room for the suffix added to a name that is already taken.
+        """
+        root, ext = posixpath.splitext(name)
+        suffix = f".{self.get_content_hash(content)}{ext}"
+        if max_length:
+            excess = len(root) + len(suffix) + 8 - max_length
+            directory, stem = posixpath.split(root)
+            if excess > 0 and excess < len(stem):
+                root = posixpath.join(directory, stem[:-excess])
+        return root + suffix
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        return super().save(
+            self.get_hashed_name(name, content, max_length), content, max_length
+        )
+
+    @staticmethod
+    def get_name_hash(name):
+        """Return the digest embedded in a stored name, or None."""
+        match = HASHED_NAME_RE.search(name)
+        return match.group(1) if match else None
+
+    @property
+    def url_prefix(self):
+        """Base URL that stored names are appended to."""
+        return self.base_url
+
+    def url(self, name):
+        return self.url_prefix + filepath_to_uri(name).lstrip("/")
+
+
+def is_absolute_url(url):
+    return url.startswith(("http://", "https://", "//"))
+
+
+def get_media_url_prefix(storage, request=None):
+    """
+    Return the absolute URL prefix of a storage, or None when the storage
+    has no fixed prefix. A relative prefix is resolved against the
+    request once and remembered on it, so building every further URL of
+    the response is a string concatenation.
+    """
+    prefix = getattr(storage, "url_prefix", None)
+    if prefix is None or is_absolute_url(prefix) or request is None:
+        return prefix
+    prefixes = request.__dict__.setdefault("_media_url_prefixes", {})
+    if prefix not in prefixes:
+        prefixes[prefix] = request.build_absolute_uri(prefix)
+    return prefixes[prefix]
+
+
+def build_media_url(storage, name, request=None):
+    """Return the (absolute, when a request is given) URL of a stored file."""
+    prefix = get_media_url_prefix(storage, request)
+    if prefix is not None:
+        return prefix + filepath_to_uri(name).lstrip("/")
+    url = storage.url(name)
+    if request is not None and not is_absolute_url(url):
+        return request.build_absolute_uri(url)
+    return url
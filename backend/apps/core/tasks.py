@@ -0,0 +1,25 @@
+"""
+File: backend/apps/core/tasks.py
+Purpose: Celery tasks for the email outbox
+"""
+
+from celery import shared_task
+from .services import EmailOutboxService
+
+
+@shared_task(bind=True, max_retries=5)
+def send_outbox_emails(self, email_ids):
+    """Send a batch of outbox emails, retrying failures with backoff."""
+    failed_ids = EmailOutboxService.send_batch(email_ids)
+    if failed_ids and self.request.retries < self.max_retries:
+        raise self.retry(
+            args=[failed_ids],
+            countdown=EmailOutboxService.get_backoff(self.request.retries + 1),
+        )
+    return len(email_ids) - len(failed_ids)
+
+
+@shared_task
+def flush_email_outbox():
+    """Send outbox emails whose dispatch was missed or whose retry is due."""
+    return EmailOutboxService.flush()
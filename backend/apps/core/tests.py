@@ -1 +1,499 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from smtplib import SMTPException
+from unittest import mock
+from django.conf import settings
+from django.core import mail
+from django.core.files.base import ContentFile
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db.models import Prefetch
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from apps.authentication.models import User
+from apps.authentication.services import AuthenticationService
+from apps.cart.models import Cart
+from apps.orders.models import Order
+from apps.products.models import Category, Product, ProductImage, ProductVariant
+from apps.products.services import CategoryService, ProductService, ProductViewCounter
+from config.database import get_databases
+from .checks import check_database_connections, check_database_settings
+from .database import StatementTimeout, StatementTimeoutMiddleware
+from .managers import duplicate_soft_delete_predicates
+from .models import ArchivedRecord, OutboxEmail
+from .replicas import ReplicaPinningMiddleware, replica_reads
+from .services import EmailOutboxService
+from .storage import ContentHashStorage, build_media_url
+from .utils import send_email
+
+
+class CountingEmailBackend(EmailBackend):
+    """Locmem backend that counts how many connections were opened."""
+
+    opened = 0
+
+    def open(self):
+        CountingEmailBackend.opened += 1
+        return True
+
+
+class FailingEmailBackend(EmailBackend):
+    """Backend whose SMTP server rejects every message."""
+
+    def send_messages(self, messages):
+        raise SMTPException("server unavailable")
+
+
+@override_settings(EMAIL_OUTBOX_EAGER=True)
+class EmailOutboxTests(TestCase):
+    """Tests for the transactional email outbox."""
+
+    def queue(self, count):
+        return [
+            send_email(
+                subject=f"Reset {index}",
+                recipient_list=[f"user{index}@example.com"],
+                template_name="authentication/password_reset.html",
+                context={"user": None, "token": "t", "reset_url": "http://x"},
+            )
+            for index in range(count)
+        ]
+
+    def test_email_is_sent_only_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            email = self.queue(1)[0]
+        self.assertEqual(len(mail.outbox), 0)
+
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["user0@example.com"])
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxEmail.STATUS_SENT)
+
+    @override_settings(EMAIL_BACKEND="apps.core.tests.CountingEmailBackend")
+    def test_batch_reuses_one_connection(self):
+        emails = self.queue(3)
+        CountingEmailBackend.opened = 0
+
+        failed = EmailOutboxService.send_batch([email.pk for email in emails])
+
+        self.assertEqual(failed, [])
+        self.assertEqual(CountingEmailBackend.opened, 1)
+        self.assertEqual(len(mail.outbox), 3)
+
+    @override_settings(EMAIL_BACKEND="apps.core.tests.FailingEmailBackend")
+    def test_smtp_failure_does_not_roll_back_registration(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            user, _ = AuthenticationService.register_user(
+                {
+                    "email": "new@example.com",
+                    "password": "x-Passw0rd",
+                    "first_name": "Jane",
+                    "last_name": "Doe",
+                }
+            )
+
+        self.assertTrue(User.objects.filter(pk=user.pk).exists())
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.status, OutboxEmail.STATUS_PENDING)
+        self.assertEqual(email.attempts, 1)
+        self.assertGreater(email.next_attempt_at, timezone.now())
+
+    def test_flush_retries_due_emails(self):
+        email = self.queue(1)[0]
+        OutboxEmail.objects.filter(pk=email.pk).update(
+            attempts=1, next_attempt_at=timezone.now() + timedelta(minutes=1)
+        )
+
+        self.assertEqual(EmailOutboxService.flush(), 0)
+        self.assertEqual(EmailOutboxService.flush(timezone.now() + timedelta(minutes=2)), 1)
+
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxEmail.STATUS_SENT)
+        self.assertEqual(len(mail.outbox), 1)
+
+
+class SoftDeletePredicateTests(TestCase):
+    """Flag querysets that repeat the default manager's is_deleted filter."""
+
+    def assert_no_duplicates(self, queryset):
+        self.assertEqual(duplicate_soft_delete_predicates(queryset), [])
+        for lookup in queryset._prefetch_related_lookups:
+            if isinstance(lookup, Prefetch) and lookup.queryset is not None:
+                self.assert_no_duplicates(lookup.queryset)
+
+    def test_detects_stacked_filter(self):
+        self.assertEqual(
+            duplicate_soft_delete_predicates(Product.objects.filter(is_deleted=False)),
+            ["products_product"],
+        )
+        self.assertEqual(duplicate_soft_delete_predicates(Product.objects.all()), [])
+
+    def test_related_filters_are_not_duplicates(self):
+        queryset = Product.objects.filter(variants__is_deleted=False)
+
+        self.assertEqual(duplicate_soft_delete_predicates(queryset), [])
+
+    def test_service_querysets(self):
+        self.assert_no_duplicates(ProductService.get_products_queryset())
+        self.assert_no_duplicates(
+            ProductService.get_products_queryset({"in_stock_only": True, "is_featured": True})
+        )
+        self.assert_no_duplicates(CategoryService.get_categories_tree())
+
+
+class SoftDeleteArchiveTests(TestCase):
+    """Tests for moving long soft-deleted rows into the archive table."""
+
+    def setUp(self):
+        self.category = Category.objects.create(name="Shirts")
+        self.product = self.create_product("SHIRT-1")
+        self.live_product = self.create_product("SHIRT-2")
+
+    def create_product(self, sku):
+        product = Product.objects.create(
+            name=sku,
+            description="Cotton shirt",
+            category=self.category,
+            gender="men",
+            price=Decimal("20.00"),
+            sku=sku,
+        )
+        ProductImage.objects.create(product=product, image=f"products/{sku}.jpg")
+        ProductVariant.objects.create(
+            product=product, size="M", color="Blue", sku=f"{sku}-M", stock_quantity=5
+        )
+        return product
+
+    def age_deletions(self, days):
+        deleted_at = timezone.now() - timedelta(days=days)
+        for model in (Product, ProductImage, ProductVariant):
+            model.all_objects.filter(is_deleted=True).update(deleted_at=deleted_at)
+
+    def test_archives_dead_rows_with_their_cascade(self):
+        self.product.variants.all().delete()
+        self.product.images.all().delete()
+        self.product.delete()
+        self.age_deletions(100)
+
+        call_command("archive_soft_deleted", "--days", "90", "--batch-size", "1", stdout=None)
+
+        self.assertFalse(Product.all_objects.filter(pk=self.product.pk).exists())
+        self.assertFalse(ProductVariant.all_objects.filter(product=self.product).exists())
+        self.assertTrue(Product.objects.filter(pk=self.live_product.pk).exists())
+        self.assertEqual(
+            sorted(ArchivedRecord.objects.values_list("model", flat=True)),
+            ["products.product", "products.productimage", "products.productvariant"],
+        )
+        record = ArchivedRecord.objects.get(model="products.product")
+        self.assertEqual(record.object_pk, str(self.product.pk))
+        self.assertEqual(record.data["sku"], "SHIRT-1")
+
+    def test_skips_rows_that_would_cascade_into_live_rows(self):
+        self.product.delete()
+        self.age_deletions(100)
+
+        call_command("archive_soft_deleted", "products.Product", stdout=None)
+
+        self.assertTrue(Product.all_objects.filter(pk=self.product.pk).exists())
+        self.assertFalse(ArchivedRecord.objects.exists())
+
+    def test_recent_deletions_are_kept(self):
+        self.product.variants.all().delete()
+        self.product.images.all().delete()
+        self.product.delete()
+        self.age_deletions(10)
+
+        call_command("archive_soft_deleted", stdout=None)
+
+        self.assertTrue(Product.all_objects.filter(pk=self.product.pk).exists())
+        self.assertFalse(ArchivedRecord.objects.exists())
+
+
+class MediaServingTests(TestCase):
+    """Tests for content-hashed storage and the media middleware."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_settings = override_settings(
+            SECURE_SSL_REDIRECT=False, MEDIA_ROOT=cls.media_root, MEDIA_SERVE=True
+        )
+        cls.media_settings.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.name = default_storage.save("products/photo.jpg", ContentFile(b"0123456789"))
+        self.url = f"/media/{self.name}"
+
+    def test_names_embed_content_hash(self):
+        same = default_storage.save("products/photo.jpg", ContentFile(b"0123456789"))
+        other = default_storage.save("products/photo.jpg", ContentFile(b"abcdef"))
+        digest = ContentHashStorage.get_name_hash(self.name)
+
+        self.assertRegex(self.name, r"^products/photo\.[0-9a-f]{16}\.jpg$")
+        self.assertEqual(ContentHashStorage.get_name_hash(same), digest)
+        self.assertNotEqual(same, self.name)
+        self.assertNotEqual(ContentHashStorage.get_name_hash(other), digest)
+
+    def test_urls_use_precomputed_prefix(self):
+        request = RequestFactory().get("/")
+
+        self.assertEqual(
+            build_media_url(default_storage, self.name, request), f"http://testserver{self.url}"
+        )
+        with override_settings(MEDIA_URL="https://cdn.example.com/media/"):
+            self.assertEqual(
+                build_media_url(default_storage, self.name, request),
+                f"https://cdn.example.com/media/{self.name}",
+            )
+
+    def test_hashed_file_is_served_immutable_with_validators(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b"0123456789")
+        self.assertEqual(response["Content-Length"], "10")
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+        self.assertEqual(response["ETag"], f'"{ContentHashStorage.get_name_hash(self.name)}"')
+
+        cached = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_unhashed_file_gets_short_cache_lifetime(self):
+        name = "legacy/photo.jpg"
+        self.make_legacy_file(name)
+        with override_settings(MEDIA_CACHE_MAX_AGE=120):
+            response = self.client.get(f"/media/{name}")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Cache-Control"], "public, max-age=120")
+
+    def make_legacy_file(self, name):
+        path = default_storage.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as fileobj:
+            fileobj.write(b"legacy")
+        return path
+
+    def test_byte_ranges(self):
+        response = self.client.get(self.url, HTTP_RANGE="bytes=2-5")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), b"2345")
+        self.assertEqual(response["Content-Range"], "bytes 2-5/10")
+        self.assertEqual(response["Content-Length"], "4")
+
+        suffix = self.client.get(self.url, HTTP_RANGE="bytes=-3")
+        self.assertEqual(b"".join(suffix.streaming_content), b"789")
+
+        stale = self.client.get(self.url, HTTP_RANGE="bytes=2-5", HTTP_IF_RANGE='"other"')
+        self.assertEqual(stale.status_code, 200)
+
+        unsatisfiable = self.client.get(self.url, HTTP_RANGE="bytes=20-")
+        self.assertEqual(unsatisfiable.status_code, 416)
+        self.assertEqual(unsatisfiable["Content-Range"], "bytes */10")
+
+    def test_missing_and_unsafe_paths_are_not_found(self):
+        self.assertEqual(self.client.get("/media/products/missing.jpg").status_code, 404)
+        self.assertEqual(self.client.get("/media/../config/settings.py").status_code, 404)
+        self.assertEqual(self.client.get("/media/products/").status_code, 404)
+        self.assertEqual(self.client.post(self.url).status_code, 405)
+
+    @override_settings(MEDIA_SENDFILE_HEADER="X-Accel-Redirect")
+    def test_sendfile_header_delegates_body(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response["X-Accel-Redirect"], f"/protected-media/{self.name}")
+        self.assertEqual(response.content, b"")
+        self.assertIn("immutable", response["Cache-Control"])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, DATABASE_REPLICAS=["replica"])
+class ReplicaRoutingTests(TestCase):
+    """
+    Tests for replica routing. The replica is a separate database here,
+    so which rows a read returns shows which database served it.
+    """
+
+    databases = {"default", "replica"}
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Primary")
+        Product.objects.create(name="Primary tee", category=category, price=10, sku="PRIMARY")
+        # bulk_create skips save(), which would read the category path from the primary
+        (replica_category,) = Category.objects.using("replica").bulk_create(
+            [Category(name="Replica", slug="replica", path="1/")]
+        )
+        Product.objects.using("replica").bulk_create(
+            [Product(name="Replica tee", slug="replica-tee", category=replica_category, price=10, sku="REPLICA")]
+        )
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def product_names(self):
+        return list(Product.objects.values_list("name", flat=True))
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertEqual(self.product_names(), ["Primary tee"])
+
+    def test_catalog_requests_read_from_replica(self):
+        response = self.client.get("/api/v1/products/")
+
+        names = [product["name"] for product in response.json()["data"]["results"]]
+        self.assertEqual(names, ["Replica tee"])
+
+    def test_writes_transactions_and_locks_use_primary(self):
+        with replica_reads():
+            self.assertEqual(Product.objects.all().db, "replica")
+            self.assertEqual(Order.objects.all().db, "replica")
+            self.assertEqual(Cart.objects.all().db, "default")
+            self.assertEqual(Product.objects.select_for_update().db, "default")
+            with transaction.atomic():
+                self.assertEqual(Product.objects.all().db, "default")
+        with replica_reads(pinned=True):
+            self.assertEqual(Product.objects.all().db, "default")
+
+    def run_middleware(self, request, view):
+        return ReplicaPinningMiddleware(view)(request)
+
+    def read_view(self, request):
+        return HttpResponse(",".join(self.product_names()))
+
+    def write_view(self, request):
+        Category.objects.create(name="Written")
+        return HttpResponse("")
+
+    def test_writing_client_is_pinned_by_cookie(self):
+        response = self.run_middleware(self.factory.post("/"), self.write_view)
+        cookie = response.cookies["db_pin"]
+        self.assertEqual(cookie["max-age"], 10)
+
+        pinned = self.factory.get("/")
+        pinned.COOKIES["db_pin"] = cookie.value
+        unpinned = self.factory.get("/")
+
+        self.assertEqual(self.run_middleware(pinned, self.read_view).content, b"Primary tee")
+        self.assertEqual(self.run_middleware(unpinned, self.read_view).content, b"Replica tee")
+
+    def test_writing_api_client_is_pinned_by_authorization(self):
+        cache.clear()
+        self.run_middleware(self.factory.post("/", HTTP_AUTHORIZATION="Bearer one"), self.write_view)
+
+        same = self.factory.get("/", HTTP_AUTHORIZATION="Bearer one")
+        other = self.factory.get("/", HTTP_AUTHORIZATION="Bearer two")
+
+        self.assertEqual(self.run_middleware(same, self.read_view).content, b"Primary tee")
+        self.assertEqual(self.run_middleware(other, self.read_view).content, b"Replica tee")
+
+    def test_reads_do_not_pin(self):
+        response = self.run_middleware(self.factory.get("/"), self.read_view)
+
+        self.assertNotIn("db_pin", response.cookies)
+
+    def test_view_counts_do_not_pin(self):
+        def view(request):
+            ProductViewCounter.increment(Product.objects.using("default").get().pk)
+            return HttpResponse("")
+
+        response = self.run_middleware(self.factory.get("/"), view)
+
+        self.assertNotIn("db_pin", response.cookies)
+        self.assertEqual(Product.objects.using("default").get().views_count, 1)
+
+
+class DatabaseConfigurationTests(TestCase):
+    """Tests for the environment-driven database settings and their checks."""
+
+    def get_databases(self, testing=True, **env):
+        # Only the given variables, so DB_* settings from the shell cannot leak in
+        with mock.patch.dict(os.environ, env, clear=True):
+            return get_databases(settings.BASE_DIR, testing=testing)
+
+    def test_postgres_connections_are_persistent_and_health_checked(self):
+        databases = self.get_databases(DB_ENGINE="postgresql", DB_STATEMENT_TIMEOUT="30000")
+
+        default = databases["default"]
+        self.assertEqual(default["CONN_MAX_AGE"], 60)
+        self.assertTrue(default["CONN_HEALTH_CHECKS"])
+        self.assertFalse(default["DISABLE_SERVER_SIDE_CURSORS"])
+        self.assertEqual(default["OPTIONS"]["options"], "-c statement_timeout=30000")
+
+    def test_pgbouncer_mode_disables_server_side_cursors_and_startup_options(self):
+        databases = self.get_databases(
+            DB_ENGINE="postgresql", DB_PGBOUNCER="True", DB_STATEMENT_TIMEOUT="30000"
+        )
+
+        self.assertTrue(databases["default"]["DISABLE_SERVER_SIDE_CURSORS"])
+        self.assertNotIn("options", databases["default"]["OPTIONS"])
+
+    def test_replica_hosts_become_mirrored_aliases(self):
+        databases = self.get_databases(
+            DB_ENGINE="postgresql", DB_PORT="5433", DB_REPLICA_HOSTS="db-1:6432, db-2"
+        )
+
+        self.assertEqual((databases["replica_1"]["HOST"], databases["replica_1"]["PORT"]), ("db-1", "6432"))
+        self.assertEqual((databases["replica_2"]["HOST"], databases["replica_2"]["PORT"]), ("db-2", "5433"))
+        self.assertEqual(databases["replica_2"]["TEST"], {"MIRROR": "default"})
+        self.assertEqual(databases["replica"]["TEST"], {"NAME": "test_mvs_clothing_replica"})
+
+    def test_stand_in_replica_is_test_only(self):
+        databases = self.get_databases(testing=False, DB_ENGINE="postgresql")
+
+        self.assertEqual(list(databases), ["default"])
+
+    def test_checks_flag_sqlite_and_unknown_replicas(self):
+        with override_settings(DATABASE_REPLICAS=["missing"]):
+            ids = [message.id for message in check_database_settings()]
+
+        self.assertEqual(ids, ["core.W001", "core.E002"])
+
+    def test_connection_check_reaches_databases(self):
+        self.assertEqual(check_database_connections(databases=["default"]), [])
+
+
+class StatementTimeoutTests(TestCase):
+    """Tests for per-request-class statement timeouts."""
+
+    def test_request_classes(self):
+        factory = RequestFactory()
+        get_class = StatementTimeoutMiddleware.get_request_class
+
+        self.assertEqual(get_class(factory.get("/api/v1/products/")), "read")
+        self.assertEqual(get_class(factory.post("/api/v1/orders/")), "write")
+        self.assertEqual(get_class(factory.post("/admin/products/product/add/")), "admin")
+
+    def test_timeout_is_set_once_per_connection_outside_transactions(self):
+        connection = mock.Mock(statement_timeout=None, in_atomic_block=False)
+        cursor = mock.Mock()
+        execute = mock.Mock()
+        context = {"connection": connection, "cursor": cursor}
+
+        StatementTimeout(5000)(execute, "SELECT 1", None, False, context)
+        StatementTimeout(5000)(execute, "SELECT 1", None, False, context)
+        connection.in_atomic_block = True
+        StatementTimeout(15000)(execute, "SELECT 1", None, False, context)
+
+        cursor.cursor.execute.assert_called_once_with("SET statement_timeout = %s", [5000])
+        self.assertEqual(execute.call_count, 3)
+
+    def test_sqlite_connections_are_left_alone(self):
+        self.assertEqual(StatementTimeoutMiddleware.get_connections(), [])
@@ -1,9 +1,9 @@
 import hashlib
 import random
 import string
-from typing import Any, Dict
-from django.core.mail import send_mail
-from django.conf import settings
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Hashable
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 
@@ -29,22 +29,23 @@ def send_email(
     template_name: str,
     context: Dict[str, Any],
     from_email: str = None,
-) -> int:
+):
     """
-    Send an email using a template.
+    Queue an email rendered from a template.
+    The email is stored in the outbox and delivered by Celery once the
+    current transaction commits; returns the OutboxEmail.
     """
+    from .services import EmailOutboxService
+
     html_message = render_to_string(template_name, context)
     plain_message = strip_tags(html_message)
 
-    from_email = from_email or settings.DEFAULT_FROM_EMAIL
-
-    return send_mail(
+    return EmailOutboxService.enqueue(
         subject=subject,
-        message=plain_message,
-        from_email=from_email,
         recipient_list=recipient_list,
-        html_message=html_message,
-        fail_silently=False,
+        body_text=plain_message,
+        body_html=html_message,
+        from_email=from_email,
     )
 
 
@@ -65,3 +66,32 @@ def normalize_phone_number(phone: str) -> str:
     Normalize phone number by removing non-digit characters.
     """
     return "".join(filter(str.isdigit, phone))
+
+
+class KeyedLock:
+    """
+    In-process lock per key (single-flight).
+    Threads holding the same key run one at a time; locks are dropped
+    once no thread holds or waits for them.
+    """
+
+    def __init__(self):
+        self._guard = threading.Lock()
+        self._locks = {}
+
+    @contextmanager
+    def hold(self, key: Hashable):
+        with self._guard:
+            lock, waiters = self._locks.get(key, (None, 0))
+            lock = lock or threading.Lock()
+            self._locks[key] = (lock, waiters + 1)
+        try:
+            with lock:
+                yield
+        finally:
+            with self._guard:
+                lock, waiters = self._locks[key]
+                if waiters == 1:
+                    del self._locks[key]
+                else:
+                    self._locks[key] = (lock, waiters - 1)
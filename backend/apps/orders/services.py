@@ -1,6 +1,8 @@
 import logging
+from collections import defaultdict
 from decimal import Decimal
 from django.db import transaction
+from django.db.models import F
 from django.utils import timezone
 from apps.core.exceptions import NotFoundError, ValidationError
 from apps.products.models import Product, ProductVariant
@@ -21,6 +23,58 @@ class OrderService:
         random_num = random.randint(1000, 9999)
         return f"ORD-{timestamp}-{random_num}"
 
+    @staticmethod
+    def lock_order_rows(items_data, active_only=True):
+        """
+        Lock every product and variant referenced by items_data.
+        Rows are locked in one query per table, products before variants
+        and each by primary key, so concurrent checkouts and cancellations
+        touching the same rows always acquire their locks in the same order
+        and cannot deadlock. With active_only, inactive rows are skipped.
+        """
+        product_ids = {item_data["product_id"] for item_data in items_data}
+        variant_ids = {
+            item_data["variant_id"]
+            for item_data in items_data
+            if item_data.get("variant_id")
+        }
+
+        active = {"is_active": True} if active_only else {}
+        products = {
+            product.pk: product
+            for product in Product.objects.select_for_update()
+            .filter(pk__in=product_ids, **active)
+            .order_by("pk")
+        }
+        variants = {}
+        if variant_ids:
+            variants = {
+                variant.pk: variant
+                for variant in ProductVariant.objects.select_for_update()
+                .filter(pk__in=variant_ids, **active)
+                .order_by("pk")
+            }
+        return products, variants
+
+    @staticmethod
+    def reserve_stock(variant_quantities, variants):
+        """
+        Decrement variant stock with conditional updates.
+        Each update only applies while enough stock remains, so a checkout
+        that loses a race fails instead of driving stock negative; raising
+        rolls back every reservation made by the surrounding transaction.
+        """
+        for variant_id in sorted(variant_quantities):
+            quantity = variant_quantities[variant_id]
+            updated = ProductVariant.objects.filter(
+                pk=variant_id, stock_quantity__gte=quantity
+            ).update(stock_quantity=F("stock_quantity") - quantity)
+            if not updated:
+                variant = variants[variant_id]
+                raise ValidationError(
+                    f"Insufficient stock for {variant.product.name} - {variant.size}/{variant.color}"
+                )
+
     @staticmethod
     @transaction.atomic
     def create_order(user, order_data):
@@ -29,6 +83,9 @@ class OrderService:
         shipping_cost = order_data.pop("shipping_cost", Decimal("0.00"))
         subtotal = Decimal("0.00")
         validated_items = []
+        variant_quantities = defaultdict(int)
+
+        products, variants = OrderService.lock_order_rows(items_data)
 
         for item_data in items_data:
             product_id = item_data["product_id"]
@@ -36,26 +93,19 @@ class OrderService:
             quantity = item_data["quantity"]
             price = Decimal(str(item_data["price"]))
 
-            try:
-                product = Product.objects.get(
-                    id=product_id, is_active=True, is_deleted=False
-                )
-            except Product.DoesNotExist:
+            product = products.get(product_id)
+            if product is None:
                 raise NotFoundError(f"Product with id {product_id} not found")
 
             variant = None
             if variant_id:
-                try:
-                    variant = ProductVariant.objects.get(
-                        id=variant_id,
-                        product=product,
-                        is_active=True,
-                        is_deleted=False,
-                    )
-                except ProductVariant.DoesNotExist:
+                variant = variants.get(variant_id)
+                if variant is None or variant.product_id != product.pk:
                     raise NotFoundError(f"Product variant with id {variant_id} not found")
+                variant.product = product
 
-                if variant.stock_quantity < quantity:
+                variant_quantities[variant.pk] += quantity
+                if variant.stock_quantity < variant_quantities[variant.pk]:
                     raise ValidationError(
                         f"Insufficient stock for {product.name} - {variant.size}/{variant.color}"
                     )
@@ -82,6 +132,8 @@ class OrderService:
                 }
             )
 
+        OrderService.reserve_stock(variant_quantities, variants)
+
         total = subtotal + shipping_cost
 
         order = Order.objects.create(
@@ -93,22 +145,15 @@ class OrderService:
             **order_data,
         )
 
-        for item_data in validated_items:
-            OrderItem.objects.create(
-                order=order,
-                product=item_data["product"],
-                variant=item_data["variant"],
-                quantity=item_data["quantity"],
-                price=item_data["price"],
-            )
+        # Product stock is aggregated from variants, so variant-less items
+        # reserve nothing and only the parents of reserved variants refresh.
+        OrderItem.objects.bulk_create(
+            [OrderItem(order=order, **item_data) for item_data in validated_items]
+        )
 
-            # Update stock
-            if item_data["variant"]:
-                item_data["variant"].stock_quantity -= item_data["quantity"]
-                item_data["variant"].save(update_fields=["stock_quantity"])
-            else:
-                # Note: Product stock is calculated from variants, so we don't update it directly
-                pass
+        Product.refresh_stock(
+            variants[variant_id].product_id for variant_id in variant_quantities
+        )
 
         logger.info(f"Order {order.order_number} created successfully for user {user.email}")
 
@@ -152,8 +197,24 @@ class OrderService:
     @staticmethod
     @transaction.atomic
     def cancel_order(user, order_id):
-        """Cancel an order and restore stock."""
-        order = OrderService.get_order_by_id(user, order_id)
+        """
+        Cancel an order and restore stock.
+        The order row is locked before its status is checked, so concurrent
+        cancellations restock once; products and variants are then locked
+        in the same order as checkout.
+        """
+        try:
+            order = (
+                Order.objects.select_for_update()
+                .prefetch_related(
+                    "items__product__images",
+                    "items__product__category",
+                    "items__variant",
+                )
+                .get(id=order_id, user=user)
+            )
+        except Order.DoesNotExist:
+            raise NotFoundError("Order not found")
 
         # Check if order can be cancelled
         if order.status in ["shipped", "delivered", "cancelled"]:
@@ -161,10 +222,20 @@ class OrderService:
                 f"Cannot cancel order with status: {order.get_status_display()}"
             )
 
+        variant_quantities = defaultdict(int)
+        items_data = []
         for item in order.items.all():
-            if item.variant:
-                item.variant.stock_quantity += item.quantity
-                item.variant.save(update_fields=["stock_quantity"])
+            if item.variant_id:
+                variant_quantities[item.variant_id] += item.quantity
+                items_data.append({"product_id": item.product_id, "variant_id": item.variant_id})
+
+        OrderService.lock_order_rows(items_data, active_only=False)
+        for variant_id in sorted(variant_quantities):
+            ProductVariant.objects.filter(pk=variant_id).update(
+                stock_quantity=F("stock_quantity") + variant_quantities[variant_id]
+            )
+
+        Product.refresh_stock(item_data["product_id"] for item_data in items_data)
 
         order.status = "cancelled"
         order.save(update_fields=["status"])
@@ -1,3 +1,232 @@
-from django.test import TestCase
+import threading
+import time
+from decimal import Decimal
+from django.db import DatabaseError, connection
+from django.test import TestCase, TransactionTestCase
+from apps.authentication.models import User
+from apps.core.exceptions import ValidationError
+from apps.products.models import Category, Product, ProductVariant
+from .models import Order, OrderItem
+from .services import OrderService
 
-# Create your tests here.
+SHIPPING_DATA = {
+    "shipping_first_name": "Jane",
+    "shipping_last_name": "Doe",
+    "shipping_email": "jane@example.com",
+    "shipping_phone": "+15550000000",
+    "shipping_address": "1 Main St",
+    "shipping_city": "Springfield",
+    "shipping_state": "IL",
+    "shipping_postal_code": "62701",
+    "shipping_country": "US",
+}
+
+
+def create_catalog(stock_quantity):
+    category = Category.objects.create(name="Shirts")
+    product = Product.objects.create(
+        name="Shirt",
+        description="Cotton shirt",
+        category=category,
+        gender="men",
+        price=Decimal("20.00"),
+        sku="SHIRT",
+        brand="Acme",
+    )
+    variants = [
+        ProductVariant.objects.create(
+            product=product,
+            size=size,
+            color="Blue",
+            color_hex="#0000ff",
+            sku=f"SHIRT-{size}",
+            stock_quantity=stock_quantity,
+        )
+        for size in ["S", "M"]
+    ]
+    return product, variants
+
+
+def order_data(*lines):
+    items = [
+        {
+            "product_id": variant.product_id,
+            "variant_id": variant.pk,
+            "quantity": quantity,
+            "price": variant.final_price,
+        }
+        for variant, quantity in lines
+    ]
+    return {**SHIPPING_DATA, "items": items}
+
+
+class CreateOrderTests(TestCase):
+    """Tests for batched order creation."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="buyer@example.com", password="x-Passw0rd")
+        cls.product, cls.variants = create_catalog(stock_quantity=5)
+
+    def test_create_order_reserves_stock_in_constant_queries(self):
+        small, large = self.variants
+        with self.assertNumQueries(9):
+            order = OrderService.create_order(
+                self.user, order_data((small, 2), (large, 3))
+            )
+
+        self.assertEqual(order.items.count(), 2)
+        self.assertEqual(order.subtotal, Decimal("100.00"))
+        small.refresh_from_db()
+        large.refresh_from_db()
+        self.product.refresh_from_db()
+        self.assertEqual((small.stock_quantity, large.stock_quantity), (3, 2))
+        self.assertEqual(self.product.total_stock, 5)
+
+    def test_repeated_variant_lines_are_checked_together(self):
+        small = self.variants[0]
+        with self.assertRaises(ValidationError):
+            OrderService.create_order(self.user, order_data((small, 3), (small, 3)))
+
+        small.refresh_from_db()
+        self.assertEqual(small.stock_quantity, 5)
+        self.assertFalse(Order.objects.exists())
+
+    def test_insufficient_stock_rolls_back_every_reservation(self):
+        small, large = self.variants
+        with self.assertRaises(ValidationError):
+            OrderService.create_order(self.user, order_data((small, 1), (large, 6)))
+
+        small.refresh_from_db()
+        self.assertEqual(small.stock_quantity, 5)
+        self.assertFalse(OrderItem.objects.exists())
+
+
+class CancelOrderTests(TestCase):
+    """Tests for order cancellation."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="buyer@example.com", password="x-Passw0rd")
+        cls.product, cls.variants = create_catalog(stock_quantity=5)
+
+    def test_cancel_restores_stock_and_aggregate(self):
+        small, medium = self.variants
+        order = OrderService.create_order(self.user, order_data((small, 2), (medium, 5)))
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.total_stock, self.product.has_stock), (3, True))
+
+        OrderService.cancel_order(self.user, order.pk)
+
+        order.refresh_from_db()
+        self.assertEqual(order.status, "cancelled")
+        small.refresh_from_db()
+        medium.refresh_from_db()
+        self.assertEqual((small.stock_quantity, medium.stock_quantity), (5, 5))
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.total_stock, self.product.has_stock), (10, True))
+
+    def test_cancelled_order_is_not_restocked_again(self):
+        small, _ = self.variants
+        order = OrderService.create_order(self.user, order_data((small, 2)))
+        OrderService.cancel_order(self.user, order.pk)
+
+        with self.assertRaises(ValidationError):
+            OrderService.cancel_order(self.user, order.pk)
+
+        small.refresh_from_db()
+        self.assertEqual(small.stock_quantity, 5)
+
+
+class ConcurrentCancelTests(TransactionTestCase):
+    """Parallel cancellations of the same order must restock it once."""
+
+    attempts = 4
+
+    def test_parallel_cancellations_restock_once(self):
+        product, (variant, _) = create_catalog(stock_quantity=5)
+        user = User.objects.create_user(email="buyer@example.com", password="x-Passw0rd")
+        order = OrderService.create_order(user, order_data((variant, 2)))
+        barrier = threading.Barrier(self.attempts)
+        results = []
+
+        def cancel():
+            barrier.wait()
+            try:
+                for attempt in range(200):
+                    try:
+                        OrderService.cancel_order(user, order.pk)
+                    except DatabaseError:
+                        time.sleep(0.001 * attempt)
+                        continue
+                    except ValidationError:
+                        results.append("refused")
+                    else:
+                        results.append("cancelled")
+                    break
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=cancel) for _ in range(self.attempts)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        variant.refresh_from_db()
+        product.refresh_from_db()
+        self.assertEqual(results.count("cancelled"), 1)
+        self.assertEqual(results.count("refused"), self.attempts - 1)
+        self.assertEqual(variant.stock_quantity, 5)
+        self.assertEqual(product.total_stock, 10)
+
+
+class ConcurrentCheckoutTests(TransactionTestCase):
+    """Parallel checkouts of the same variant must never oversell it."""
+
+    stock_quantity = 3
+    buyers = 8
+
+    def test_parallel_checkouts_do_not_oversell(self):
+        product, (variant, _) = create_catalog(stock_quantity=self.stock_quantity)
+        users = [
+            User.objects.create_user(email=f"buyer{index}@example.com", password="x-Passw0rd")
+            for index in range(self.buyers)
+        ]
+        barrier = threading.Barrier(self.buyers)
+        results = []
+
+        def checkout(user):
+            barrier.wait()
+            try:
+                # Retry lock contention and order number collisions so
+                # every buyer ends with a definite success or refusal.
+                for attempt in range(200):
+                    try:
+                        OrderService.create_order(user, order_data((variant, 1)))
+                    except DatabaseError:
+                        time.sleep(0.001 * attempt)
+                        continue
+                    except ValidationError:
+                        results.append("refused")
+                    else:
+                        results.append("ordered")
+                    break
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=checkout, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        variant.refresh_from_db()
+        product.refresh_from_db()
+        self.assertEqual(len(results), self.buyers)
+        self.assertEqual(results.count("ordered"), self.stock_quantity)
+        self.assertEqual(variant.stock_quantity, 0)
+        self.assertEqual(
+            OrderItem.objects.filter(variant=variant).count(), self.stock_quantity
+        )
+        self.assertEqual(product.total_stock, self.stock_quantity)
@@ -2,7 +2,7 @@ from rest_framework import generics, status
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from apps.core.responses import success_response, created_response
-from apps.core.pagination import CustomPageNumberPagination
+from apps.core.pagination import SelectablePagination
 from .models import Order
 from .serializers import OrderSerializer, CreateOrderSerializer
 from .services import OrderService
@@ -13,7 +13,7 @@ class OrderListView(generics.ListAPIView):
 
     permission_classes = [IsAuthenticated]
     serializer_class = OrderSerializer
-    pagination_class = CustomPageNumberPagination
+    pagination_class = SelectablePagination
 
     def get_queryset(self):
         """Get orders for current user."""
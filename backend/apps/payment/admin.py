@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Payment
+from .models import Payment, StripeEvent
 
 
 @admin.register(Payment)
@@ -98,3 +98,27 @@ class PaymentAdmin(admin.ModelAdmin):
     def has_delete_permission(self, request, obj=None):
         """Disable payment deletion."""
         return False
+
+
+@admin.register(StripeEvent)
+class StripeEventAdmin(admin.ModelAdmin):
+    """Admin interface for stored Stripe webhook events."""
+
+    list_display = ["stripe_event_id", "event_type", "status", "attempts", "created_at"]
+    list_filter = ["status", "event_type", "created_at"]
+    search_fields = ["stripe_event_id"]
+    readonly_fields = [
+        "stripe_event_id",
+        "event_type",
+        "payload",
+        "status",
+        "attempts",
+        "last_error",
+        "processed_at",
+        "created_at",
+        "updated_at",
+    ]
+
+    def has_add_permission(self, request):
+        """Events are only created by the webhook."""
+        return False
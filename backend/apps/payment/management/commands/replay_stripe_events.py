@@ -0,0 +1,64 @@
+"""
+File: backend/apps/payment/management/commands/replay_stripe_events.py
+Purpose: Replay stored Stripe webhook events that failed or were never processed
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from apps.payment.models import StripeEvent
+from apps.payment.services import PaymentService
+from apps.payment.tasks import process_stripe_event
+
+
+class Command(BaseCommand):
+    """Re-run the handlers of stored Stripe webhook events."""
+
+    help = "Replay failed (or pending) Stripe webhook events"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "event_ids",
+            nargs="*",
+            help="Stripe event ids to replay (default: every event with --status)",
+        )
+        parser.add_argument(
+            "--status",
+            choices=[StripeEvent.STATUS_FAILED, StripeEvent.STATUS_PENDING],
+            default=StripeEvent.STATUS_FAILED,
+            help="Status of the events to replay when no ids are given",
+        )
+        parser.add_argument(
+            "--queue",
+            action="store_true",
+            help="Queue the events for Celery instead of processing them here",
+        )
+
+    def handle(self, *args, **options):
+        if options["event_ids"]:
+            events = StripeEvent.objects.filter(stripe_event_id__in=options["event_ids"])
+            missing = set(options["event_ids"]) - set(
+                events.values_list("stripe_event_id", flat=True)
+            )
+            if missing:
+                raise CommandError(f"Unknown event(s): {', '.join(sorted(missing))}")
+        else:
+            events = StripeEvent.objects.filter(status=options["status"])
+
+        processed = failed = 0
+        for pk, stripe_event_id in events.order_by("created_at").values_list(
+            "pk", "stripe_event_id"
+        ):
+            if options["queue"]:
+                process_stripe_event.delay(pk)
+                processed += 1
+                continue
+            try:
+                if PaymentService.process_webhook_event(pk):
+                    processed += 1
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"{stripe_event_id}: {e}")
+
+        action = "Queued" if options["queue"] else "Processed"
+        self.stdout.write(
+            self.style.SUCCESS(f"{action} {processed} event(s), {failed} failed")
+        )
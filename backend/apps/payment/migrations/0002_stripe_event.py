@@ -0,0 +1,101 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("payment", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StripeEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        help_text="Date and time when the object was created",
+                        verbose_name="created at",
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True,
+                        help_text="Date and time when the object was last updated",
+                        verbose_name="updated at",
+                    ),
+                ),
+                (
+                    "stripe_event_id",
+                    models.CharField(
+                        help_text="Stripe Event ID",
+                        max_length=255,
+                        unique=True,
+                        verbose_name="stripe event ID",
+                    ),
+                ),
+                (
+                    "event_type",
+                    models.CharField(max_length=100, verbose_name="event type"),
+                ),
+                (
+                    "payload",
+                    models.JSONField(
+                        help_text="Verified event payload", verbose_name="payload"
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("processed", "Processed"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                        verbose_name="status",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Number of failed processing attempts",
+                        verbose_name="attempts",
+                    ),
+                ),
+                ("last_error", models.TextField(blank=True, verbose_name="last error")),
+                (
+                    "processed_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="processed at"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "stripe event",
+                "verbose_name_plural": "stripe events",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["status", "created_at"],
+                        name="payment_str_status_bfa8d8_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("payment", "0002_stripe_event"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="payment",
+            name="checkout_expires_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="When the Stripe Checkout Session expires",
+                null=True,
+                verbose_name="checkout expires at",
+            ),
+        ),
+        migrations.AddField(
+            model_name="payment",
+            name="checkout_url",
+            field=models.URLField(
+                blank=True,
+                help_text="Stripe Checkout Session URL",
+                max_length=1000,
+                verbose_name="checkout URL",
+            ),
+        ),
+    ]
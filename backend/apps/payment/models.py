@@ -1,4 +1,6 @@
+from datetime import timedelta
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from apps.core.models import TimeStampedModel
 from apps.orders.models import Order
@@ -34,6 +36,18 @@ class Payment(TimeStampedModel):
         blank=True,
         help_text=_("Stripe Checkout Session ID"),
     )
+    checkout_url = models.URLField(
+        _("checkout URL"),
+        max_length=1000,
+        blank=True,
+        help_text=_("Stripe Checkout Session URL"),
+    )
+    checkout_expires_at = models.DateTimeField(
+        _("checkout expires at"),
+        null=True,
+        blank=True,
+        help_text=_("When the Stripe Checkout Session expires"),
+    )
     amount = models.DecimalField(
         _("amount"),
         max_digits=10,
@@ -83,6 +97,17 @@ class Payment(TimeStampedModel):
         """Return string representation of the payment."""
         return f"Payment for Order #{self.order.order_number} - {self.status}"
 
+    def has_live_checkout_session(self, margin=timedelta(minutes=5)):
+        """
+        Whether the stored checkout session can still be handed out.
+        Sessions about to expire count as dead so the customer has time to pay.
+        """
+        return bool(
+            self.checkout_url
+            and self.checkout_expires_at
+            and self.checkout_expires_at > timezone.now() + margin
+        )
+
     def mark_as_succeeded(self):
         """Mark payment as succeeded and update order."""
         self.status = "succeeded"
@@ -102,3 +127,52 @@ class Payment(TimeStampedModel):
         # Update order payment status
         self.order.payment_status = "failed"
         self.order.save(update_fields=["payment_status"])
+
+
+class StripeEvent(TimeStampedModel):
+    """
+    Raw Stripe webhook event, stored before it is processed.
+    The unique Stripe event id makes redelivered events no-ops; failed
+    events keep their payload so they can be replayed.
+    """
+
+    STATUS_PENDING = "pending"
+    STATUS_PROCESSED = "processed"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, _("Pending")),
+        (STATUS_PROCESSED, _("Processed")),
+        (STATUS_FAILED, _("Failed")),
+    ]
+
+    stripe_event_id = models.CharField(
+        _("stripe event ID"),
+        max_length=255,
+        unique=True,
+        help_text=_("Stripe Event ID"),
+    )
+    event_type = models.CharField(_("event type"), max_length=100)
+    payload = models.JSONField(_("payload"), help_text=_("Verified event payload"))
+    status = models.CharField(
+        _("status"),
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+    )
+    attempts = models.PositiveIntegerField(
+        _("attempts"), default=0, help_text=_("Number of failed processing attempts")
+    )
+    last_error = models.TextField(_("last error"), blank=True)
+    processed_at = models.DateTimeField(_("processed at"), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _("stripe event")
+        verbose_name_plural = _("stripe events")
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+        ]
+
+    def __str__(self):
+        """Return string representation of the event."""
+        return f"{self.event_type} ({self.stripe_event_id}) - {self.status}"
@@ -16,6 +16,8 @@ class PaymentSerializer(serializers.ModelSerializer):
             "order_number",
             "stripe_payment_intent_id",
             "stripe_checkout_session_id",
+            "checkout_url",
+            "checkout_expires_at",
             "amount",
             "currency",
             "status",
@@ -30,6 +32,8 @@ class PaymentSerializer(serializers.ModelSerializer):
             "id",
             "stripe_payment_intent_id",
             "stripe_checkout_session_id",
+            "checkout_url",
+            "checkout_expires_at",
             "amount",
             "currency",
             "status",
@@ -1,16 +1,22 @@
 import logging
 import stripe
+from datetime import datetime, timezone as dt_timezone
 from decimal import Decimal
+from functools import partial
 from django.conf import settings
 from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
 from apps.core.exceptions import ValidationError, NotFoundError
+from apps.core.utils import KeyedLock
 from apps.orders.models import Order
-from .models import Payment
+from .models import Payment, StripeEvent
+from .stripe_client import get_stripe_client
 
 logger = logging.getLogger(__name__)
 
-# Initialize Stripe
-stripe.api_key = settings.STRIPE_SECRET_KEY
+# Serializes checkout session creation per order within this process
+checkout_session_locks = KeyedLock()
 
 
 class PaymentService:
@@ -18,7 +24,11 @@ class PaymentService:
 
     @staticmethod
     def create_checkout_session(order_id, user):
-        """Create a Stripe Checkout session for an order."""
+        """
+        Return a Stripe Checkout session for an order, reusing the stored
+        one while it is live. Concurrent requests for the same order in
+        this process wait for each other instead of creating duplicates.
+        """
         try:
             order = Order.objects.get(id=order_id, user=user)
         except Order.DoesNotExist:
@@ -28,26 +38,41 @@ class PaymentService:
         if order.payment_status == "paid":
             raise ValidationError("Order is already paid")
 
+        with checkout_session_locks.hold(order.pk):
+            return PaymentService.get_or_create_checkout_session(order)
+
+    @staticmethod
+    def get_or_create_checkout_session(order):
+        """Reuse the order's live checkout session or create a new one."""
+        stripe_client = get_stripe_client()
+
         # Check if payment already exists
         existing_payment = Payment.objects.filter(
             order=order, status__in=["pending", "processing"]
         ).first()
 
         if existing_payment:
-            # Return existing session
-            try:
-                session = stripe.checkout.Session.retrieve(
-                    existing_payment.stripe_checkout_session_id
-                )
-                if session.payment_status != "paid":
-                    return existing_payment, session.url
-            except stripe.error.StripeError:
-                # If session expired or invalid, create new one
-                pass
+            # A stored, unexpired session is returned without asking Stripe
+            if existing_payment.has_live_checkout_session():
+                return existing_payment, existing_payment.checkout_url
+
+            # Payments stored without an expiry are checked once with Stripe
+            if existing_payment.checkout_expires_at is None:
+                try:
+                    session = stripe_client.retrieve_checkout_session(
+                        existing_payment.stripe_checkout_session_id
+                    )
+                    if session.status == "open":
+                        PaymentService.store_checkout_session(existing_payment, session)
+                        if existing_payment.has_live_checkout_session():
+                            return existing_payment, session.url
+                except stripe.error.StripeError:
+                    # If session expired or invalid, create new one
+                    pass
 
         # Create line items for Stripe
         line_items = []
-        for item in order.items.all():
+        for item in order.items.select_related("product", "variant"):
             line_items.append(
                 {
                     "price_data": {
@@ -77,9 +102,21 @@ class PaymentService:
                 }
             )
 
+        # Key the request on the session it replaces, so a retried or
+        # repeated request gets the same session back from Stripe
+        previous_session_id = (
+            Payment.objects.filter(order=order)
+            .values_list("stripe_checkout_session_id", flat=True)
+            .first()
+        )
+        idempotency_key = stripe_client.idempotency_key(
+            order, "checkout-session", previous_session_id or ""
+        )
+
         try:
             # Create Stripe Checkout Session
-            checkout_session = stripe.checkout.Session.create(
+            checkout_session = stripe_client.create_checkout_session(
+                idempotency_key,
                 payment_method_types=["card"],
                 line_items=line_items,
                 mode="payment",
@@ -100,6 +137,10 @@ class PaymentService:
                     defaults={
                         "stripe_payment_intent_id": checkout_session.payment_intent or "",
                         "stripe_checkout_session_id": checkout_session.id,
+                        "checkout_url": checkout_session.url,
+                        "checkout_expires_at": PaymentService.get_session_expiry(
+                            checkout_session
+                        ),
                         "amount": order.total,
                         "currency": "USD",
                         "status": "pending",
@@ -116,39 +157,59 @@ class PaymentService:
             logger.error(f"Stripe error creating checkout session: {str(e)}")
             raise ValidationError(f"Payment service error: {str(e)}")
 
+    @staticmethod
+    def get_session_expiry(session):
+        """Return a checkout session's expiry as an aware datetime, if known."""
+        expires_at = session.get("expires_at")
+        if not expires_at:
+            return None
+        return datetime.fromtimestamp(expires_at, tz=dt_timezone.utc)
+
+    @staticmethod
+    def store_checkout_session(payment, session):
+        """Remember a session's URL and expiry on its payment."""
+        payment.checkout_url = session.url or ""
+        payment.checkout_expires_at = PaymentService.get_session_expiry(session)
+        payment.save(update_fields=["checkout_url", "checkout_expires_at", "updated_at"])
+
     @staticmethod
     def handle_checkout_session_completed(session):
-        """Handle successful checkout session completion."""
-        try:
-            order_id = session.metadata.get("order_id")
-            payment_intent_id = session.payment_intent
+        """
+        Handle successful checkout session completion.
+        Raises if the order or payment is missing so the event can be retried;
+        an already succeeded payment is left untouched.
+        """
+        order_id = session.metadata.get("order_id")
+        payment_intent_id = session.payment_intent
 
-            if not order_id:
-                logger.error("No order_id in session metadata")
-                return
+        if not order_id:
+            logger.error(f"No order_id in metadata of session {session.id}")
+            return
 
-            with transaction.atomic():
+        with transaction.atomic():
+            try:
                 order = Order.objects.select_for_update().get(id=order_id)
                 payment = Payment.objects.select_for_update().get(order=order)
+            except Order.DoesNotExist:
+                raise NotFoundError(f"Order not found for session {session.id}")
+            except Payment.DoesNotExist:
+                raise NotFoundError(f"Payment not found for order {order_id}")
 
-                # Update payment
-                payment.stripe_payment_intent_id = payment_intent_id
-                payment.status = "succeeded"
-                payment.save(update_fields=["stripe_payment_intent_id", "status"])
+            if payment.status == "succeeded":
+                logger.info(f"Payment for order {order.order_number} already succeeded")
+                return
 
-                # Update order
-                order.payment_status = "paid"
-                order.status = "processing"
-                order.save(update_fields=["payment_status", "status"])
+            # Update payment
+            payment.stripe_payment_intent_id = payment_intent_id
+            payment.status = "succeeded"
+            payment.save(update_fields=["stripe_payment_intent_id", "status"])
 
-            logger.info(f"Payment succeeded for order {order.order_number}")
+            # Update order
+            order.payment_status = "paid"
+            order.status = "processing"
+            order.save(update_fields=["payment_status", "status"])
 
-        except Order.DoesNotExist:
-            logger.error(f"Order not found for session {session.id}")
-        except Payment.DoesNotExist:
-            logger.error(f"Payment not found for order {order_id}")
-        except Exception as e:
-            logger.error(f"Error handling checkout session: {str(e)}")
+        logger.info(f"Payment succeeded for order {order.order_number}")
 
     @staticmethod
     def handle_payment_intent_failed(payment_intent):
@@ -197,3 +258,104 @@ class PaymentService:
         except stripe.error.SignatureVerificationError:
             logger.error("Invalid webhook signature")
             raise ValidationError("Invalid signature")
+
+
+    @staticmethod
+    def record_webhook_event(event):
+        """
+        Persist a verified webhook event and queue it for processing.
+        Returns (stripe_event, created). Redelivered events are already
+        stored, so they are neither stored nor queued again.
+        """
+        stripe_event, created = StripeEvent.objects.get_or_create(
+            stripe_event_id=event["id"],
+            defaults={
+                "event_type": event["type"],
+                "payload": event.to_dict_recursive(),
+            },
+        )
+        if created:
+            transaction.on_commit(
+                partial(PaymentService.dispatch_webhook_event, stripe_event.pk)
+            )
+        else:
+            logger.info(f"Ignoring duplicate webhook event {event['id']}")
+        return stripe_event, created
+
+    @staticmethod
+    def dispatch_webhook_event(stripe_event_id):
+        """
+        Hand a stored event to Celery, or process it in-process when
+        STRIPE_WEBHOOK_EAGER is set (tests, development without a broker).
+        """
+        if getattr(settings, "STRIPE_WEBHOOK_EAGER", False):
+            try:
+                PaymentService.process_webhook_event(stripe_event_id)
+            except Exception:
+                # The failure is also recorded on the event
+                logger.exception(
+                    f"Webhook event {stripe_event_id} failed; "
+                    f"replay it with replay_stripe_events"
+                )
+            return
+
+        from .tasks import process_stripe_event
+
+        try:
+            process_stripe_event.delay(stripe_event_id)
+        except Exception:
+            logger.exception(
+                f"Could not queue webhook event {stripe_event_id}; "
+                f"replay it with replay_stripe_events"
+            )
+
+    @staticmethod
+    def process_webhook_event(stripe_event_id):
+        """
+        Run the handler for a stored event exactly once.
+        Returns False if the event was already processed. A failing handler
+        rolls back its changes, marks the event failed and re-raises.
+        """
+        try:
+            with transaction.atomic():
+                stripe_event = StripeEvent.objects.select_for_update().get(
+                    pk=stripe_event_id
+                )
+                if stripe_event.status == StripeEvent.STATUS_PROCESSED:
+                    return False
+
+                event = stripe.Event.construct_from(stripe_event.payload, stripe.api_key)
+                PaymentService.handle_webhook_event(event)
+
+                stripe_event.status = StripeEvent.STATUS_PROCESSED
+                stripe_event.processed_at = timezone.now()
+                stripe_event.last_error = ""
+                stripe_event.save(
+                    update_fields=["status", "processed_at", "last_error", "updated_at"]
+                )
+        except Exception as e:
+            StripeEvent.objects.filter(pk=stripe_event_id).update(
+                status=StripeEvent.STATUS_FAILED,
+                attempts=F("attempts") + 1,
+                last_error=str(e),
+                updated_at=timezone.now(),
+            )
+            logger.error(f"Error processing webhook event {stripe_event_id}: {str(e)}")
+            raise
+
+        return True
+
+    @staticmethod
+    def handle_webhook_event(event):
+        """Route a webhook event to its handler."""
+        event_type = event["type"]
+        event_data = event["data"]["object"]
+
+        if event_type == "checkout.session.completed":
+            PaymentService.handle_checkout_session_completed(event_data)
+        elif event_type == "payment_intent.succeeded":
+            logger.info(f"Payment intent succeeded: {event_data.get('id')}")
+        elif event_type == "payment_intent.payment_failed":
+            PaymentService.handle_payment_intent_failed(event_data)
+        else:
+            logger.info(f"Unhandled event type: {event_type}")
@@ -0,0 +1,222 @@
+"""
+File: backend/apps/payment/stripe_client.py
+Purpose: Stripe API access with pooled connections, timeouts and a circuit breaker
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from functools import lru_cache
+import requests
+import stripe
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from apps.core.exceptions import ServiceUnavailableError
+
+logger = logging.getLogger(__name__)
+
+# Errors that mean Stripe itself is unreachable or unhealthy, as opposed
+# to errors about the request (invalid parameters, declined cards)
+UNAVAILABLE_ERRORS = (
+    stripe.error.APIConnectionError,
+    stripe.error.APIError,
+    stripe.error.RateLimitError,
+)
+
+
+class CircuitBreaker:
+    """
+    In-process circuit breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    calls fail immediately for `reset_timeout` seconds. The first call
+    after that is let through as a trial: success closes the circuit,
+    failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def before_call(self):
+        """Raise ServiceUnavailableError if calls are currently blocked."""
+        with self.lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.reset_timeout or self.trial_in_flight:
+                raise ServiceUnavailableError("Payment service is temporarily unavailable")
+            self.trial_in_flight = True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.error("Stripe circuit breaker opened")
+                self.opened_at = time.monotonic()
+
+
+class StripeMetrics:
+    """Per-operation call counts, error counts and latency for Stripe calls."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.operations = {}
+
+    def record(self, operation, duration_ms, error=False):
+        with self.lock:
+            stats = self.operations.setdefault(
+                operation,
+                {"calls": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0},
+            )
+            stats["calls"] += 1
+            stats["errors"] += int(error)
+            stats["total_ms"] += duration_ms
+            stats["max_ms"] = max(stats["max_ms"], duration_ms)
+
+    def snapshot(self):
+        """Return a copy of the metrics with the average latency added."""
+        with self.lock:
+            return {
+                operation: {
+                    **stats,
+                    "avg_ms": stats["total_ms"] / stats["calls"] if stats["calls"] else 0.0,
+                }
+                for operation, stats in self.operations.items()
+            }
+
+
+class StripeClient:
+    """
+    Wrapper around the `stripe` module used for every Stripe API call.
+
+    Configures the library with a keep-alive connection pool, strict
+    connect/read timeouts and a bounded number of network retries (the
+    library retries connection errors, 409s and 5xx responses, reusing
+    the idempotency key). Each call goes through a circuit breaker and
+    is timed per operation.
+    """
+
+    def __init__(
+        self,
+        api_key=None,
+        api_base=None,
+        connect_timeout=None,
+        read_timeout=None,
+        max_retries=None,
+        pool_size=None,
+        breaker=None,
+    ):
+        self.api_key = api_key if api_key is not None else settings.STRIPE_SECRET_KEY
+        self.api_base = api_base or getattr(settings, "STRIPE_API_BASE", stripe.api_base)
+        self.max_retries = (
+            max_retries
+            if max_retries is not None
+            else getattr(settings, "STRIPE_MAX_NETWORK_RETRIES", 2)
+        )
+        self.timeout = (
+            connect_timeout or getattr(settings, "STRIPE_CONNECT_TIMEOUT", 3),
+            read_timeout or getattr(settings, "STRIPE_READ_TIMEOUT", 10),
+        )
+        pool_size = pool_size or getattr(settings, "STRIPE_POOL_SIZE", 10)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.http_client = stripe.http_client.RequestsClient(
+            timeout=self.timeout, session=self.session
+        )
+        self.breaker = breaker or CircuitBreaker(
+            failure_threshold=getattr(settings, "STRIPE_CIRCUIT_FAILURE_THRESHOLD", 5),
+            reset_timeout=getattr(settings, "STRIPE_CIRCUIT_RESET_TIMEOUT", 30),
+        )
+        self.metrics = StripeMetrics()
+
+    def configure(self):
+        """Point the stripe module at this client's settings."""
+        stripe.api_key = self.api_key
+        stripe.api_base = self.api_base
+        stripe.default_http_client = self.http_client
+        stripe.max_network_retries = self.max_retries
+
+    @staticmethod
+    def idempotency_key(order, operation, *parts):
+        """
+        Derive a stable idempotency key for an operation on an order.
+        Repeating the operation with the same parts replays Stripe's
+        original response instead of performing it twice.
+        """
+        raw = ":".join([operation, order.order_number, *map(str, parts)])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def call(self, operation, func, *args, **kwargs):
+        """
+        Run a stripe library call through the breaker and metrics.
+        Unavailability errors count against the breaker and surface as
+        ServiceUnavailableError; other Stripe errors are re-raised as is.
+        Any other exception also counts as a failure, which ends a
+        half-open trial instead of leaving the breaker waiting on it.
+        """
+        self.breaker.before_call()
+        self.configure()
+        start = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except UNAVAILABLE_ERRORS as e:
+            duration_ms = (time.monotonic() - start) * 1000
+            self.metrics.record(operation, duration_ms, error=True)
+            self.breaker.record_failure()
+            logger.error(f"Stripe {operation} failed after {duration_ms:.0f}ms: {str(e)}")
+            raise ServiceUnavailableError("Payment service is temporarily unavailable")
+        except stripe.error.StripeError:
+            self.metrics.record(operation, (time.monotonic() - start) * 1000, error=True)
+            self.breaker.record_success()
+            raise
+        except Exception:
+            self.metrics.record(operation, (time.monotonic() - start) * 1000, error=True)
+            self.breaker.record_failure()
+            raise
+
+        duration_ms = (time.monotonic() - start) * 1000
+        self.metrics.record(operation, duration_ms)
+        self.breaker.record_success()
+        logger.debug(f"Stripe {operation} took {duration_ms:.0f}ms")
+        return result
+
+    def create_checkout_session(self, idempotency_key, **params):
+        return self.call(
+            "checkout.session.create",
+            stripe.checkout.Session.create,
+            idempotency_key=idempotency_key,
+            **params,
+        )
+
+    def retrieve_checkout_session(self, session_id):
+        return self.call(
+            "checkout.session.retrieve",
+            stripe.checkout.Session.retrieve,
+            session_id,
+        )
+
+
+@lru_cache(maxsize=None)
+def get_stripe_client():
+    """Return the process-wide Stripe client."""
+    return StripeClient()
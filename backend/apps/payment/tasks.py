@@ -0,0 +1,19 @@
+"""
+File: backend/apps/payment/tasks.py
+Purpose: Celery tasks for Stripe webhook processing
+"""
+
+from celery import shared_task
+from .services import PaymentService
+
+
+@shared_task(
+    autoretry_for=(Exception,),
+    retry_backoff=True,
+    retry_backoff_max=600,
+    retry_jitter=True,
+    max_retries=5,
+)
+def process_stripe_event(stripe_event_id):
+    """Process a stored Stripe webhook event, retrying failures with backoff."""
+    return PaymentService.process_webhook_event(stripe_event_id)
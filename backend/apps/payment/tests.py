@@ -1,3 +1,355 @@
-from django.test import TestCase
+import hashlib
+import hmac
+import json
+import threading
+import time
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from apps.authentication.models import User
+from apps.core.exceptions import ServiceUnavailableError
+from apps.orders.models import Order
+from .models import Payment, StripeEvent
+from .services import PaymentService
+from .stripe_client import CircuitBreaker, StripeClient
 
-# Create your tests here.
+WEBHOOK_SECRET = "whsec_test"
+
+
+def sign_payload(payload, secret=WEBHOOK_SECRET, timestamp=None):
+    """Build a Stripe-Signature header the way Stripe signs webhooks."""
+    timestamp = timestamp or int(time.time())
+    signed = f"{timestamp}.{payload}".encode()
+    signature = hmac.new(secret.encode(), signed, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+def create_order(order_number="ORD-1"):
+    user = User.objects.create_user(
+        email=f"{order_number.lower()}@example.com",
+        password="x-Passw0rd",
+        first_name="Jane",
+        last_name="Doe",
+    )
+    return Order.objects.create(
+        user=user,
+        order_number=order_number,
+        shipping_first_name="Jane",
+        shipping_last_name="Doe",
+        shipping_email="payer@example.com",
+        shipping_phone="+15550000000",
+        shipping_address="1 Main St",
+        shipping_city="Springfield",
+        shipping_state="IL",
+        shipping_postal_code="62701",
+        shipping_country="US",
+        subtotal=Decimal("20.00"),
+        total=Decimal("20.00"),
+    )
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False,
+    STRIPE_WEBHOOK_SECRET=WEBHOOK_SECRET,
+    STRIPE_WEBHOOK_EAGER=True,
+)
+class StripeWebhookTests(TestCase):
+    """Tests for storing and processing Stripe webhook events."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.order = create_order()
+        cls.payment = Payment.objects.create(
+            order=cls.order,
+            stripe_payment_intent_id="",
+            stripe_checkout_session_id="cs_test_1",
+            amount=Decimal("20.00"),
+        )
+
+    def build_event(self, event_id="evt_1"):
+        return {
+            "id": event_id,
+            "object": "event",
+            "type": "checkout.session.completed",
+            "data": {
+                "object": {
+                    "id": "cs_test_1",
+                    "object": "checkout.session",
+                    "payment_intent": "pi_test_1",
+                    "metadata": {"order_id": str(self.order.pk)},
+                }
+            },
+        }
+
+    def post_event(self, event, signature=None):
+        payload = json.dumps(event)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                reverse("payment:stripe-webhook"),
+                payload,
+                content_type="application/json",
+                HTTP_STRIPE_SIGNATURE=signature or sign_payload(payload),
+            )
+
+    def test_event_is_stored_and_processed(self):
+        response = self.post_event(self.build_event())
+
+        self.assertEqual(response.status_code, 200)
+        event = StripeEvent.objects.get()
+        self.assertEqual(event.status, StripeEvent.STATUS_PROCESSED)
+        self.payment.refresh_from_db()
+        self.order.refresh_from_db()
+        self.assertEqual(self.payment.status, "succeeded")
+        self.assertEqual(self.payment.stripe_payment_intent_id, "pi_test_1")
+        self.assertEqual(self.order.payment_status, "paid")
+
+    def test_duplicate_event_is_a_no_op(self):
+        self.post_event(self.build_event())
+        with mock.patch.object(
+            PaymentService, "handle_checkout_session_completed"
+        ) as handler:
+            response = self.post_event(self.build_event())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(StripeEvent.objects.count(), 1)
+        handler.assert_not_called()
+
+    def test_invalid_signature_is_rejected(self):
+        response = self.post_event(
+            self.build_event(), signature=sign_payload("{}", secret="whsec_other")
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(StripeEvent.objects.exists())
+
+    def test_failed_event_can_be_replayed(self):
+        with mock.patch.object(
+            PaymentService,
+            "handle_checkout_session_completed",
+            side_effect=RuntimeError("database unavailable"),
+        ):
+            response = self.post_event(self.build_event())
+
+        self.assertEqual(response.status_code, 200)
+        event = StripeEvent.objects.get()
+        self.assertEqual(event.status, StripeEvent.STATUS_FAILED)
+        self.assertEqual(event.attempts, 1)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, "pending")
+
+        call_command("replay_stripe_events", stdout=mock.MagicMock())
+
+        event.refresh_from_db()
+        self.payment.refresh_from_db()
+        self.assertEqual(event.status, StripeEvent.STATUS_PROCESSED)
+        self.assertEqual(self.payment.status, "succeeded")
+
+
+class FakeStripeHandler(BaseHTTPRequestHandler):
+    """Minimal Stripe API stand-in answering checkout session requests."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.respond()
+
+    def do_GET(self):
+        self.respond()
+
+    def respond(self):
+        server = self.server
+        server.requests.append(
+            {
+                "path": self.path,
+                "idempotency_key": self.headers.get("Idempotency-Key"),
+                "client_port": self.client_address[1],
+            }
+        )
+        if server.delay:
+            time.sleep(server.delay)
+        session_id = f"cs_test_{len(server.requests)}"
+        body = json.dumps(
+            {
+                "id": session_id,
+                "object": "checkout.session",
+                "url": f"https://checkout.stripe.test/{session_id}",
+                "payment_intent": None,
+                "payment_status": "unpaid",
+                "status": "open",
+                "expires_at": int(time.time()) + server.expires_in,
+            }
+        ).encode()
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except OSError:
+            pass  # The client gave up (read timeout)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeStripeMixin:
+    """Runs a fake Stripe server for the duration of each test."""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeStripeHandler)
+        self.server.requests = []
+        self.server.delay = 0
+        self.server.expires_in = 60 * 60 * 24
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.api_base = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def build_client(self, **kwargs):
+        options = {"api_key": "sk_test_fake", "api_base": self.api_base, "max_retries": 0}
+        options.update(kwargs)
+        return StripeClient(**options)
+
+    def use_client(self, client):
+        patcher = mock.patch("apps.payment.services.get_stripe_client", return_value=client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class StripeClientTests(FakeStripeMixin, TestCase):
+    """Tests for the Stripe client against a local fake Stripe server."""
+
+    def test_calls_reuse_connection_and_send_idempotency_key(self):
+        client = self.build_client()
+
+        first = client.create_checkout_session("key-1", mode="payment")
+        client.create_checkout_session("key-1", mode="payment")
+
+        self.assertEqual(first.id, "cs_test_1")
+        ports = {request["client_port"] for request in self.server.requests}
+        keys = {request["idempotency_key"] for request in self.server.requests}
+        self.assertEqual(len(ports), 1)
+        self.assertEqual(keys, {"key-1"})
+        self.assertEqual(client.metrics.snapshot()["checkout.session.create"]["calls"], 2)
+
+    def test_timeouts_open_the_circuit(self):
+        self.server.delay = 1
+        client = self.build_client(
+            read_timeout=0.1, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        )
+
+        for _ in range(2):
+            with self.assertRaises(ServiceUnavailableError):
+                client.retrieve_checkout_session("cs_test_1")
+        start = time.monotonic()
+        with self.assertRaises(ServiceUnavailableError):
+            client.retrieve_checkout_session("cs_test_1")
+
+        self.assertLess(time.monotonic() - start, 0.05)
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertTrue(client.breaker.is_open)
+        self.assertEqual(client.metrics.snapshot()["checkout.session.retrieve"]["errors"], 2)
+
+    def test_circuit_closes_after_successful_trial(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        self.assertTrue(breaker.is_open)
+
+        breaker.before_call()
+        breaker.record_success()
+
+        self.assertFalse(breaker.is_open)
+
+    def test_unexpected_error_ends_the_trial(self):
+        client = self.build_client(breaker=CircuitBreaker(failure_threshold=1, reset_timeout=0))
+        client.breaker.record_failure()
+
+        def broken(*args, **kwargs):
+            raise TypeError("bad params")
+
+        with self.assertRaises(TypeError):
+            client.call("broken", broken)
+
+        self.assertFalse(client.breaker.trial_in_flight)
+        self.assertEqual(client.retrieve_checkout_session("cs_test_1").id, "cs_test_1")
+        self.assertFalse(client.breaker.is_open)
+
+    @override_settings(FRONTEND_URL="http://localhost:5173")
+    def test_checkout_session_key_is_derived_from_order(self):
+        order = create_order("ORD-2")
+        self.use_client(self.build_client())
+
+        payment, url = PaymentService.create_checkout_session(order.pk, order.user)
+
+        self.assertEqual(payment.stripe_checkout_session_id, "cs_test_1")
+        self.assertEqual(url, "https://checkout.stripe.test/cs_test_1")
+        self.assertEqual(
+            self.server.requests[0]["idempotency_key"],
+            StripeClient.idempotency_key(order, "checkout-session", ""),
+        )
+
+
+@override_settings(FRONTEND_URL="http://localhost:5173")
+class CheckoutSessionReuseTests(FakeStripeMixin, TestCase):
+    """Live checkout sessions are reused without calling Stripe."""
+
+    def setUp(self):
+        super().setUp()
+        self.use_client(self.build_client())
+        self.order = create_order("ORD-3")
+
+    def test_live_session_is_reused_without_stripe(self):
+        payment, url = PaymentService.create_checkout_session(self.order.pk, self.order.user)
+        again, again_url = PaymentService.create_checkout_session(
+            self.order.pk, self.order.user
+        )
+
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(again.pk, payment.pk)
+        self.assertEqual(again_url, url)
+        self.assertIsNotNone(payment.checkout_expires_at)
+
+    def test_expired_session_is_replaced(self):
+        self.server.expires_in = 60
+        PaymentService.create_checkout_session(self.order.pk, self.order.user)
+        payment, url = PaymentService.create_checkout_session(self.order.pk, self.order.user)
+
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(payment.stripe_checkout_session_id, "cs_test_2")
+        self.assertEqual(
+            self.server.requests[1]["idempotency_key"],
+            StripeClient.idempotency_key(self.order, "checkout-session", "cs_test_1"),
+        )
+
+
+@override_settings(FRONTEND_URL="http://localhost:5173")
+class ConcurrentCheckoutSessionTests(FakeStripeMixin, TransactionTestCase):
+    """Concurrent checkout requests for one order create a single session."""
+
+    def test_concurrent_requests_create_one_session(self):
+        self.use_client(self.build_client())
+        self.server.delay = 0.2
+        order = create_order("ORD-4")
+        results = []
+
+        def checkout():
+            try:
+                results.append(PaymentService.create_checkout_session(order.pk, order.user)[1])
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=checkout) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(set(results), {"https://checkout.stripe.test/cs_test_1"})
+        self.assertEqual(Payment.objects.count(), 1)
@@ -1,5 +1,10 @@
 from django.urls import path
-from .views import CreateCheckoutSessionView, PaymentDetailView, StripeWebhookView
+from .views import (
+    CreateCheckoutSessionView,
+    PaymentDetailView,
+    StripeMetricsView,
+    StripeWebhookView,
+)
 
 app_name = "payment"
 
@@ -15,4 +20,5 @@ urlpatterns = [
         name="payment-detail",
     ),
     path("webhook/", StripeWebhookView.as_view(), name="stripe-webhook"),
+    path("stripe-metrics/", StripeMetricsView.as_view(), name="stripe-metrics"),
 ]
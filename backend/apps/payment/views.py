@@ -1,13 +1,14 @@
 import logging
 from rest_framework import status
 from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.http import HttpResponse
 from apps.core.responses import success_response, error_response, created_response
 from .serializers import PaymentSerializer, CreateCheckoutSessionSerializer
 from .services import PaymentService
+from .stripe_client import get_stripe_client
 
 logger = logging.getLogger(__name__)
 
@@ -57,6 +58,23 @@ class PaymentDetailView(APIView):
         )
 
 
+class StripeMetricsView(APIView):
+    """API view exposing Stripe call latency and circuit breaker state."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """Get per-operation Stripe call metrics."""
+        stripe_client = get_stripe_client()
+        return success_response(
+            data={
+                "operations": stripe_client.metrics.snapshot(),
+                "circuit_open": stripe_client.breaker.is_open,
+            },
+            message="Stripe metrics retrieved successfully",
+        )
+
+
 @method_decorator(csrf_exempt, name="dispatch")
 class StripeWebhookView(APIView):
     """API view for handling Stripe webhooks."""
@@ -78,19 +96,9 @@ class StripeWebhookView(APIView):
             logger.error(f"Webhook verification failed: {str(e)}")
             return HttpResponse(status=400)
 
-        # Handle the event
-        event_type = event["type"]
-        event_data = event["data"]["object"]
-
-        logger.info(f"Received webhook event: {event_type}")
+        # Store the event and acknowledge; processing happens in a worker
+        PaymentService.record_webhook_event(event)
 
-        if event_type == "checkout.session.completed":
-            PaymentService.handle_checkout_session_completed(event_data)
-        elif event_type == "payment_intent.succeeded":
-            logger.info(f"Payment intent succeeded: {event_data.get('id')}")
-        elif event_type == "payment_intent.payment_failed":
-            PaymentService.handle_payment_intent_failed(event_data)
-        else:
-            logger.info(f"Unhandled event type: {event_type}")
+        logger.info(f"Received webhook event: {event['type']} ({event['id']})")
 
         return HttpResponse(status=200)
@@ -9,4 +9,5 @@ class ProductsConfig(AppConfig):
     verbose_name = "Products"
 
     def ready(self):
+        import apps.products.checks
         import apps.products.signals
\ No newline at end of file
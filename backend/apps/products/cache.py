@@ -0,0 +1,166 @@
+"""
+File: backend/apps/products/cache.py
+Purpose: Versioned cache for serialized product payloads
+"""
+
+import hashlib
+import time
+from functools import partial
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+class ProductCache:
+    """
+    Namespaced, version-keyed cache for serialized catalog payloads.
+
+    Entries are never deleted on writes; instead the version numbers
+    embedded in their keys are bumped, so stale entries simply stop
+    being addressed and expire on their own:
+
+    - ``catalog`` changes on any product, variant, image or category
+      write and keys every list payload.
+    - ``category`` changes on category writes and keys every detail
+      payload, since details embed their category.
+    - ``product:<id>`` changes on writes to that product, its variants
+      or its images and keys that product's detail payload.
+
+    Versions only reach every worker through a shared cache; the
+    products.W002 deploy check flags a process-local one.
+    """
+
+    key_prefix = "product_cache"
+
+    @staticmethod
+    def get_timeout():
+        return getattr(settings, "PRODUCT_CACHE_TIMEOUT", 60 * 10)
+
+    @staticmethod
+    def make_key(*parts):
+        return ":".join([ProductCache.key_prefix, *map(str, parts)])
+
+    @staticmethod
+    def get_versions(*names):
+        """
+        Return current versions for the given names.
+        Missing versions are seeded from the clock so that an evicted
+        version key can never roll back to a previously used number.
+        """
+        keys = {ProductCache.make_key("version", name): name for name in names}
+        versions = cache.get_many(list(keys))
+        missing = {key: int(time.time() * 1000) for key in keys if key not in versions}
+        for key, value in missing.items():
+            cache.add(key, value, None)
+            versions[key] = cache.get(key, value)
+        return [versions[key] for key in keys]
+
+    @staticmethod
+    def bump(*names):
+        """Advance the given versions, orphaning every entry keyed by them."""
+        for name in names:
+            key = ProductCache.make_key("version", name)
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, int(time.time() * 1000), None)
+
+    @staticmethod
+    def invalidate(*names):
+        """
+        Bump versions now and again once the transaction commits, so a
+        payload built from pre-commit data during the write is orphaned too.
+        """
+        ProductCache.bump(*names)
+        transaction.on_commit(partial(ProductCache.bump, *names))
+
+    @staticmethod
+    def invalidate_products(product_ids):
+        """Invalidate detail payloads of the given products and every list."""
+        ProductCache.invalidate("catalog", *[f"product:{pk}" for pk in set(product_ids)])
+
+    @staticmethod
+    def invalidate_categories():
+        """Invalidate every detail and list payload."""
+        ProductCache.invalidate("catalog", "category")
+
+    @staticmethod
+    def record(namespace, outcome):
+        key = ProductCache.make_key("stats", namespace, outcome)
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            pass
+
+    @staticmethod
+    def get(namespace, key):
+        """Fetch an entry, recording a hit or miss for the namespace."""
+        data = cache.get(key)
+        ProductCache.record(namespace, "hit" if data is not None else "miss")
+        return data
+
+    @staticmethod
+    def set(key, data):
+        cache.set(key, data, ProductCache.get_timeout())
+
+    @staticmethod
+    def list_key(namespace, request, exclude=()):
+        """
+        Key for a list payload: the catalog version plus every query
+        parameter not in exclude, the host and the scheme (payloads hold
+        absolute URLs).
+        """
+        (version,) = ProductCache.get_versions("catalog")
+        params = sorted(
+            (name, value)
+            for name, values in request.query_params.lists()
+            if name not in exclude
+            for value in values
+        )
+        signature = repr((request.scheme, request.get_host(), params))
+        digest = hashlib.md5(signature.encode()).hexdigest()
+        return ProductCache.make_key(namespace, version, digest)
+
+    @staticmethod
+    def get_detail(slug, request):
+        """
+        Return (product_id, payload) for a slug.
+        The payload is None on a miss; the id is None if the slug is unknown.
+        """
+        product_id = cache.get(ProductCache.make_key("slug", slug))
+        if product_id is None:
+            ProductCache.record("detail", "miss")
+            return None, None
+        cache_key = ProductCache.detail_key(product_id, request)
+        return product_id, ProductCache.get("detail", cache_key)
+
+    @staticmethod
+    def set_product_id(slug, product_id):
+        cache.set(ProductCache.make_key("slug", slug), product_id, None)
+
+    @staticmethod
+    def detail_key(product_id, request):
+        """Key for a product detail payload."""
+        category_version, product_version = ProductCache.get_versions(
+            "category", f"product:{product_id}"
+        )
+        host = hashlib.md5(f"{request.scheme}://{request.get_host()}".encode()).hexdigest()
+        return ProductCache.make_key(
+            "detail", category_version, product_id, product_version, host
+        )
+
+    @staticmethod
+    def get_stats():
+        """Return hit/miss counters per namespace."""
+        namespaces = ["list", "featured", "categories", "category-tree", "detail", "facets"]
+        keys = {
+            ProductCache.make_key("stats", namespace, outcome): (namespace, outcome)
+            for namespace in namespaces
+            for outcome in ("hit", "miss")
+        }
+        values = cache.get_many(list(keys))
+        stats = {namespace: {"hit": 0, "miss": 0} for namespace in namespaces}
+        for key, (namespace, outcome) in keys.items():
+            stats[namespace][outcome] = values.get(key, 0)
+        return stats
@@ -0,0 +1,44 @@
+"""
+File: backend/apps/products/checks.py
+Purpose: System checks for product settings
+"""
+
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+from apps.core.cache import is_process_local_cache, is_shared_cache
+
+
+@register(Tags.caches)
+def check_buffered_views_cache(app_configs=None, **kwargs):
+    """Warn when buffered views are kept where the flush task cannot see them."""
+    # The flush runs in the Celery worker, so a single web process is not enough
+    if getattr(settings, "PRODUCT_VIEWS_BUFFERED", False) and is_process_local_cache():
+        return [
+            Warning(
+                "PRODUCT_VIEWS_BUFFERED is on but the default cache is not shared between processes.",
+                hint=(
+                    "Views buffered by web workers are lost before the Celery worker "
+                    "flushes them. Use a shared cache such as Redis, or turn buffering off."
+                ),
+                id="products.W001",
+            )
+        ]
+    return []
+
+
+@register(Tags.caches, deploy=True)
+def check_payload_cache(app_configs=None, **kwargs):
+    """Warn when catalog cache invalidations cannot reach other workers."""
+    if is_shared_cache():
+        return []
+    return [
+        Warning(
+            "Cached catalog payloads are kept in a cache that is not shared between processes.",
+            hint=(
+                "Version bumps made by one worker do not reach the others, which keep "
+                "serving stale prices and stock for PRODUCT_CACHE_TIMEOUT seconds. Use a "
+                "shared cache such as Redis."
+            ),
+            id="products.W002",
+        )
+    ]
@@ -0,0 +1,173 @@
+"""
+File: backend/apps/products/facets.py
+Purpose: Facet counts for the product listing under the current filters
+"""
+
+from django.conf import settings
+from django.db.models import Count, Q
+from django_filters.utils import translate_validation
+from rest_framework.settings import api_settings
+from .cache import ProductCache
+from .filters import ProductFilter
+from .models import Category, Product
+from .search import get_search_backend
+from .services import ProductService
+
+
+class ProductFacets:
+    """
+    Counts of products per facet value for the product listing.
+
+    Each facet is counted under every current filter except its own, so
+    selecting "men" still shows how many products the other genders
+    have. All facets take a fixed number of aggregate queries regardless
+    of how many values exist: gender, brand, category (plus one query
+    for category names, counts rolled up to ancestors), price buckets,
+    and stock together with the total.
+    """
+
+    # Query parameters that do not change which products match
+    ignored_params = {
+        "page",
+        "page_size",
+        "cursor",
+        "count",
+        "pagination",
+        "facets",
+        api_settings.ORDERING_PARAM,
+    }
+    search_param = api_settings.SEARCH_PARAM
+
+    @staticmethod
+    def get_price_buckets():
+        """Upper bounds of the price buckets; the last bucket is open-ended."""
+        return getattr(settings, "PRODUCT_FACET_PRICE_BUCKETS", [25, 50, 100, 200])
+
+    @staticmethod
+    def get_queryset(params, without=()):
+        """
+        Products matching params, ignoring the filters named in without.
+        Starts from the listing queryset, so the soft-delete and is_active
+        rules are the same as for the list itself.
+        """
+        data = params.copy()
+        for name in without:
+            data.pop(name, None)
+
+        queryset = ProductService.get_products_queryset().prefetch_related(None)
+        filterset = ProductFilter(data, queryset=queryset)
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        queryset = filterset.qs
+
+        query = data.get(ProductFacets.search_param, "").strip()
+        if query:
+            queryset = get_search_backend().search(queryset, query)
+        return queryset.order_by()
+
+    @staticmethod
+    def count_by(queryset, field):
+        """Return {value: product count} for a field in one GROUP BY query."""
+        rows = queryset.values(field).annotate(total=Count("id", distinct=True))
+        return {row[field]: row["total"] for row in rows}
+
+    @staticmethod
+    def get_gender_counts(params):
+        counts = ProductFacets.count_by(ProductFacets.get_queryset(params, ["gender"]), "gender")
+        return [
+            {"value": value, "label": str(label), "count": counts.get(value, 0)}
+            for value, label in Product.GENDER_CHOICES
+        ]
+
+    @staticmethod
+    def get_brand_counts(params):
+        counts = ProductFacets.count_by(ProductFacets.get_queryset(params, ["brand"]), "brand")
+        return [
+            {"value": brand, "count": count}
+            for brand, count in sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+            if brand
+        ]
+
+    @staticmethod
+    def get_category_counts(params):
+        """
+        Product counts per category, including descendants (matching the
+        subtree semantics of the category filter).
+        """
+        direct = ProductFacets.count_by(
+            ProductFacets.get_queryset(params, ["category"]), "category__path"
+        )
+        totals = {}
+        for path, count in direct.items():
+            for part in path.split("/")[:-1]:
+                category_id = int(part)
+                totals[category_id] = totals.get(category_id, 0) + count
+
+        categories = Category.objects.filter(is_active=True, pk__in=totals).order_by("path")
+        return [
+            {
+                "value": category.slug,
+                "label": category.name,
+                "parent": category.parent_id,
+                "id": category.id,
+                "count": totals[category.id],
+            }
+            for category in categories
+        ]
+
+    @staticmethod
+    def get_price_counts(params):
+        queryset = ProductFacets.get_queryset(params, ["min_price", "max_price"])
+        bounds = [None, *ProductFacets.get_price_buckets(), None]
+        buckets = []
+        aggregates = {}
+        for index, (low, high) in enumerate(zip(bounds, bounds[1:])):
+            condition = Q()
+            if low is not None:
+                condition &= Q(price__gte=low)
+            if high is not None:
+                condition &= Q(price__lt=high)
+            aggregates[f"bucket_{index}"] = Count("id", distinct=True, filter=condition)
+            buckets.append({"min": low, "max": high})
+
+        counts = queryset.aggregate(**aggregates)
+        for index, bucket in enumerate(buckets):
+            bucket["count"] = counts[f"bucket_{index}"]
+        return buckets
+
+    @staticmethod
+    def get_stock_counts(params):
+        """Return (in_stock, total): in-stock count and the listing's total."""
+        counts = ProductFacets.get_queryset(params, ["in_stock"]).aggregate(
+            all=Count("id", distinct=True),
+            in_stock=Count("id", distinct=True, filter=Q(has_stock=True)),
+        )
+        filterset = ProductFilter(params, queryset=Product.objects.none())
+        filterset.is_valid()
+        in_stock_only = filterset.form.cleaned_data.get("in_stock")
+        return counts["in_stock"], counts["in_stock"] if in_stock_only else counts["all"]
+
+    @staticmethod
+    def get(request):
+        """Return the facets for a request, cached per filter signature."""
+        cache_key = ProductCache.list_key(
+            "facets", request, exclude=ProductFacets.ignored_params
+        )
+        facets = ProductCache.get("facets", cache_key)
+        if facets is None:
+            facets = ProductFacets.compute(request.query_params)
+            ProductCache.set(cache_key, facets)
+        return facets
+
+    @staticmethod
+    def compute(params):
+        """Return every facet for the given query parameters."""
+        in_stock, total = ProductFacets.get_stock_counts(params)
+        return {
+            "total": total,
+            "gender": ProductFacets.get_gender_counts(params),
+            "brand": ProductFacets.get_brand_counts(params),
+            "category": ProductFacets.get_category_counts(params),
+            "price": ProductFacets.get_price_counts(params),
+            "in_stock": in_stock,
+        }
@@ -1,5 +1,12 @@
 import django_filters
-from .models import Product
+from rest_framework.filters import SearchFilter
+from rest_framework.settings import api_settings
+from .models import Category, Product
+from .search import get_search_backend
+
+
+class CharInFilter(django_filters.BaseInFilter, django_filters.CharFilter):
+    """Comma separated list of strings."""
 
 
 class ProductFilter(django_filters.FilterSet):
@@ -9,24 +16,69 @@ class ProductFilter(django_filters.FilterSet):
 
     min_price = django_filters.NumberFilter(field_name="price", lookup_expr="gte")
     max_price = django_filters.NumberFilter(field_name="price", lookup_expr="lte")
-    category = django_filters.CharFilter(field_name="category__slug")
+    category = django_filters.CharFilter(
+        method="filter_category", label="Category (including subcategories)"
+    )
     gender = django_filters.ChoiceFilter(choices=Product.GENDER_CHOICES)
     brand = django_filters.CharFilter(field_name="brand", lookup_expr="iexact")
     is_featured = django_filters.BooleanFilter(field_name="is_featured")
     in_stock = django_filters.BooleanFilter(
         method="filter_in_stock", label="In Stock Only"
     )
+    size = CharInFilter(
+        method="filter_variant_available", label="Available in size (comma separated)"
+    )
+    color = CharInFilter(
+        method="filter_variant_available", label="Available in color (comma separated)"
+    )
 
     class Meta:
         model = Product
         fields = ["category", "gender", "brand", "is_featured"]
 
+    def filter_category(self, queryset, name, value):
+        """Filter products in a category or any of its descendants."""
+        if value:
+            return queryset.filter(Category.subtree_filter(value))
+        return queryset
+
     def filter_in_stock(self, queryset, name, value):
-        """Filter products that are in stock (have variants with stock)."""
+        """Filter products that are in stock, using the denormalized flag."""
         if value:
-            return queryset.filter(
-                variants__is_deleted=False,
-                variants__is_active=True,
-                variants__stock_quantity__gt=0
-            ).distinct()
-        return queryset
\ No newline at end of file
+            return queryset.filter(has_stock=True)
+        return queryset
+
+    def filter_variant_available(self, queryset, name, value):
+        """
+        Filter products with an available variant in the requested sizes
+        and colors. Both filters are applied together as one EXISTS
+        subquery, so the call for the second of them is a no-op.
+        """
+        data = self.form.cleaned_data
+        if name == "color" and data.get("size"):
+            return queryset
+        sizes = data.get("size")
+        colors = data.get("color")
+        if not (sizes or colors):
+            return queryset
+        return queryset.filter(Product.variant_available(sizes, colors))
+
+
+class ProductSearchFilter(SearchFilter):
+    """
+    Search filter backed by the configured product search backend.
+    Results are ordered by relevance unless the client asks for
+    an explicit ordering.
+    """
+
+    ordering_param = api_settings.ORDERING_PARAM
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "").strip()
+        if not query:
+            return queryset
+
+        queryset = get_search_backend().search(queryset, query)
+        if request.query_params.get(self.ordering_param):
+            return queryset
+        return queryset.order_by("-search_rank", *queryset.query.order_by)
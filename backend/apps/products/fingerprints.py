@@ -0,0 +1,102 @@
+"""
+File: backend/apps/products/fingerprints.py
+Purpose: Cheap catalog fingerprints backing conditional GET responses
+"""
+
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from apps.core.conditional import Validators
+from .cache import ProductCache
+from .models import Category, Product, ProductImage, ProductVariant
+
+
+class CatalogFingerprint:
+    """
+    Validators for catalog responses, each computed with one aggregate
+    query that never loads the rows being served.
+
+    Lists combine the row count and latest updated_at of the filtered
+    queryset with the catalog cache version, which is bumped by every
+    product, variant, image and category write, including those (stock
+    refreshes, count updates) that leave updated_at untouched. List
+    validators are cached under a key embedding that version, so the
+    aggregate runs once per catalog change and query string. Details
+    combine the product's updated_at with the count and latest
+    updated_at of its variants and images (soft-deleted rows included,
+    so deleting one changes the watermark) and the product's cache
+    version.
+    """
+
+    @staticmethod
+    def for_queryset(queryset, *parts):
+        """Validators for a list served from queryset."""
+        stats = queryset.order_by().aggregate(count=Count("pk"), last_modified=Max("updated_at"))
+        (catalog_version,) = ProductCache.get_versions("catalog")
+        return Validators(
+            catalog_version,
+            stats["count"],
+            stats["last_modified"],
+            *parts,
+            last_modified=stats["last_modified"],
+        )
+
+    @staticmethod
+    def cached(namespace, request, compute):
+        """
+        Return list validators cached under the request's list key,
+        calling compute() to build them on a miss.
+        """
+        cache_key = ProductCache.list_key(f"{namespace}_fingerprint", request)
+        validators = ProductCache.get("fingerprint", cache_key)
+        if validators is None:
+            validators = compute()
+            ProductCache.set(cache_key, validators)
+        return validators
+
+    @staticmethod
+    def for_products(queryset, *parts):
+        return CatalogFingerprint.for_queryset(queryset.prefetch_related(None), *parts)
+
+    @staticmethod
+    def for_categories():
+        return CatalogFingerprint.for_queryset(Category.objects.filter(is_active=True))
+
+    @staticmethod
+    def watermark(model):
+        """Subqueries with the count and latest updated_at of a product's rows."""
+        rows = model.all_objects.filter(product=OuterRef("pk")).order_by().values("product")
+        return (
+            Subquery(rows.annotate(count=Count("pk")).values("count")),
+            Subquery(rows.annotate(latest=Max("updated_at")).values("latest")),
+        )
+
+    @staticmethod
+    def for_product(slug):
+        """
+        Return (product_id, validators) for an active product, or
+        (None, None) when the slug does not match one.
+        """
+        variants_count, variants_modified = CatalogFingerprint.watermark(ProductVariant)
+        images_count, images_modified = CatalogFingerprint.watermark(ProductImage)
+        row = (
+            Product.objects.filter(slug=slug, is_active=True)
+            .annotate(
+                variant_rows=variants_count,
+                image_rows=images_count,
+                last_modified=Greatest(
+                    "updated_at",
+                    Coalesce(variants_modified, "updated_at"),
+                    Coalesce(images_modified, "updated_at"),
+                ),
+            )
+            .values_list("pk", "variant_rows", "image_rows", "last_modified")
+            .first()
+        )
+        if row is None:
+            return None, None
+
+        product_id, variants, images, last_modified = row
+        versions = ProductCache.get_versions("category", f"product:{product_id}")
+        return product_id, Validators(
+            *versions, product_id, variants, images, last_modified, last_modified=last_modified
+        )
@@ -0,0 +1,264 @@
+"""
+File: backend/apps/products/images.py
+Purpose: Resized WebP/JPEG derivatives of product and category images
+"""
+
+import logging
+import posixpath
+from functools import partial
+from io import BytesIO
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Q
+from PIL import Image, ImageOps
+from apps.core.storage import build_media_url
+from .cache import ProductCache
+from .models import Category, ProductImage
+
+logger = logging.getLogger(__name__)
+
+# Pillow format name, file extension and encoder options per output format
+DERIVATIVE_FORMATS = {
+    "avif": ("AVIF", "avif", {"quality": 60}),
+    "webp": ("WEBP", "webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+class ImageDerivatives:
+    """
+    Fixed-width derivatives of uploaded images.
+
+    Every configured size is rendered in every configured format, from
+    the largest size down, each size resized from the previous one so
+    the full-resolution original is decoded and resampled only once.
+    Originals are never upscaled. The result is stored as JSON on the
+    row (``image_derivatives``), keyed to the original's file name, so
+    serializers build srcsets without touching storage and a replaced
+    upload is recognised as stale.
+    """
+
+    @staticmethod
+    def get_models():
+        return [Category, ProductImage]
+
+    @staticmethod
+    def get_sizes():
+        """Derivative name -> maximum width in pixels."""
+        return getattr(
+            settings,
+            "IMAGE_DERIVATIVE_SIZES",
+            {"thumbnail": 200, "card": 400, "detail": 800, "zoom": 1600},
+        )
+
+    @staticmethod
+    def get_formats():
+        """Configured output formats this Pillow build can encode."""
+        Image.init()
+        return [
+            name
+            for name in getattr(settings, "IMAGE_DERIVATIVE_FORMATS", ["webp", "jpeg"])
+            if name in DERIVATIVE_FORMATS and DERIVATIVE_FORMATS[name][0] in Image.SAVE
+        ]
+
+    @staticmethod
+    def get_name(source, size, fmt):
+        root = posixpath.splitext(source)[0]
+        return f"derivatives/{root}/{size}.{DERIVATIVE_FORMATS[fmt][1]}"
+
+    @staticmethod
+    def encode(image, fmt):
+        pillow_format, _, options = DERIVATIVE_FORMATS[fmt]
+        if pillow_format == "JPEG" and image.mode != "RGB":
+            if "A" in image.getbands():
+                background = Image.new("RGB", image.size, (255, 255, 255))
+                background.paste(image, mask=image.getchannel("A"))
+                image = background
+            else:
+                image = image.convert("RGB")
+        buffer = BytesIO()
+        image.save(buffer, pillow_format, **options)
+        return buffer.getvalue()
+
+    @staticmethod
+    def render(fileobj, sizes, formats):
+        """
+        Decode an image and return (width, height, renditions) where
+        renditions is a list of (size, width, height, {format: bytes}),
+        largest first.
+        """
+        with Image.open(fileobj) as original:
+            largest = max(sizes.values())
+            # Lets the JPEG decoder skip to a cheaper scale that is still
+            # at least as large as the biggest derivative
+            original.draft("RGB", (largest, largest))
+            image = ImageOps.exif_transpose(original)
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+            width, height = image.size
+
+            renditions = []
+            encoded = {}
+            for size, max_width in sorted(sizes.items(), key=lambda item: -item[1]):
+                target = min(max_width, image.width)
+                if target < image.width:
+                    target_height = max(round(image.height * target / image.width), 1)
+                    image = image.resize((target, target_height), Image.LANCZOS)
+                # Sizes clamped to the same width share one set of bytes
+                if image.size not in encoded:
+                    encoded[image.size] = {
+                        fmt: ImageDerivatives.encode(image, fmt) for fmt in formats
+                    }
+                renditions.append((size, image.width, image.height, encoded[image.size]))
+        return width, height, renditions
+
+    @staticmethod
+    def generate(label, source):
+        """
+        Render and store the derivatives of the file `source` of model
+        `label`, returning their metadata. Does not touch the database,
+        so it can run in a worker process.
+        """
+        storage = apps.get_model(label)._meta.get_field("image").storage
+        with storage.open(source, "rb") as fileobj:
+            width, height, renditions = ImageDerivatives.render(
+                fileobj, ImageDerivatives.get_sizes(), ImageDerivatives.get_formats()
+            )
+
+        stored = {}
+        derivatives = []
+        for size, size_width, size_height, files in renditions:
+            names = {}
+            for fmt, content in files.items():
+                key = (size_width, fmt)
+                if key not in stored:
+                    name = ImageDerivatives.get_name(source, size, fmt)
+                    stored[key] = storage.save(name, ContentFile(content))
+                names[fmt] = stored[key]
+            derivatives.append(
+                {"name": size, "width": size_width, "height": size_height, "files": names}
+            )
+        return {"source": source, "width": width, "height": height, "derivatives": derivatives}
+
+    @staticmethod
+    def get_files(meta):
+        return {
+            name
+            for derivative in (meta or {}).get("derivatives", [])
+            for name in derivative["files"].values()
+        }
+
+    @staticmethod
+    def save(model, pk, source, meta, previous):
+        """
+        Store metadata unless the row's image changed in the meantime,
+        and delete derivative files no longer referenced. Returns
+        whether the row was updated.
+        """
+        storage = model._meta.get_field("image").storage
+        same_image = Q(image=source) if source else Q(image="") | Q(image__isnull=True)
+        updated = model.all_objects.filter(same_image, pk=pk).update(image_derivatives=meta)
+        obsolete = ImageDerivatives.get_files(previous if updated else meta)
+        obsolete -= ImageDerivatives.get_files(meta if updated else previous)
+        for name in obsolete:
+            storage.delete(name)
+        return bool(updated)
+
+    @staticmethod
+    def invalidate(model, pks):
+        """Invalidate cached payloads embedding the given rows' images."""
+        if model is Category:
+            ProductCache.invalidate_categories()
+        else:
+            product_ids = model.all_objects.filter(pk__in=pks).values_list("product_id", flat=True)
+            ProductCache.invalidate_products(product_ids)
+
+    @staticmethod
+    def is_current(instance):
+        source = instance.image.name if instance.image else None
+        return (instance.image_derivatives or {}).get("source") == source
+
+    @staticmethod
+    def process(label, pk):
+        """Generate derivatives for one row. Returns whether they were stored."""
+        model = apps.get_model(label)
+        instance = model.all_objects.filter(pk=pk).first()
+        if instance is None or ImageDerivatives.is_current(instance):
+            return False
+
+        previous = instance.image_derivatives
+        if not instance.image:
+            updated = ImageDerivatives.save(model, pk, "", {}, previous)
+        else:
+            try:
+                meta = ImageDerivatives.generate(label, instance.image.name)
+            except (OSError, Image.DecompressionBombError):
+                logger.exception(f"Could not generate derivatives for {label} {pk}")
+                return False
+            updated = ImageDerivatives.save(model, pk, instance.image.name, meta, previous)
+
+        if updated:
+            ImageDerivatives.invalidate(model, [pk])
+        return updated
+
+    @staticmethod
+    def schedule(instance):
+        """Generate derivatives for a saved row once the transaction commits."""
+        if not ImageDerivatives.is_current(instance):
+            transaction.on_commit(
+                partial(ImageDerivatives.dispatch, instance._meta.label, instance.pk)
+            )
+
+    @staticmethod
+    def dispatch(label, pk):
+        """
+        Hand a row to Celery, or process it in-process when
+        IMAGE_DERIVATIVES_EAGER is set (tests, development without a broker).
+        """
+        if getattr(settings, "IMAGE_DERIVATIVES_EAGER", False):
+            ImageDerivatives.process(label, pk)
+            return
+
+        from .tasks import generate_image_derivatives
+
+        try:
+            generate_image_derivatives.delay(label, pk)
+        except Exception:
+            logger.exception(
+                f"Could not dispatch image derivatives for {label} {pk}; "
+                f"run the generate_image_derivatives command to backfill them"
+            )
+
+    @staticmethod
+    def get_sources(image, meta, request=None):
+        """
+        Return srcset data for an image from its stored metadata, or None
+        when derivatives have not been generated for the current file.
+        """
+        if not image or (meta or {}).get("source") != image.name:
+            return None
+
+        sizes = {}
+        srcset = {}
+        for derivative in meta["derivatives"]:
+            urls = {
+                fmt: build_media_url(image.storage, name, request)
+                for fmt, name in derivative["files"].items()
+            }
+            sizes[derivative["name"]] = {
+                "width": derivative["width"],
+                "height": derivative["height"],
+                **urls,
+            }
+            for fmt, url in urls.items():
+                entry = f"{url} {derivative['width']}w"
+                if entry not in srcset.setdefault(fmt, []):
+                    srcset[fmt].append(entry)
+        return {
+            "width": meta["width"],
+            "height": meta["height"],
+            "sizes": sizes,
+            "srcset": {fmt: ", ".join(reversed(entries)) for fmt, entries in srcset.items()},
+        }
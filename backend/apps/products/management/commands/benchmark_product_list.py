@@ -0,0 +1,186 @@
+"""
+File: backend/apps/products/management/commands/benchmark_product_list.py
+Purpose: Compare product list latency for join + DISTINCT and EXISTS stock filtering
+"""
+
+import random
+import time
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+from apps.products.models import Category, Product, ProductVariant
+
+SIZES = ["XS", "S", "M", "L", "XL", "XXL"]
+COLORS = ["Black", "White", "Blue", "Red", "Green", "Grey", "Beige", "Navy"]
+
+
+class Command(BaseCommand):
+    """
+    Seed a synthetic catalog inside a transaction, time the product list
+    query (count plus first page) with the old join + DISTINCT filters
+    and with the stock flag / EXISTS filters, then roll the catalog back.
+    """
+
+    help = "Benchmark in-stock and size/color filtering on the product list"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--products",
+            type=int,
+            default=100_000,
+            help="Number of products to seed",
+        )
+        parser.add_argument(
+            "--variants",
+            type=int,
+            default=10,
+            help="Variants per product",
+        )
+        parser.add_argument(
+            "--runs",
+            type=int,
+            default=5,
+            help="Timed runs per query; the median is reported",
+        )
+        parser.add_argument(
+            "--page-size",
+            type=int,
+            default=20,
+            help="Products fetched for the first page",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Rows per INSERT while seeding",
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Commit the seeded catalog instead of rolling it back",
+        )
+
+    def handle(self, *args, **options):
+        if options["variants"] > len(SIZES) * len(COLORS):
+            raise CommandError(f"At most {len(SIZES) * len(COLORS)} variants per product")
+
+        with transaction.atomic():
+            started = time.monotonic()
+            self.seed(options["products"], options["variants"], options["batch_size"])
+            self.stdout.write(f"Seeded catalog in {time.monotonic() - started:.1f}s")
+            self.report(options["runs"], options["page_size"])
+            if not options["keep"]:
+                transaction.set_rollback(True)
+
+    def seed(self, product_count, variant_count, batch_size):
+        rng = random.Random(0)
+        category = Category.objects.create(name="Benchmark", slug="benchmark-catalog")
+        combinations = [(size, color) for size in SIZES for color in COLORS]
+
+        for start in range(0, product_count, batch_size):
+            stop = min(start + batch_size, product_count)
+            products = []
+            stock = {}
+            for index in range(start, stop):
+                # Roughly a third of the catalog is sold out
+                quantities = [
+                    rng.choice([0, 0, 0, 1, 5, 20]) if index % 3 else 0
+                    for _ in range(variant_count)
+                ]
+                stock[index] = quantities
+                products.append(
+                    Product(
+                        name=f"Benchmark product {index}",
+                        slug=f"benchmark-product-{index}",
+                        sku=f"BENCH-{index}",
+                        category=category,
+                        gender=rng.choice(Product.GENDER_CHOICES)[0],
+                        price=Decimal(rng.randint(500, 50000)) / 100,
+                        views_count=rng.randint(0, 10000),
+                        total_stock=sum(quantities),
+                        has_stock=any(quantities),
+                        variants_count=variant_count,
+                    )
+                )
+            products = Product.objects.bulk_create(products)
+
+            variants = []
+            for index, product in zip(range(start, stop), products):
+                for (size, color), quantity in zip(
+                    rng.sample(combinations, variant_count), stock[index]
+                ):
+                    variants.append(
+                        ProductVariant(
+                            product=product,
+                            size=size,
+                            color=color,
+                            sku=f"BENCH-{index}-{size}-{color}",
+                            stock_quantity=quantity,
+                        )
+                    )
+            ProductVariant.objects.bulk_create(variants, batch_size=batch_size)
+
+        if connection.vendor in ("postgresql", "sqlite"):
+            with connection.cursor() as cursor:
+                for model in (Product, ProductVariant):
+                    cursor.execute(f"ANALYZE {model._meta.db_table}")
+
+    def get_cases(self):
+        """Return (label, join + DISTINCT queryset, EXISTS queryset) pairs."""
+        products = Product.objects.filter(is_active=True)
+        in_stock_join = Q(
+            variants__is_deleted=False,
+            variants__is_active=True,
+            variants__stock_quantity__gt=0,
+        )
+        return [
+            (
+                "in stock",
+                products.filter(in_stock_join).distinct(),
+                products.filter(has_stock=True),
+            ),
+            (
+                "size M",
+                products.filter(in_stock_join, variants__size="M").distinct(),
+                products.filter(Product.variant_available(sizes=["M"])),
+            ),
+            (
+                "size M in blue",
+                products.filter(
+                    in_stock_join,
+                    variants__size="M",
+                    variants__color="Blue",
+                ).distinct(),
+                products.filter(Product.variant_available(sizes=["M"], colors=["Blue"])),
+            ),
+        ]
+
+    def time_list(self, queryset, ordering, runs, page_size):
+        """Median seconds for COUNT plus the first page, and the count."""
+        timings = []
+        count = None
+        for _ in range(runs):
+            start = time.monotonic()
+            count = queryset.count()
+            list(queryset.order_by(ordering)[:page_size])
+            timings.append(time.monotonic() - start)
+        timings.sort()
+        return timings[len(timings) // 2], count
+
+    def report(self, runs, page_size):
+        self.stdout.write(f"{'filter':<16}{'ordering':<16}{'join+distinct':>15}{'exists':>12}")
+        for label, legacy, current in self.get_cases():
+            for ordering in ("-created_at", "price", "-views_count"):
+                legacy_time, legacy_count = self.time_list(legacy, ordering, runs, page_size)
+                current_time, current_count = self.time_list(current, ordering, runs, page_size)
+                if legacy_count != current_count:
+                    raise CommandError(
+                        f"{label}: join+distinct matched {legacy_count} products, "
+                        f"exists matched {current_count}"
+                    )
+                self.stdout.write(
+                    f"{label:<16}{ordering:<16}"
+                    f"{legacy_time * 1000:>13.1f}ms{current_time * 1000:>10.1f}ms"
+                    f"  ({legacy_time / max(current_time, 1e-9):.1f}x)"
+                )
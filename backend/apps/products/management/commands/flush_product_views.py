@@ -0,0 +1,17 @@
+"""
+File: backend/apps/products/management/commands/flush_product_views.py
+Purpose: Write buffered product views to the database
+"""
+
+from django.core.management.base import BaseCommand
+from apps.products.services import ProductViewCounter
+
+
+class Command(BaseCommand):
+    """Flush product view counts accumulated in the cache."""
+
+    help = "Flush buffered product view counts to the database"
+
+    def handle(self, *args, **options):
+        flushed = ProductViewCounter.flush()
+        self.stdout.write(self.style.SUCCESS(f"Flushed {flushed} product view(s)"))
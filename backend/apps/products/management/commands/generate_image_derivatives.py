@@ -0,0 +1,126 @@
+"""
+File: backend/apps/products/management/commands/generate_image_derivatives.py
+Purpose: Backfill resized image derivatives using a pool of worker processes
+"""
+
+import os
+import django
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from apps.products.images import ImageDerivatives
+
+
+class Command(BaseCommand):
+    """
+    Generate derivatives for product and category images that have none
+    or whose stored derivatives belong to a previous upload.
+
+    Decoding and encoding run in worker processes, which only read and
+    write files; this process keeps the database work and records each
+    result as it arrives.
+    """
+
+    help = "Generate missing or stale image derivatives in parallel"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "models",
+            nargs="*",
+            help="Limit to these models (e.g. products.ProductImage)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Worker processes (default: one per core; 0 runs in this process)",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Regenerate derivatives that are already up to date",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many images need processing",
+        )
+
+    def get_models(self, labels):
+        models = ImageDerivatives.get_models()
+        if not labels:
+            return models
+        by_label = {model._meta.label_lower: model for model in models}
+        try:
+            return [by_label[label.lower()] for label in labels]
+        except KeyError as exc:
+            raise CommandError(f"Unknown image model {exc.args[0]}")
+
+    def get_pending(self, model, regenerate):
+        """Return (pk, image name, stored metadata) of rows to process."""
+        rows = (
+            model.all_objects.exclude(image="")
+            .exclude(image__isnull=True)
+            .order_by("pk")
+            .values_list("pk", "image", "image_derivatives")
+        )
+        return [
+            row
+            for row in rows.iterator()
+            if regenerate or (row[2] or {}).get("source") != row[1]
+        ]
+
+    def run(self, jobs, workers):
+        """Yield (job, metadata or exception) as images finish."""
+        if workers == 0:
+            for job in jobs:
+                try:
+                    yield job, ImageDerivatives.generate(job[0]._meta.label, job[2])
+                except Exception as exc:
+                    yield job, exc
+            return
+
+        # Forked workers must not inherit open database connections
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+            futures = {
+                pool.submit(ImageDerivatives.generate, job[0]._meta.label, job[2]): job
+                for job in jobs
+            }
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result()
+                except Exception as exc:
+                    yield futures[future], exc
+
+    def handle(self, *args, **options):
+        jobs = []
+        for model in self.get_models(options["models"]):
+            pending = self.get_pending(model, options["all"])
+            self.stdout.write(f"{model._meta.label}: {len(pending)} image(s) to process")
+            jobs.extend((model, pk, source, meta) for pk, source, meta in pending)
+
+        if options["dry_run"] or not jobs:
+            return
+
+        workers = options["workers"]
+        if workers is None:
+            workers = os.cpu_count() or 1
+        processed = {}
+        failed = 0
+        for (model, pk, source, previous), result in self.run(jobs, workers):
+            if isinstance(result, Exception):
+                failed += 1
+                self.stderr.write(f"{model._meta.label} {pk} ({source}): {result}")
+            elif ImageDerivatives.save(model, pk, source, result, previous):
+                processed.setdefault(model, []).append(pk)
+
+        for model, pks in processed.items():
+            ImageDerivatives.invalidate(model, pks)
+
+        total = sum(len(pks) for pks in processed.values())
+        self.stdout.write(
+            self.style.SUCCESS(f"Generated derivatives for {total} image(s), {failed} failed")
+        )
+        if failed:
+            raise CommandError(f"{failed} image(s) could not be processed")
@@ -0,0 +1,65 @@
+"""
+File: backend/apps/products/management/commands/recompute_stock.py
+Purpose: Repair drift in the denormalized product stock aggregate
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+from apps.products.models import Product
+
+
+class Command(BaseCommand):
+    """Recompute total stock, stock flag and variant count for products."""
+
+    help = "Recompute the denormalized stock aggregate on products"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of products updated per statement",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Rewrite every product instead of only drifted ones",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many products have drifted",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        aggregates = Product.stock_aggregates()
+
+        queryset = Product.all_objects.annotate(
+            expected_total_stock=aggregates["total_stock"],
+            expected_has_stock=aggregates["has_stock"],
+            expected_variants_count=aggregates["variants_count"],
+        )
+        if not options["all"]:
+            queryset = queryset.filter(
+                ~Q(total_stock=F("expected_total_stock"))
+                | ~Q(has_stock=F("expected_has_stock"))
+                | ~Q(variants_count=F("expected_variants_count"))
+            )
+
+        product_ids = list(queryset.order_by("pk").values_list("pk", flat=True))
+
+        if options["dry_run"]:
+            self.stdout.write(f"{len(product_ids)} product(s) need recomputing")
+            return
+
+        updated = 0
+        for start in range(0, len(product_ids), batch_size):
+            with transaction.atomic():
+                updated += Product.refresh_stock(product_ids[start:start + batch_size])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Recomputed stock for {updated} product(s)")
+        )
+
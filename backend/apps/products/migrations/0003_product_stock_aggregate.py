@@ -0,0 +1,69 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:37
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_stock_aggregate(apps, schema_editor):
+    Product = apps.get_model("products", "Product")
+    ProductVariant = apps.get_model("products", "ProductVariant")
+
+    live_variants = ProductVariant.objects.filter(
+        product=models.OuterRef("pk"), is_deleted=False, is_active=True
+    ).order_by()
+    total = (
+        live_variants.values("product")
+        .annotate(total=models.Sum("stock_quantity"))
+        .values("total")
+    )
+    count = (
+        live_variants.values("product")
+        .annotate(count=models.Count("id"))
+        .values("count")
+    )
+    Product.objects.update(
+        total_stock=Coalesce(models.Subquery(total), 0),
+        has_stock=models.Exists(live_variants.filter(stock_quantity__gt=0)),
+        variants_count=Coalesce(models.Subquery(count), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0002_remove_product_stock_quantity_alter_product_price_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="has_stock",
+            field=models.BooleanField(
+                default=False,
+                editable=False,
+                help_text="Denormalized flag set when any active variant is in stock",
+                verbose_name="has stock",
+            ),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="total_stock",
+            field=models.IntegerField(
+                default=0,
+                editable=False,
+                help_text="Denormalized sum of stock across active variants",
+                verbose_name="total stock",
+            ),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="variants_count",
+            field=models.IntegerField(
+                default=0,
+                editable=False,
+                help_text="Denormalized number of active variants",
+                verbose_name="variants count",
+            ),
+        ),
+        migrations.RunPython(backfill_stock_aggregate, migrations.RunPython.noop),
+    ]
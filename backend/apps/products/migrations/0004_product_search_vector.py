@@ -0,0 +1,56 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:58
+
+import django.contrib.postgres.search
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+POSTGRES_INDEXES = [
+    GinIndex(fields=["search_vector"], name="product_search_vector_gin"),
+    GinIndex(fields=["name"], name="product_name_trgm", opclasses=["gin_trgm_ops"]),
+]
+
+
+def create_search_indexes(apps, schema_editor):
+    """Create GIN indexes and backfill vectors; PostgreSQL only."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    Product = apps.get_model("products", "Product")
+    for index in POSTGRES_INDEXES:
+        schema_editor.add_index(Product, index)
+    Product.objects.update(
+        search_vector=SearchVector("name", weight="A", config="english")
+        + SearchVector("brand", weight="B", config="english")
+        + SearchVector("description", weight="C", config="english")
+    )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    Product = apps.get_model("products", "Product")
+    for index in POSTGRES_INDEXES:
+        schema_editor.remove_index(Product, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0003_product_stock_aggregate"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name="product",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False,
+                help_text="Weighted full-text vector of name, brand and description",
+                null=True,
+                verbose_name="search vector",
+            ),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:46
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+PATH_STEP = 10
+
+
+def backfill_category_tree(apps, schema_editor):
+    Category = apps.get_model("products", "Category")
+    Product = apps.get_model("products", "Product")
+
+    categories = list(Category.objects.values_list("id", "parent_id"))
+    children = {}
+    for pk, parent_id in categories:
+        children.setdefault(parent_id, []).append(pk)
+
+    pending = [(pk, "", 0) for pk in children.get(None, [])]
+    while pending:
+        pk, parent_path, depth = pending.pop()
+        path = f"{parent_path}{pk:0{PATH_STEP}d}/"
+        Category.objects.filter(pk=pk).update(path=path, depth=depth)
+        pending.extend((child, path, depth + 1) for child in children.get(pk, []))
+
+    child_counts = (
+        Category.objects.filter(
+            parent=models.OuterRef("pk"), is_active=True, is_deleted=False
+        )
+        .order_by()
+        .annotate(count=models.Func(models.F("pk"), function="COUNT"))
+        .values("count")
+    )
+    product_counts = (
+        Product.objects.filter(
+            is_active=True,
+            is_deleted=False,
+            category__path__startswith=models.OuterRef("path"),
+        )
+        .order_by()
+        .annotate(count=models.Func(models.F("pk"), function="COUNT"))
+        .values("count")
+    )
+    Category.objects.update(
+        children_count=Coalesce(models.Subquery(child_counts), 0),
+        products_count=Coalesce(models.Subquery(product_counts), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0004_product_search_vector"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="category",
+            name="children_count",
+            field=models.IntegerField(
+                default=0,
+                editable=False,
+                help_text="Denormalized number of active child categories",
+                verbose_name="children count",
+            ),
+        ),
+        migrations.AddField(
+            model_name="category",
+            name="depth",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                help_text="Depth in the category tree (0 for root categories)",
+                verbose_name="depth",
+            ),
+        ),
+        migrations.AddField(
+            model_name="category",
+            name="path",
+            field=models.CharField(
+                blank=True,
+                default="",
+                editable=False,
+                help_text="Materialized path of zero-padded ancestor ids, including self",
+                max_length=255,
+                verbose_name="path",
+            ),
+        ),
+        migrations.AddField(
+            model_name="category",
+            name="products_count",
+            field=models.IntegerField(
+                default=0,
+                editable=False,
+                help_text="Denormalized number of active products, including descendants",
+                verbose_name="products count",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="category",
+            index=models.Index(fields=["path"], name="products_ca_path_e3cf32_idx"),
+        ),
+        migrations.RunPython(backfill_category_tree, migrations.RunPython.noop),
+    ]
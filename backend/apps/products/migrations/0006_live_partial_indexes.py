@@ -0,0 +1,121 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0005_category_materialized_path"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="category",
+            name="products_ca_slug_da4386_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="category",
+            name="products_ca_is_acti_65c3de_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="category",
+            name="products_ca_path_e3cf32_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="product",
+            name="products_pr_slug_3edc0c_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="product",
+            name="products_pr_categor_50f5f1_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="product",
+            name="products_pr_gender_e034b3_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="product",
+            name="products_pr_is_feat_a1ecf6_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="product",
+            name="products_pr_sku_ca0cdc_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="productimage",
+            name="products_pr_product_1b7905_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="productvariant",
+            name="products_pr_product_66459e_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="productvariant",
+            name="products_pr_sku_dcab68_idx",
+        ),
+        migrations.AddIndex(
+            model_name="category",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["is_active", "order"],
+                name="category_live_active_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="category",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["path"],
+                name="category_live_path_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["category", "is_active"],
+                name="product_live_category_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["gender", "is_active"],
+                name="product_live_gender_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["is_featured", "is_active"],
+                name="product_live_featured_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["-created_at"],
+                name="product_live_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="productimage",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["product", "is_primary"],
+                name="productimage_live_product_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="productvariant",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["product", "is_active"],
+                name="variant_live_product_idx",
+            ),
+        ),
+    ]
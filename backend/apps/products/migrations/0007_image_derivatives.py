@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-17 23:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0006_live_partial_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="category",
+            name="image_derivatives",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                editable=False,
+                help_text="Resized versions of the image (generated)",
+                verbose_name="image derivatives",
+            ),
+        ),
+        migrations.AddField(
+            model_name="productimage",
+            name="image_derivatives",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                editable=False,
+                help_text="Resized versions of the image (generated)",
+                verbose_name="image derivatives",
+            ),
+        ),
+    ]
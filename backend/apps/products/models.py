@@ -1,7 +1,11 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.utils.text import slugify
+from django.core.exceptions import ValidationError
+from django.db.models.functions import Coalesce, Concat, Substr
 from apps.core.models import BaseModel
+from .cache import ProductCache
 
 
 class Category(BaseModel):
@@ -40,6 +44,13 @@ class Category(BaseModel):
         blank=True,
         help_text=_("Category image"),
     )
+    image_derivatives = models.JSONField(
+        _("image derivatives"),
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text=_("Resized versions of the image (generated)"),
+    )
     is_active = models.BooleanField(
         _("is active"),
         default=True,
@@ -50,14 +61,42 @@ class Category(BaseModel):
         default=0,
         help_text=_("Display order for sorting categories"),
     )
+    path = models.CharField(
+        _("path"),
+        max_length=255,
+        blank=True,
+        default="",
+        editable=False,
+        help_text=_("Materialized path of zero-padded ancestor ids, including self"),
+    )
+    depth = models.PositiveIntegerField(
+        _("depth"),
+        default=0,
+        editable=False,
+        help_text=_("Depth in the category tree (0 for root categories)"),
+    )
+    children_count = models.IntegerField(
+        _("children count"),
+        default=0,
+        editable=False,
+        help_text=_("Denormalized number of active child categories"),
+    )
+    products_count = models.IntegerField(
+        _("products count"),
+        default=0,
+        editable=False,
+        help_text=_("Denormalized number of active products, including descendants"),
+    )
+
+    PATH_STEP = 10
 
     class Meta:
         verbose_name = _("category")
         verbose_name_plural = _("categories")
         ordering = ["order", "name"]
         indexes = [
-            models.Index(fields=["slug"]),
-            models.Index(fields=["is_active", "order"]),
+            BaseModel.live_index("is_active", "order", name="category_live_active_idx"),
+            BaseModel.live_index("path", name="category_live_path_idx"),
         ]
 
     def __str__(self):
@@ -65,17 +104,144 @@ class Category(BaseModel):
         return self.name
 
     def save(self, *args, **kwargs):
-        """Override save to auto-generate slug from name."""
+        """
+        Override save to auto-generate slug from name
+        and keep the materialized path in sync with the parent.
+        """
         if not self.slug:
             self.slug = slugify(self.name)
+
+        update_fields = kwargs.get("update_fields")
+        moves = update_fields is None or "parent" in update_fields
+        if moves:
+            self.check_parent()
         super().save(*args, **kwargs)
 
+        if moves:
+            self.update_path()
+
+    def clean(self):
+        super().clean()
+        self.check_parent()
+
+    def check_parent(self):
+        """
+        Reject a parent that is this category or one of its descendants,
+        comparing the stored paths before anything is written.
+        """
+        if not (self.pk and self.parent_id):
+            return
+        paths = dict(
+            Category.all_objects.filter(pk__in=[self.pk, self.parent_id]).values_list(
+                "pk", "path"
+            )
+        )
+        path = paths.get(self.pk)
+        if path and paths.get(self.parent_id, "").startswith(path):
+            raise ValidationError(_("A category cannot be moved under its own descendant"))
+
+    def update_path(self):
+        """
+        Recompute this category's path and rewrite the paths of all
+        descendants in a single UPDATE when it moves.
+        """
+        parent_path = ""
+        if self.parent_id:
+            parent_path = (
+                Category.all_objects.filter(pk=self.parent_id)
+                .values_list("path", flat=True)
+                .get()
+            )
+
+        new_path = f"{parent_path}{self.pk:0{self.PATH_STEP}d}/"
+        if new_path == self.path:
+            return
+
+        old_path = self.path
+        new_depth = len(new_path) // (self.PATH_STEP + 1) - 1
+        Category.all_objects.filter(pk=self.pk).update(path=new_path, depth=new_depth)
+
+        if old_path:
+            Category.all_objects.filter(path__startswith=old_path).exclude(
+                pk=self.pk
+            ).update(
+                path=Concat(models.Value(new_path), Substr("path", len(old_path) + 1)),
+                depth=models.F("depth") + (new_depth - self.depth),
+            )
+
+        self.path = new_path
+        self.depth = new_depth
+        # post_save already ran against the old path; recount both chains
+        Category.refresh_counts(
+            Category.path_ids(old_path) + Category.path_ids(new_path)
+        )
+
+    @staticmethod
+    def path_ids(path):
+        """Return the ids in a materialized path, root first."""
+        return [int(part) for part in path.split("/")[:-1]]
+
+    def get_ancestor_ids(self):
+        """Return ids of all ancestors, root first, parsed from the path."""
+        return self.path_ids(self.path)[:-1]
+
+    @staticmethod
+    def get_chain_ids(category_ids):
+        """Return the given categories and all their ancestors, in one query."""
+        paths = Category.all_objects.filter(pk__in=category_ids).values_list("path", flat=True)
+        return {pk for path in paths for pk in Category.path_ids(path)}
+
+    def get_descendants(self, include_self=False):
+        """Get all descendant categories in a single query."""
+        queryset = Category.objects.filter(path__startswith=self.path)
+        if not include_self:
+            queryset = queryset.exclude(pk=self.pk)
+        return queryset
+
     def get_all_children(self):
         """Get all child categories recursively."""
-        children = list(self.children.filter(is_deleted=False))
-        for child in list(children):
-            children.extend(child.get_all_children())
-        return children
+        return list(self.get_descendants())
+
+    @staticmethod
+    def subtree_filter(slug, prefix="category__"):
+        """
+        Return a Q object matching rows whose category is the category
+        with the given slug or any of its descendants, as one subquery.
+        """
+        path = Category.objects.filter(slug=slug).values("path")[:1]
+        return models.Q(**{f"{prefix}path__startswith": models.Subquery(path)})
+
+    @classmethod
+    def refresh_counts(cls, category_ids=None):
+        """
+        Recompute children and product counts (including descendants)
+        in a single UPDATE statement, for the given categories or, when
+        category_ids is None, every category.
+        """
+        children = (
+            Category.objects.filter(parent=models.OuterRef("pk"), is_active=True)
+            .order_by()
+            .annotate(count=models.Func(models.F("pk"), function="COUNT"))
+            .values("count")
+        )
+        products = (
+            Product.objects.filter(
+                is_active=True, category__path__startswith=models.OuterRef("path")
+            )
+            .order_by()
+            .annotate(count=models.Func(models.F("pk"), function="COUNT"))
+            .values("count")
+        )
+        categories = cls.all_objects.all()
+        if category_ids is not None:
+            category_ids = {pk for pk in category_ids if pk is not None}
+            if not category_ids:
+                return 0
+            categories = categories.filter(pk__in=category_ids)
+        return categories.update(
+            children_count=Coalesce(models.Subquery(children), 0),
+            products_count=Coalesce(models.Subquery(products), 0),
+        )
 
 
 class Product(BaseModel):
@@ -162,27 +328,76 @@ class Product(BaseModel):
         default=0,
         help_text=_("Number of times product was viewed"),
     )
+    total_stock = models.IntegerField(
+        _("total stock"),
+        default=0,
+        editable=False,
+        help_text=_("Denormalized sum of stock across active variants"),
+    )
+    has_stock = models.BooleanField(
+        _("has stock"),
+        default=False,
+        editable=False,
+        help_text=_("Denormalized flag set when any active variant is in stock"),
+    )
+    variants_count = models.IntegerField(
+        _("variants count"),
+        default=0,
+        editable=False,
+        help_text=_("Denormalized number of active variants"),
+    )
+    search_vector = SearchVectorField(
+        _("search vector"),
+        null=True,
+        editable=False,
+        help_text=_("Weighted full-text vector of name, brand and description"),
+    )
+
+    # Maintained by refresh_stock, never written by full saves
+    STOCK_AGGREGATE_FIELDS = ("total_stock", "has_stock", "variants_count")
 
     class Meta:
         verbose_name = _("product")
         verbose_name_plural = _("products")
         ordering = ["-created_at"]
         indexes = [
-            models.Index(fields=["slug"]),
-            models.Index(fields=["category", "is_active"]),
-            models.Index(fields=["gender", "is_active"]),
-            models.Index(fields=["is_featured", "is_active"]),
-            models.Index(fields=["sku"]),
+            BaseModel.live_index("category", "is_active", name="product_live_category_idx"),
+            BaseModel.live_index("gender", "is_active", name="product_live_gender_idx"),
+            BaseModel.live_index("is_featured", "is_active", name="product_live_featured_idx"),
+            BaseModel.live_index("-created_at", name="product_live_created_idx"),
         ]
+        # GIN indexes for search_vector and trigram name lookups are
+        # created by migration 0004 on PostgreSQL only.
 
     def __str__(self):
         """Return string representation of the product."""
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored category so a move also recounts the old one
+        instance.loaded_category_id = instance.__dict__.get("category_id")
+        return instance
+
     def save(self, *args, **kwargs):
-        """Override save to auto-generate slug from name."""
+        """
+        Override save to auto-generate slug from name. Full saves of an
+        existing product leave the stock aggregate alone, since this
+        instance's copy may predate later variant writes.
+        """
         if not self.slug:
             self.slug = slugify(self.name)
+        if (
+            kwargs.get("update_fields") is None
+            and not kwargs.get("force_insert")
+            and not self._state.adding
+        ):
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.STOCK_AGGREGATE_FIELDS
+            ]
         super().save(*args, **kwargs)
 
     @property
@@ -204,21 +419,80 @@ class Product(BaseModel):
 
     @property
     def stock_quantity(self):
-        """Get total stock from all variants."""
-        return sum(
-            self.variants.filter(is_deleted=False, is_active=True)
-            .values_list("stock_quantity", flat=True)
-        )
+        """Get total stock from all variants (denormalized)."""
+        return self.total_stock
 
     @property
     def is_in_stock(self):
-        """Check if product is in stock."""
-        return self.stock_quantity > 0
+        """Check if product is in stock (denormalized)."""
+        return self.has_stock
+
+    @classmethod
+    def stock_aggregates(cls):
+        """
+        Return correlated expressions computing the stock aggregate
+        of the product referenced by OuterRef("pk").
+        """
+        live_variants = ProductVariant.objects.filter(
+            product=models.OuterRef("pk"), is_active=True
+        )
+        total = (
+            live_variants.order_by()
+            .values("product")
+            .annotate(total=models.Sum("stock_quantity"))
+            .values("total")
+        )
+        count = (
+            live_variants.order_by()
+            .values("product")
+            .annotate(count=models.Count("id"))
+            .values("count")
+        )
+        return {
+            "total_stock": Coalesce(models.Subquery(total), 0),
+            "has_stock": models.Exists(live_variants.filter(stock_quantity__gt=0)),
+            "variants_count": Coalesce(models.Subquery(count), 0),
+        }
+
+    @classmethod
+    def variant_available(cls, sizes=None, colors=None):
+        """
+        Return an EXISTS condition matching products with an active
+        variant in stock in one of the given sizes and colors. Values are
+        matched exactly, so the (product, size, color) unique index
+        serves the lookup. Size and color are matched on the same
+        variant: "M in Blue" requires a blue M to be available, not just
+        any M and any blue variant.
+        """
+        variants = ProductVariant.objects.filter(
+            product=models.OuterRef("pk"), is_active=True, stock_quantity__gt=0
+        )
+        for field, values in (("size", sizes), ("color", colors)):
+            if values:
+                variants = variants.filter(**{f"{field}__in": values})
+        return models.Exists(variants)
+
+    @classmethod
+    def refresh_stock(cls, product_ids):
+        """
+        Recompute the stock aggregate for the given products
+        in a single UPDATE statement and invalidate their cached payloads.
+        """
+        product_ids = {pk for pk in product_ids if pk is not None}
+        if not product_ids:
+            return 0
+        updated = cls.all_objects.filter(pk__in=product_ids).update(
+            **cls.stock_aggregates()
+        )
+        ProductCache.invalidate_products(product_ids)
+        return updated
 
     def increment_views(self):
-        """Increment product views count."""
+        """Increment product views count atomically."""
+        Product.all_objects.filter(pk=self.pk).update(
+            views_count=models.F("views_count") + 1
+        )
         self.views_count += 1
-        self.save(update_fields=["views_count"])
 
 
 class ProductImage(BaseModel):
@@ -237,6 +511,13 @@ class ProductImage(BaseModel):
         upload_to="products/%Y/%m/%d/",
         help_text=_("Product image"),
     )
+    image_derivatives = models.JSONField(
+        _("image derivatives"),
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text=_("Resized versions of the image (generated)"),
+    )
     alt_text = models.CharField(
         _("alt text"),
         max_length=255,
@@ -259,7 +540,7 @@ class ProductImage(BaseModel):
         verbose_name_plural = _("product images")
         ordering = ["order", "-is_primary"]
         indexes = [
-            models.Index(fields=["product", "is_primary"]),
+            BaseModel.live_index("product", "is_primary", name="productimage_live_product_idx"),
         ]
 
     def __str__(self):
@@ -332,8 +613,7 @@ class ProductVariant(BaseModel):
         ordering = ["size", "color"]
         unique_together = [["product", "size", "color"]]
         indexes = [
-            models.Index(fields=["product", "is_active"]),
-            models.Index(fields=["sku"]),
+            BaseModel.live_index("product", "is_active", name="variant_live_product_idx"),
         ]
 
     def __str__(self):
@@ -0,0 +1,194 @@
+"""
+File: backend/apps/products/search.py
+Purpose: Pluggable full-text search backends for products
+"""
+
+import re
+from functools import lru_cache
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.utils.module_loading import import_string
+
+SEARCH_FIELD_WEIGHTS = {"name": "A", "brand": "B", "description": "C"}
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text):
+    """Split text into lowercase word tokens."""
+    return TOKEN_RE.findall((text or "").lower())
+
+
+def trigrams(text):
+    """
+    Return the set of trigrams for text, padded the same way as pg_trgm
+    (two spaces before and one space after every word).
+    """
+    result = set()
+    for word in tokenize(text):
+        padded = f"  {word} "
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+def trigram_similarity(left, right):
+    """Python equivalent of pg_trgm's similarity()."""
+    left_trigrams = trigrams(left)
+    right_trigrams = trigrams(right)
+    if not left_trigrams or not right_trigrams:
+        return 0.0
+    shared = len(left_trigrams & right_trigrams)
+    return shared / len(left_trigrams | right_trigrams)
+
+
+class BaseSearchBackend:
+    """
+    Interface for product search backends.
+    Backends annotate matching rows with ``search_rank`` so callers
+    can order by relevance.
+    """
+
+    autocomplete_threshold = 0.3
+
+    def search(self, queryset, query):
+        """Filter queryset to rows matching query, annotated with search_rank."""
+        raise NotImplementedError
+
+    def autocomplete(self, queryset, query, limit=10):
+        """Return up to limit rows whose name starts with or resembles query."""
+        raise NotImplementedError
+
+    def update_index(self, product_ids):
+        """Refresh any stored search data for the given products."""
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    Search backend using the stored, GIN-indexed ``search_vector``
+    column and pg_trgm similarity for autocomplete.
+    """
+
+    config = "english"
+
+    def get_search_vector(self):
+        from django.contrib.postgres.search import SearchVector
+
+        vector = None
+        for field, weight in SEARCH_FIELD_WEIGHTS.items():
+            part = SearchVector(field, weight=weight, config=self.config)
+            vector = part if vector is None else vector + part
+        return vector
+
+    def search(self, queryset, query):
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        search_query = SearchQuery(query, search_type="websearch", config=self.config)
+        return queryset.filter(search_vector=search_query).annotate(
+            search_rank=SearchRank(F("search_vector"), search_query)
+        )
+
+    def autocomplete(self, queryset, query, limit=10):
+        from django.contrib.postgres.search import TrigramSimilarity
+
+        return (
+            queryset.annotate(search_rank=TrigramSimilarity("name", query))
+            .filter(
+                Q(name__istartswith=query)
+                | Q(search_rank__gt=self.autocomplete_threshold)
+            )
+            .order_by("-search_rank", "name")[:limit]
+        )
+
+    def update_index(self, product_ids):
+        from .models import Product
+
+        Product.all_objects.filter(pk__in=product_ids).update(
+            search_vector=self.get_search_vector()
+        )
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """
+    Pure-Python fallback for databases without full-text search (SQLite).
+    Candidate rows are scored in memory and the queryset is filtered to
+    the matching ids, ordered by score.
+    """
+
+    weights = {"A": 1.0, "B": 0.4, "C": 0.1}
+
+    def score(self, row, terms):
+        score = 0.0
+        for field, weight in SEARCH_FIELD_WEIGHTS.items():
+            tokens = tokenize(row[field])
+            for term in terms:
+                if any(token.startswith(term) for token in tokens):
+                    score += self.weights[weight]
+        return score
+
+    def rank_queryset(self, queryset, ranked_ids):
+        if not ranked_ids:
+            return queryset.none().annotate(
+                search_rank=Value(0, output_field=IntegerField())
+            )
+        rank = Case(
+            *[
+                When(pk=pk, then=Value(len(ranked_ids) - position))
+                for position, pk in enumerate(ranked_ids)
+            ],
+            output_field=IntegerField(),
+        )
+        return queryset.filter(pk__in=ranked_ids).annotate(search_rank=rank)
+
+    def search(self, queryset, query):
+        terms = tokenize(query)
+        if not terms:
+            return self.rank_queryset(queryset, [])
+
+        scored = []
+        rows = queryset.order_by().values("pk", *SEARCH_FIELD_WEIGHTS)
+        for row in rows.iterator():
+            tokens = set()
+            for field in SEARCH_FIELD_WEIGHTS:
+                tokens.update(tokenize(row[field]))
+            if all(any(token.startswith(term) for token in tokens) for term in terms):
+                scored.append((self.score(row, terms), row["pk"]))
+
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return self.rank_queryset(queryset, [pk for _, pk in scored])
+
+    def autocomplete(self, queryset, query, limit=10):
+        prefix = query.strip().lower()
+        if not prefix:
+            return self.rank_queryset(queryset, [])[:limit]
+
+        scored = []
+        for pk, name in queryset.order_by().values_list("pk", "name").iterator():
+            similarity = trigram_similarity(name, query)
+            if name.lower().startswith(prefix) or similarity > self.autocomplete_threshold:
+                scored.append((similarity, name, pk))
+
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        ranked_ids = [pk for _, _, pk in scored[:limit]]
+        return self.rank_queryset(queryset, ranked_ids).order_by("-search_rank")
+
+
+@lru_cache(maxsize=None)
+def load_search_backend(path):
+    """Instantiate a search backend from its dotted path."""
+    return import_string(path)()
+
+
+def get_search_backend():
+    """
+    Return the configured product search backend.
+    Defaults to Postgres full-text search on PostgreSQL and the
+    in-memory backend everywhere else.
+    """
+    path = getattr(settings, "PRODUCT_SEARCH_BACKEND", "")
+    if not path:
+        if connection.vendor == "postgresql":
+            path = "apps.products.search.PostgresSearchBackend"
+        else:
+            path = "apps.products.search.SimpleSearchBackend"
+    return load_search_backend(path)
@@ -3,15 +3,138 @@ File: backend/apps/products/serializers.py
 Purpose: Serializers for product models
 """
 
+from django.conf import settings
 from rest_framework import serializers
+from apps.core.storage import build_media_url
+from .images import ImageDerivatives
 from .models import Category, Product, ProductImage, ProductVariant
 
 
+def get_prefetched(obj, relation):
+    """
+    Return the prefetched list for a relation, or None if the relation
+    was not prefetched on this instance.
+    """
+    cache = getattr(obj, "_prefetched_objects_cache", None) or {}
+    if relation in cache:
+        return list(cache[relation])
+    return None
+
+
+def build_image_url(image, request):
+    """Return the absolute URL of an image file when a request is available."""
+    if not image:
+        return None
+    return build_media_url(image.storage, image.name, request)
+
+
+class MediaImageField(serializers.ImageField):
+    """Image field whose URL is built from the storage's URL prefix."""
+
+    def to_representation(self, value):
+        return build_image_url(value, self.context.get("request"))
+
+
+class PrimaryImageField(serializers.ReadOnlyField):
+    """
+    Resolve the primary product image URL, preferring its listing-sized
+    derivative (IMAGE_LIST_DERIVATIVE) over the original upload.
+    Uses prefetched images when available, otherwise a single query.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs["source"] = "*"
+        super().__init__(**kwargs)
+
+    def get_primary_image(self, obj):
+        images = get_prefetched(obj, "images")
+        if images is not None:
+            images = [image for image in images if not image.is_deleted]
+            primary_image = next(
+                (image for image in images if image.is_primary), None
+            )
+            if primary_image is None and images:
+                primary_image = min(images, key=lambda image: (image.order, image.id))
+        else:
+            primary_image = obj.images.order_by("-is_primary", "order", "id").first()
+        return primary_image
+
+    def to_representation(self, obj):
+        primary_image = self.get_primary_image(obj)
+        if primary_image is None:
+            return None
+
+        request = self.context.get("request")
+        sources = ImageDerivatives.get_sources(
+            primary_image.image, primary_image.image_derivatives, request
+        )
+        size = getattr(settings, "IMAGE_LIST_DERIVATIVE", "card")
+        if sources and "jpeg" in sources["sizes"].get(size, {}):
+            return sources["sizes"][size]["jpeg"]
+        return build_image_url(primary_image.image, request)
+
+
+class PrimaryImageSourcesField(PrimaryImageField):
+    """Srcset data of the primary product image, None until generated."""
+
+    def to_representation(self, obj):
+        primary_image = self.get_primary_image(obj)
+        if primary_image is None:
+            return None
+        return ImageDerivatives.get_sources(
+            primary_image.image, primary_image.image_derivatives, self.context.get("request")
+        )
+
+
+class AvailableVariantsField(serializers.ReadOnlyField):
+    """
+    Base field for values derived from in-stock active variants.
+    Uses prefetched variants when available, otherwise a single query.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs["source"] = "*"
+        super().__init__(**kwargs)
+
+    def get_available_variants(self, obj):
+        variants = get_prefetched(obj, "variants")
+        if variants is None:
+            variants = obj.variants.filter(is_active=True, stock_quantity__gt=0)
+        return [
+            variant
+            for variant in variants
+            if not variant.is_deleted and variant.is_active and variant.stock_quantity > 0
+        ]
+
+
+class AvailableSizesField(AvailableVariantsField):
+    """List of distinct sizes that are in stock."""
+
+    def to_representation(self, obj):
+        sizes = []
+        for variant in self.get_available_variants(obj):
+            if variant.size not in sizes:
+                sizes.append(variant.size)
+        return sizes
+
+
+class AvailableColorsField(AvailableVariantsField):
+    """List of distinct color/hex pairs that are in stock."""
+
+    def to_representation(self, obj):
+        colors = []
+        for variant in self.get_available_variants(obj):
+            color = {"color": variant.color, "color_hex": variant.color_hex}
+            if color not in colors:
+                colors.append(color)
+        return colors
+
+
 class CategorySerializer(serializers.ModelSerializer):
     """Serializer for Category model."""
 
-    children_count = serializers.SerializerMethodField()
-    products_count = serializers.SerializerMethodField()
+    image = MediaImageField(required=False, allow_null=True)
+    image_sources = serializers.SerializerMethodField()
 
     class Meta:
         model = Category
@@ -22,33 +145,53 @@ class CategorySerializer(serializers.ModelSerializer):
             "description",
             "parent",
             "image",
+            "image_sources",
             "is_active",
             "order",
             "children_count",
             "products_count",
             "created_at",
         ]
-        read_only_fields = ["id", "created_at"]
+        read_only_fields = ["id", "children_count", "products_count", "created_at"]
+
+    def get_image_sources(self, obj):
+        """Get srcset data for the category image."""
+        return ImageDerivatives.get_sources(
+            obj.image, obj.image_derivatives, self.context.get("request")
+        )
+
+
+class CategoryTreeSerializer(CategorySerializer):
+    """
+    Serializer for a nested category tree.
+    Children are read from ``tree_children`` assembled by
+    CategoryService.build_category_tree, so no queries are issued.
+    """
 
-    def get_children_count(self, obj):
-        """Get count of child categories."""
-        return obj.children.filter(is_deleted=False, is_active=True).count()
+    children = serializers.SerializerMethodField()
 
-    def get_products_count(self, obj):
-        """Get count of products in category."""
-        return obj.products.filter(is_deleted=False, is_active=True).count()
+    class Meta(CategorySerializer.Meta):
+        fields = CategorySerializer.Meta.fields + ["depth", "children"]
+
+    def get_children(self, obj):
+        """Get nested child categories."""
+        return CategoryTreeSerializer(
+            getattr(obj, "tree_children", []), many=True, context=self.context
+        ).data
 
 
 class ProductImageSerializer(serializers.ModelSerializer):
     """Serializer for ProductImage model."""
     
     image = serializers.SerializerMethodField()
+    sources = serializers.SerializerMethodField()
 
     class Meta:
         model = ProductImage
         fields = [
             "id",
             "image",
+            "sources",
             "alt_text",
             "is_primary",
             "order",
@@ -57,12 +200,13 @@ class ProductImageSerializer(serializers.ModelSerializer):
     
     def get_image(self, obj):
         """Get absolute URL for image."""
-        request = self.context.get('request')
-        if obj.image and request:
-            return request.build_absolute_uri(obj.image.url)
-        elif obj.image:
-            return obj.image.url
-        return None
+        return build_image_url(obj.image, self.context.get("request"))
+
+    def get_sources(self, obj):
+        """Get srcset data for the image."""
+        return ImageDerivatives.get_sources(
+            obj.image, obj.image_derivatives, self.context.get("request")
+        )
 
 
 class ProductVariantSerializer(serializers.ModelSerializer):
@@ -94,11 +238,12 @@ class ProductListSerializer(serializers.ModelSerializer):
     """Serializer for product list view."""
 
     category_name = serializers.CharField(source="category.name", read_only=True)
-    primary_image = serializers.SerializerMethodField()
+    primary_image = PrimaryImageField()
+    primary_image_sources = PrimaryImageSourcesField()
     is_on_sale = serializers.BooleanField(read_only=True)
     discount_percentage = serializers.IntegerField(read_only=True)
     is_in_stock = serializers.BooleanField(read_only=True)
-    stock_quantity = serializers.IntegerField(read_only=True)  # This is now a property
+    stock_quantity = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Product
@@ -113,30 +258,13 @@ class ProductListSerializer(serializers.ModelSerializer):
             "is_on_sale",
             "discount_percentage",
             "primary_image",
+            "primary_image_sources",
             "is_featured",
             "is_in_stock",
             "stock_quantity",
             "brand",
         ]
 
-    def get_primary_image(self, obj):
-        """Get primary product image with absolute URL."""
-        request = self.context.get("request")
-        
-        # Try to get primary image first
-        primary_image = obj.images.filter(is_primary=True, is_deleted=False).first()
-        
-        # If no primary image, get the first available image
-        if not primary_image:
-            primary_image = obj.images.filter(is_deleted=False).order_by('order', 'id').first()
-        
-        if primary_image and primary_image.image:
-            if request:
-                return request.build_absolute_uri(primary_image.image.url)
-            return primary_image.image.url
-        
-        return None
-
 
 class ProductDetailSerializer(serializers.ModelSerializer):
     """Serializer for product detail view."""
@@ -147,9 +275,9 @@ class ProductDetailSerializer(serializers.ModelSerializer):
     is_on_sale = serializers.BooleanField(read_only=True)
     discount_percentage = serializers.IntegerField(read_only=True)
     is_in_stock = serializers.BooleanField(read_only=True)
-    stock_quantity = serializers.IntegerField(read_only=True)  # This is now a property
-    available_sizes = serializers.SerializerMethodField()
-    available_colors = serializers.SerializerMethodField()
+    stock_quantity = serializers.IntegerField(read_only=True)
+    available_sizes = AvailableSizesField()
+    available_colors = AvailableColorsField()
 
     class Meta:
         model = Product
@@ -178,18 +306,3 @@ class ProductDetailSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
         ]
-
-    def get_available_sizes(self, obj):
-        """Get list of available sizes."""
-        return list(
-            obj.variants.filter(is_deleted=False, is_active=True, stock_quantity__gt=0)
-            .values_list("size", flat=True)
-            .distinct()
-        )
-
-    def get_available_colors(self, obj):
-        """Get list of available colors."""
-        colors = obj.variants.filter(
-            is_deleted=False, is_active=True, stock_quantity__gt=0
-        ).values("color", "color_hex").distinct()
-        return list(colors)
@@ -1,6 +1,15 @@
-from django.db.models import Q, Prefetch
+import logging
+import time
+from collections import defaultdict
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Prefetch
 from apps.core.exceptions import NotFoundError, ValidationError
+from apps.core.replicas import without_pinning
 from .models import Product, ProductImage, ProductVariant, Category
+from .search import get_search_backend
+
+logger = logging.getLogger(__name__)
 
 
 class ProductService:
@@ -14,19 +23,19 @@ class ProductService:
         queryset = Product.objects.select_related("category").prefetch_related(
             Prefetch(
                 "images",
-                queryset=ProductImage.objects.filter(is_deleted=False).order_by(
+                queryset=ProductImage.objects.order_by(
                     "-is_primary", "order"
                 ),
             ),
             Prefetch(
                 "variants",
-                queryset=ProductVariant.objects.filter(is_deleted=False, is_active=True),
+                queryset=ProductVariant.objects.filter(is_active=True),
             ),
-        ).filter(is_deleted=False, is_active=True)
+        ).filter(is_active=True)
 
         if filters:
             if filters.get("category"):
-                queryset = queryset.filter(category__slug=filters["category"])
+                queryset = queryset.filter(Category.subtree_filter(filters["category"]))
             if filters.get("gender"):
                 queryset = queryset.filter(gender=filters["gender"])
             if filters.get("min_price"):
@@ -34,23 +43,17 @@ class ProductService:
             if filters.get("max_price"):
                 queryset = queryset.filter(price__lte=filters["max_price"])
             if filters.get("search"):
-                search_term = filters["search"]
-                queryset = queryset.filter(
-                    Q(name__icontains=search_term)
-                    | Q(description__icontains=search_term)
-                    | Q(brand__icontains=search_term)
-                )
+                queryset = get_search_backend().search(queryset, filters["search"])
 
             if filters.get("is_featured"):
                 queryset = queryset.filter(is_featured=True)
 
             if filters.get("in_stock_only"):
-                # Filter products that have variants with stock
+                queryset = queryset.filter(has_stock=True)
+            if filters.get("sizes") or filters.get("colors"):
                 queryset = queryset.filter(
-                    variants__is_deleted=False,
-                    variants__is_active=True,
-                    variants__stock_quantity__gt=0
-                ).distinct()
+                    Product.variant_available(filters.get("sizes"), filters.get("colors"))
+                )
 
             if filters.get("brand"):
                 queryset = queryset.filter(brand=filters["brand"])
@@ -66,23 +69,41 @@ class ProductService:
             product = Product.objects.select_related("category").prefetch_related(
                 Prefetch(
                     "images",
-                    queryset=ProductImage.objects.filter(is_deleted=False).order_by(
+                    queryset=ProductImage.objects.order_by(
                         "-is_primary", "order"
                     ),
                 ),
                 Prefetch(
                     "variants",
-                    queryset=ProductVariant.objects.filter(is_deleted=False, is_active=True),
+                    queryset=ProductVariant.objects.filter(is_active=True),
                 ),
-            ).get(slug=slug, is_deleted=False, is_active=True)
+            ).get(slug=slug, is_active=True)
 
             # Increment views count
-            product.increment_views()
+            ProductViewCounter.record_view(product.pk)
 
             return product
         except Product.DoesNotExist:
             raise NotFoundError("Product not found")
 
+    @staticmethod
+    def search_products(query, limit=10):
+        """
+        Get products ranked by relevance to the search query.
+        """
+        return ProductService.get_products_queryset({"search": query}).order_by(
+            "-search_rank", "-created_at"
+        )[:limit]
+
+    @staticmethod
+    def autocomplete_products(query, limit=10):
+        """
+        Get products whose name starts with or closely resembles the query.
+        """
+        return get_search_backend().autocomplete(
+            ProductService.get_products_queryset(), query, limit=limit
+        )
+
     @staticmethod
     def get_featured_products(limit=8):
         """
@@ -110,7 +131,7 @@ class ProductService:
         """
         try:
             variant = ProductVariant.objects.get(
-                id=variant_id, is_deleted=False, is_active=True
+                id=variant_id, is_active=True
             )
 
             if not variant.is_in_stock:
@@ -136,7 +157,6 @@ class ProductService:
                 product_id=product_id,
                 size=size,
                 color=color,
-                is_deleted=False,
                 is_active=True,
             )
             return variant
@@ -155,11 +175,36 @@ class CategoryService:
         Get hierarchical category tree.
         """
         root_categories = Category.objects.filter(
-            parent=None, is_deleted=False, is_active=True
-        ).prefetch_related("children")
+            parent=None, is_active=True
+        )
 
         return root_categories
 
+    @staticmethod
+    def build_category_tree():
+        """
+        Build the nested tree of active categories from a single query.
+        Returns root categories with children attached as ``tree_children``.
+        """
+        categories = list(Category.objects.filter(is_active=True).order_by("path"))
+        by_id = {category.id: category for category in categories}
+        roots = []
+
+        for category in categories:
+            category.tree_children = []
+        for category in categories:
+            parent = by_id.get(category.parent_id)
+            if parent is not None:
+                parent.tree_children.append(category)
+            elif category.parent_id is None:
+                roots.append(category)
+
+        sort_key = lambda category: (category.order, category.name)
+        for category in categories:
+            category.tree_children.sort(key=sort_key)
+        roots.sort(key=sort_key)
+        return roots
+
     @staticmethod
     def get_category_by_slug(slug):
         """
@@ -167,7 +212,7 @@ class CategoryService:
         """
         try:
             category = Category.objects.get(
-                slug=slug, is_deleted=False, is_active=True
+                slug=slug, is_active=True
             )
             return category
         except Category.DoesNotExist:
@@ -181,3 +226,129 @@ class CategoryService:
         category = CategoryService.get_category_by_slug(slug)
         products = ProductService.get_products_queryset({"category": slug})
         return category, products
+
+
+class ProductViewCounter:
+    """
+    Buffered product view counter.
+
+    Views are accumulated in the cache with atomic ``incr`` in time
+    buckets of PRODUCT_VIEWS_FLUSH_INTERVAL seconds. Closed buckets are
+    flushed to the database in batches with ``F()`` updates. When
+    PRODUCT_VIEWS_BUFFERED is off (the default, as buffering needs a
+    cache shared with the worker running the flush), views are written
+    synchronously.
+    """
+
+    key_prefix = "product_views"
+
+    @staticmethod
+    def get_interval():
+        return getattr(settings, "PRODUCT_VIEWS_FLUSH_INTERVAL", 60)
+
+    @staticmethod
+    def get_bucket(now=None):
+        """Return the bucket number for the given timestamp."""
+        return int((now or time.time()) // ProductViewCounter.get_interval())
+
+    @staticmethod
+    def get_key_timeout():
+        # Keep buckets long enough to survive a few missed flushes
+        return ProductViewCounter.get_interval() * 60
+
+    @staticmethod
+    def make_key(bucket, *parts):
+        return ":".join([ProductViewCounter.key_prefix, str(bucket), *map(str, parts)])
+
+    @staticmethod
+    def increment(product_id):
+        """Write one view straight to the database."""
+        # Viewers never read the counter back, so do not pin them to the primary
+        with without_pinning():
+            Product.all_objects.filter(pk=product_id).update(
+                views_count=F("views_count") + 1
+            )
+
+    @staticmethod
+    def record_view(product_id):
+        """Count one view of the product."""
+        if not getattr(settings, "PRODUCT_VIEWS_BUFFERED", False):
+            ProductViewCounter.increment(product_id)
+            return
+
+        bucket = ProductViewCounter.get_bucket()
+        timeout = ProductViewCounter.get_key_timeout()
+        key = ProductViewCounter.make_key(bucket, "count", product_id)
+
+        if cache.add(key, 0, timeout):
+            # First view in this bucket: register the product for flushing
+            seq_key = ProductViewCounter.make_key(bucket, "seq")
+            cache.add(seq_key, 0, timeout)
+            slot = cache.incr(seq_key)
+            cache.set(
+                ProductViewCounter.make_key(bucket, "slot", slot), product_id, timeout
+            )
+
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Key evicted between add and incr; fall back to a direct write
+            ProductViewCounter.increment(product_id)
+
+    @staticmethod
+    def collect_bucket(bucket):
+        """Return {product_id: views} accumulated in a bucket."""
+        seq = cache.get(ProductViewCounter.make_key(bucket, "seq")) or 0
+        if not seq:
+            return {}
+
+        slot_keys = [
+            ProductViewCounter.make_key(bucket, "slot", slot)
+            for slot in range(1, seq + 1)
+        ]
+        product_ids = set(cache.get_many(slot_keys).values())
+        count_keys = {
+            ProductViewCounter.make_key(bucket, "count", product_id): product_id
+            for product_id in product_ids
+        }
+        counts = cache.get_many(list(count_keys))
+
+        cache.delete_many(
+            slot_keys + list(count_keys) + [ProductViewCounter.make_key(bucket, "seq")]
+        )
+        return {count_keys[key]: value for key, value in counts.items() if value}
+
+    @staticmethod
+    def flush(now=None):
+        """
+        Write accumulated views of all closed buckets to the database.
+        The current and previous buckets are left alone so in-flight
+        increments are never lost. Returns the number of views flushed.
+        """
+        current = ProductViewCounter.get_bucket(now)
+        last_key = f"{ProductViewCounter.key_prefix}:flushed"
+        lookback = ProductViewCounter.get_key_timeout() // ProductViewCounter.get_interval()
+        start = max(cache.get(last_key, current - lookback), current - lookback) + 1
+        end = current - 2
+
+        totals = defaultdict(int)
+        for bucket in range(start, end + 1):
+            for product_id, views in ProductViewCounter.collect_bucket(bucket).items():
+                totals[product_id] += views
+
+        # Group products by increment so each distinct value costs one UPDATE
+        by_increment = defaultdict(list)
+        for product_id, views in totals.items():
+            by_increment[views].append(product_id)
+        for views, product_ids in by_increment.items():
+            Product.all_objects.filter(pk__in=product_ids).update(
+                views_count=F("views_count") + views
+            )
+
+        if end >= start:
+            cache.set(last_key, end, None)
+
+        flushed = sum(totals.values())
+        if flushed:
+            logger.info(f"Flushed {flushed} product views for {len(totals)} products")
+        return flushed
@@ -5,14 +5,79 @@ Purpose: Signal handlers for product models
 
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import ProductVariant
+from .cache import ProductCache
+from .images import ImageDerivatives
+from .models import Category, Product, ProductImage, ProductVariant
+from .search import SEARCH_FIELD_WEIGHTS, get_search_backend
 
 
 @receiver([post_save, post_delete], sender=ProductVariant)
 def update_product_cache(sender, instance, **kwargs):
     """
-    Clear product cache when variant changes.
-    Note: stock_quantity is now a property, so no direct update needed.
-    This signal can be used for cache invalidation if caching is implemented.
+    Keep the denormalized stock aggregate on the parent product in sync.
+    Runs inside the caller's transaction, so the aggregate commits
+    or rolls back together with the variant write. Refreshing the
+    aggregate also invalidates the product's cached payloads.
     """
-    pass  # Stock is calculated dynamically via property
\ No newline at end of file
+    Product.refresh_stock([instance.product_id])
+
+
+@receiver(post_save, sender=Product)
+def update_product_search_index(sender, instance, update_fields=None, **kwargs):
+    """Refresh the stored search vector when a searchable field may have changed."""
+    if update_fields is not None and not set(update_fields) & set(SEARCH_FIELD_WEIGHTS):
+        return
+    get_search_backend().update_index([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_product_payloads(sender, instance, **kwargs):
+    """Invalidate cached payloads of a product when it changes."""
+    ProductCache.invalidate_products([instance.pk])
+
+
+# Fields whose changes can alter category children or product counts
+CATEGORY_COUNT_FIELDS = {
+    Product: {"category", "is_active", "is_deleted"},
+    Category: {"parent", "is_active", "is_deleted"},
+}
+
+
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=Category)
+def update_category_counts(sender, instance, update_fields=None, **kwargs):
+    """
+    Keep denormalized category children and product counts in sync,
+    recounting only the categories whose counts the write can change:
+    a product's category (and the one it left) with their ancestors, or
+    a category, its parent and its ancestors.
+    """
+    if update_fields is not None and not set(update_fields) & CATEGORY_COUNT_FIELDS[sender]:
+        return
+    if sender is Product:
+        category_ids = {instance.category_id, getattr(instance, "loaded_category_id", None)}
+        instance.loaded_category_id = instance.category_id
+        Category.refresh_counts(Category.get_chain_ids(category_ids - {None}))
+    else:
+        Category.refresh_counts(
+            [*instance.get_ancestor_ids(), instance.pk, instance.parent_id]
+        )
+
+
+@receiver([post_save, post_delete], sender=ProductImage)
+def invalidate_product_image_payloads(sender, instance, **kwargs):
+    """Invalidate cached payloads of a product when its images change."""
+    ProductCache.invalidate_products([instance.product_id])
+
+
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_category_payloads(sender, instance, **kwargs):
+    """Invalidate every cached payload embedding category data."""
+    ProductCache.invalidate_categories()
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_save, sender=Category)
+def schedule_image_derivatives(sender, instance, **kwargs):
+    """Generate resized versions of a new or replaced image after commit."""
+    ImageDerivatives.schedule(instance)
@@ -0,0 +1,20 @@
+"""
+File: backend/apps/products/tasks.py
+Purpose: Celery tasks for product models
+"""
+
+from celery import shared_task
+from .images import ImageDerivatives
+from .services import ProductViewCounter
+
+
+@shared_task
+def flush_product_views():
+    """Write buffered product views to the database."""
+    return ProductViewCounter.flush()
+
+
+@shared_task
+def generate_image_derivatives(label, pk):
+    """Render the resized versions of an uploaded product or category image."""
+    return ImageDerivatives.process(label, pk)
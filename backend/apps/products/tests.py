@@ -1,3 +1,950 @@
-from django.test import TestCase
+import shutil
+import tempfile
+import time
+from decimal import Decimal
+from io import BytesIO, StringIO
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.authentication.models import User
+from apps.orders.services import OrderService
+from .cache import ProductCache
+from .checks import check_buffered_views_cache, check_payload_cache
+from .images import ImageDerivatives
+from .models import Category, Product, ProductImage, ProductVariant
+from .services import ProductService, ProductViewCounter
 
-# Create your tests here.
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ProductQueryCountTests(TestCase):
+    """
+    Regression tests asserting that product listing endpoints
+    run a constant number of queries regardless of result size.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Shirts")
+        cls.product = cls.create_products(1)[0]
+
+    @classmethod
+    def create_products(cls, count, offset=0):
+        products = []
+        for index in range(offset, offset + count):
+            product = Product.objects.create(
+                name=f"Shirt {index}",
+                description="Cotton shirt",
+                category=cls.category,
+                gender="men",
+                price=Decimal("20.00"),
+                sku=f"SHIRT-{index}",
+                brand="Acme",
+                is_featured=True,
+            )
+            ProductImage.objects.create(
+                product=product, image=f"products/shirt-{index}.jpg", is_primary=True
+            )
+            ProductImage.objects.create(
+                product=product, image=f"products/shirt-{index}-back.jpg", order=1
+            )
+            for size in ["S", "M"]:
+                ProductVariant.objects.create(
+                    product=product,
+                    size=size,
+                    color="Blue",
+                    color_hex="#0000ff",
+                    sku=f"SHIRT-{index}-{size}",
+                    stock_quantity=5,
+                )
+            products.append(product)
+        return products
+
+    def count_queries(self, url, params=None):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def assert_constant_queries(self, url, params_small, params_large):
+        small = self.count_queries(url, params_small)
+        self.create_products(10, offset=100)
+        large = self.count_queries(url, params_large)
+        self.assertEqual(small, large)
+
+    def test_product_list_queries_are_constant(self):
+        self.assert_constant_queries(
+            reverse("products:product-list"), {"page_size": 1}, {"page_size": 11}
+        )
+
+    def test_featured_products_queries_are_constant(self):
+        self.assert_constant_queries(
+            reverse("products:featured-products"), {"limit": 1}, {"limit": 11}
+        )
+
+    def test_related_products_queries_are_constant(self):
+        self.create_products(1, offset=50)
+        self.assert_constant_queries(
+            reverse("products:related-products", args=[self.product.slug]),
+            {"limit": 1},
+            {"limit": 11},
+        )
+
+    def test_product_search_queries_are_constant(self):
+        self.assert_constant_queries(
+            reverse("products:product-search"), {"q": "Shirt"}, {"q": "Shirt"}
+        )
+
+    def test_primary_image_resolved_from_prefetch(self):
+        response = self.client.get(reverse("products:product-list"))
+        result = response.json()["data"]["results"][0]
+        self.assertTrue(result["primary_image"].endswith("products/shirt-0.jpg"))
+        self.assertEqual(result["stock_quantity"], 10)
+        self.assertTrue(result["is_in_stock"])
+
+
+class StockAggregateTests(TestCase):
+    """Tests for the denormalized stock aggregate on products."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="stock@example.com", password="x-Passw0rd")
+        category = Category.objects.create(name="Shirts")
+        cls.product = Product.objects.create(
+            name="Shirt",
+            description="Shirt",
+            category=category,
+            gender="men",
+            price=Decimal("10.00"),
+            sku="STOCK",
+        )
+        cls.variant = ProductVariant.objects.create(
+            product=cls.product, size="M", color="Red", sku="STOCK-M", stock_quantity=5
+        )
+        ProductVariant.objects.create(
+            product=cls.product, size="L", color="Red", sku="STOCK-L", stock_quantity=0
+        )
+
+    def assertStock(self, total_stock, has_stock, variants_count):
+        self.product.refresh_from_db()
+        self.assertEqual(
+            (self.product.total_stock, self.product.has_stock, self.product.variants_count),
+            (total_stock, has_stock, variants_count),
+        )
+
+    def place_order(self, quantity):
+        return OrderService.create_order(
+            self.user,
+            {
+                "items": [
+                    {
+                        "product_id": self.product.pk,
+                        "variant_id": self.variant.pk,
+                        "quantity": quantity,
+                        "price": self.variant.final_price,
+                    }
+                ],
+                "shipping_first_name": "Jane",
+                "shipping_last_name": "Doe",
+                "shipping_email": "jane@example.com",
+                "shipping_phone": "+15550000000",
+                "shipping_address": "1 Main St",
+                "shipping_city": "Springfield",
+                "shipping_state": "IL",
+                "shipping_postal_code": "62701",
+                "shipping_country": "US",
+            },
+        )
+
+    def test_variant_saves_update_aggregate(self):
+        self.assertStock(5, True, 2)
+
+        self.variant.stock_quantity = 3
+        self.variant.save()
+        self.assertStock(3, True, 2)
+
+    def test_full_product_save_keeps_aggregate(self):
+        stale = Product.objects.get(pk=self.product.pk)
+        ProductVariant.objects.create(
+            product=self.product, size="S", color="Red", sku="STOCK-S", stock_quantity=2
+        )
+
+        stale.name = "Renamed shirt"
+        stale.save()
+
+        self.assertStock(7, True, 3)
+        self.assertEqual(self.product.name, "Renamed shirt")
+
+    def test_variant_delete_updates_aggregate(self):
+        self.variant.delete()
+        self.assertStock(0, False, 1)
+
+    def test_refresh_stock_repairs_drift(self):
+        Product.objects.filter(pk=self.product.pk).update(total_stock=99, has_stock=False)
+
+        self.assertEqual(Product.refresh_stock([self.product.pk, None]), 1)
+        self.assertStock(5, True, 2)
+        self.assertEqual(Product.refresh_stock([]), 0)
+
+    def test_checkout_and_cancel_update_aggregate(self):
+        order = self.place_order(5)
+        self.assertStock(0, False, 2)
+
+        OrderService.cancel_order(self.user, order.pk)
+        self.assertStock(5, True, 2)
+
+    def test_recompute_stock_command(self):
+        Product.objects.filter(pk=self.product.pk).update(total_stock=99)
+
+        out = StringIO()
+        call_command("recompute_stock", "--dry-run", stdout=out)
+        self.assertIn("1 product(s) need recomputing", out.getvalue())
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.total_stock, 99)
+
+        call_command("recompute_stock", stdout=StringIO())
+        self.assertStock(5, True, 2)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class SimpleSearchBackendTests(TestCase):
+    """Tests for the in-memory search backend used on SQLite."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Outerwear")
+        for index, (name, brand, description) in enumerate(
+            [
+                ("Denim Jacket", "Levis", "Classic blue jacket"),
+                ("Rain Coat", "Denimco", "Waterproof coat"),
+                ("Wool Sweater", "Acme", "Warm sweater that pairs with denim"),
+            ]
+        ):
+            Product.objects.create(
+                name=name,
+                description=description,
+                category=category,
+                gender="unisex",
+                price=Decimal("50.00"),
+                sku=f"OUT-{index}",
+                brand=brand,
+            )
+
+    def test_search_ranks_name_over_brand_over_description(self):
+        response = self.client.get(reverse("products:product-list"), {"search": "denim"})
+        names = [item["name"] for item in response.json()["data"]["results"]]
+        self.assertEqual(names, ["Denim Jacket", "Rain Coat", "Wool Sweater"])
+
+    def test_explicit_ordering_overrides_rank(self):
+        response = self.client.get(
+            reverse("products:product-list"), {"search": "denim", "ordering": "-name"}
+        )
+        names = [item["name"] for item in response.json()["data"]["results"]]
+        self.assertEqual(names, ["Wool Sweater", "Rain Coat", "Denim Jacket"])
+
+    def test_autocomplete_matches_prefix_and_typos(self):
+        url = reverse("products:product-search")
+        response = self.client.get(url, {"q": "wo", "mode": "autocomplete"})
+        self.assertEqual([item["name"] for item in response.json()["data"]], ["Wool Sweater"])
+
+        response = self.client.get(url, {"q": "jackett", "mode": "autocomplete"})
+        self.assertEqual([item["name"] for item in response.json()["data"]], ["Denim Jacket"])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ProductCursorPaginationTests(TestCase):
+    """Tests for keyset pagination on the product list."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Hats")
+        for index in range(7):
+            Product.objects.create(
+                name=f"Hat {index}",
+                description="Hat",
+                category=category,
+                gender="unisex",
+                price=Decimal("10.00") + index // 3,
+                sku=f"HAT-{index}",
+            )
+
+    def fetch(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()["data"]
+
+    def walk(self, params):
+        url = reverse("products:product-list")
+        data = self.fetch(url, {"pagination": "cursor", "page_size": 3, **params})
+        pages = [data]
+        while data["next"]:
+            data = self.fetch(data["next"])
+            pages.append(data)
+        return pages
+
+    def test_cursor_pages_follow_ordering_with_pk_tiebreaker(self):
+        for ordering in ["price", "-price", "name", "-created_at"]:
+            pages = self.walk({"ordering": ordering})
+            cursor_ids = [item["id"] for page in pages for item in page["results"]]
+
+            tiebreaker = "-pk" if ordering.startswith("-") else "pk"
+            expected = list(
+                Product.objects.order_by(ordering, tiebreaker).values_list("pk", flat=True)
+            )
+            self.assertEqual(len(cursor_ids), 7)
+            self.assertEqual(len(set(cursor_ids)), 7)
+            self.assertEqual(cursor_ids, expected)
+
+    def test_previous_link_returns_prior_page(self):
+        pages = self.walk({"ordering": "price"})
+        self.assertIsNone(pages[0]["previous"])
+        previous = self.fetch(pages[1]["previous"])
+        self.assertEqual(previous["results"], pages[0]["results"])
+        self.assertIsNotNone(previous["next"])
+
+    def test_count_is_optional(self):
+        url = reverse("products:product-list")
+        self.assertIsNone(self.fetch(url, {"pagination": "cursor"})["count"])
+        self.assertEqual(self.fetch(url, {"pagination": "cursor", "count": "exact"})["count"], 7)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(reverse("products:product-list"), {"cursor": "garbage"})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()["success"])
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False, PRODUCT_VIEWS_BUFFERED=True, PRODUCT_VIEWS_FLUSH_INTERVAL=60
+)
+class ProductViewCounterTests(TestCase):
+    """Tests for the buffered product view counter."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Socks")
+        cls.product = Product.objects.create(
+            name="Sock",
+            description="Sock",
+            category=category,
+            gender="unisex",
+            price=Decimal("5.00"),
+            sku="SOCK-1",
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def view_product(self, times):
+        url = reverse("products:product-detail", args=[self.product.slug])
+        for _ in range(times):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_views_are_buffered_until_flush(self):
+        now = time.time()
+        self.view_product(3)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.views_count, 0)
+
+        # Open buckets are left alone for in-flight increments
+        self.assertEqual(ProductViewCounter.flush(), 0)
+        self.assertEqual(ProductViewCounter.flush(now=now + 180), 3)
+        self.assertEqual(ProductViewCounter.flush(now=now + 240), 0)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.views_count, 3)
+
+    def test_views_ordering_uses_flushed_counts(self):
+        now = time.time()
+        self.view_product(2)
+        ProductViewCounter.flush(now=now + 180)
+        response = self.client.get(reverse("products:product-list"), {"ordering": "-views_count"})
+        self.assertEqual(response.json()["data"]["results"][0]["id"], self.product.id)
+
+    @override_settings(PRODUCT_VIEWS_BUFFERED=False)
+    def test_unbuffered_views_are_written_synchronously(self):
+        self.view_product(2)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.views_count, 2)
+
+    def test_check_warns_about_process_local_cache(self):
+        self.assertEqual([m.id for m in check_buffered_views_cache()], ["products.W001"])
+        with override_settings(PRODUCT_VIEWS_BUFFERED=False):
+            self.assertEqual(check_buffered_views_cache(), [])
+
+    def test_payload_cache_check_needs_shared_cache(self):
+        self.assertEqual(check_payload_cache(), [])
+        with override_settings(CACHE_SINGLE_PROCESS=False):
+            self.assertEqual([m.id for m in check_payload_cache()], ["products.W002"])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, PRODUCT_VIEWS_BUFFERED=False)
+class ProductPayloadCacheTests(TestCase):
+    """Tests for the versioned product payload cache."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Scarves")
+        cls.product = Product.objects.create(
+            name="Scarf",
+            description="Scarf",
+            category=cls.category,
+            gender="unisex",
+            price=Decimal("15.00"),
+            sku="SCARF-1",
+        )
+        cls.variant = ProductVariant.objects.create(
+            product=cls.product, size="OS", color="Red", sku="SCARF-1-OS", stock_quantity=3
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.detail_url = reverse("products:product-detail", args=[self.product.slug])
+
+    def test_detail_hit_skips_queries_but_counts_view(self):
+        self.client.get(self.detail_url)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.detail_url)
+        self.assertEqual(response.json()["data"]["id"], self.product.id)
+        # The conditional GET fingerprint and the view count update
+        self.assertEqual(len(context.captured_queries), 2)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.views_count, 2)
+
+    def test_variant_write_invalidates_detail_and_list(self):
+        list_url = reverse("products:product-list")
+        self.client.get(self.detail_url)
+        self.client.get(list_url)
+
+        self.variant.stock_quantity = 0
+        self.variant.save()
+
+        detail = self.client.get(self.detail_url).json()["data"]
+        listing = self.client.get(list_url).json()["data"]["results"]
+        self.assertFalse(detail["is_in_stock"])
+        self.assertFalse(listing[0]["is_in_stock"])
+
+    def test_category_write_invalidates_detail(self):
+        self.client.get(self.detail_url)
+        self.category.name = "Wraps"
+        self.category.save()
+        detail = self.client.get(self.detail_url).json()["data"]
+        self.assertEqual(detail["category"]["name"], "Wraps")
+
+    def test_stats_are_exposed_to_staff(self):
+        url = reverse("products:product-cache-stats")
+        self.client.get(self.detail_url)
+        self.client.get(self.detail_url)
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+        staff = User.objects.create_user(email="staff@example.com", password="x", is_staff=True)
+        token = RefreshToken.for_user(staff).access_token
+        response = self.client.get(url, HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.assertEqual(response.json()["data"]["detail"], {"hit": 1, "miss": 1})
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class CategoryTreeTests(TestCase):
+    """Tests for the materialized category tree."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.men = Category.objects.create(name="Men")
+        cls.tops = Category.objects.create(name="Tops", parent=cls.men)
+        cls.tees = Category.objects.create(name="Tees", parent=cls.tops)
+        cls.women = Category.objects.create(name="Women")
+        for index, category in enumerate([cls.men, cls.tops, cls.tees, cls.tees]):
+            Product.objects.create(
+                name=f"Item {index}",
+                description="Item",
+                category=category,
+                gender="men",
+                price=Decimal("9.00"),
+                sku=f"ITEM-{index}",
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_descendants_and_counts(self):
+        self.assertEqual(
+            {category.pk for category in self.men.get_all_children()},
+            {self.tops.pk, self.tees.pk},
+        )
+        self.men.refresh_from_db()
+        self.tops.refresh_from_db()
+        self.assertEqual((self.men.children_count, self.men.products_count), (1, 4))
+        self.assertEqual((self.tops.children_count, self.tops.products_count), (1, 3))
+
+    def test_moving_category_rewrites_subtree(self):
+        self.tops.parent = self.women
+        self.tops.save()
+        self.tees.refresh_from_db()
+        self.women.refresh_from_db()
+        self.assertTrue(self.tees.path.startswith(self.women.path))
+        self.assertEqual(self.tees.depth, 2)
+        self.assertEqual(self.women.products_count, 3)
+        self.men.refresh_from_db()
+        self.assertEqual((self.men.children_count, self.men.products_count), (0, 1))
+
+    def test_moving_under_descendant_is_rejected_before_writing(self):
+        self.men.parent = self.tees
+        with self.assertRaises(ValidationError):
+            self.men.save()
+
+        self.men.refresh_from_db()
+        self.assertIsNone(self.men.parent_id)
+        self.assertEqual(self.men.depth, 0)
+
+    def test_moving_product_recounts_old_and_new_chains(self):
+        product = Product.objects.get(sku="ITEM-3")
+        product.category = self.women
+        product.save()
+
+        counts = dict(Category.objects.values_list("name", "products_count"))
+        self.assertEqual(counts, {"Men": 3, "Tops": 2, "Tees": 1, "Women": 1})
+
+    def test_product_writes_recount_only_affected_categories(self):
+        product = Product.objects.get(sku="ITEM-0")
+        Category.objects.filter(pk=self.women.pk).update(products_count=42)
+
+        product.is_active = False
+        product.save()
+
+        self.men.refresh_from_db()
+        self.women.refresh_from_db()
+        self.assertEqual(self.men.products_count, 3)
+        self.assertEqual(self.women.products_count, 42)
+
+    def test_product_filter_includes_descendants(self):
+        response = self.client.get(reverse("products:product-list"), {"category": self.men.slug})
+        self.assertEqual(response.json()["data"]["count"], 4)
+        response = self.client.get(reverse("products:product-list"), {"category": self.tees.slug})
+        self.assertEqual(response.json()["data"]["count"], 2)
+
+    def test_tree_endpoint_uses_one_query(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse("products:category-tree"))
+        self.assertEqual(len(context.captured_queries), 1)
+        tree = response.json()["data"]
+        self.assertEqual([node["name"] for node in tree], ["Men", "Women"])
+        self.assertEqual(tree[0]["children"][0]["children"][0]["name"], "Tees")
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, PRODUCT_FACET_PRICE_BUCKETS=[25, 50])
+class ProductFacetTests(TestCase):
+    """Tests for facet counts on the product listing."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.clothing = Category.objects.create(name="Clothing")
+        cls.shirts = Category.objects.create(name="Shirts", parent=cls.clothing)
+        cls.shoes = Category.objects.create(name="Shoes")
+        cls.create_product("MEN-1", cls.shirts, "men", "Acme", "20.00", stock=3)
+        cls.create_product("MEN-2", cls.shirts, "men", "Zeta", "40.00", stock=0)
+        cls.create_product("WOMEN-1", cls.clothing, "women", "Acme", "60.00", stock=2)
+        cls.create_product("WOMEN-2", cls.shoes, "women", "Acme", "30.00", stock=1)
+        deleted = cls.create_product("DELETED", cls.shirts, "men", "Acme", "20.00", stock=1)
+        deleted.delete()
+        inactive = cls.create_product("INACTIVE", cls.shirts, "men", "Acme", "20.00", stock=1)
+        inactive.is_active = False
+        inactive.save()
+
+    @classmethod
+    def create_product(cls, sku, category, gender, brand, price, stock):
+        product = Product.objects.create(
+            name=sku,
+            description="Product",
+            category=category,
+            gender=gender,
+            brand=brand,
+            price=Decimal(price),
+            sku=sku,
+        )
+        ProductVariant.objects.create(
+            product=product, size="M", color="Blue", sku=f"{sku}-M", stock_quantity=stock
+        )
+        return product
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse("products:product-list")
+
+    def get_facets(self, **params):
+        response = self.client.get(self.url, {"facets": "true", **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()["data"]
+
+    def test_counts_skip_deleted_and_inactive_products(self):
+        facets = self.get_facets()["facets"]
+
+        self.assertEqual(facets["total"], 4)
+        self.assertEqual(facets["in_stock"], 3)
+        self.assertEqual(
+            {item["value"]: item["count"] for item in facets["gender"]},
+            {"men": 2, "women": 2, "unisex": 0},
+        )
+        self.assertEqual(
+            facets["brand"], [{"value": "Acme", "count": 3}, {"value": "Zeta", "count": 1}]
+        )
+        self.assertEqual(
+            {item["value"]: item["count"] for item in facets["category"]},
+            {"clothing": 3, "shirts": 2, "shoes": 1},
+        )
+        self.assertEqual([bucket["count"] for bucket in facets["price"]], [1, 2, 1])
+
+    def test_facet_ignores_its_own_filter(self):
+        data = self.get_facets(gender="men", in_stock="true")
+        facets = data["facets"]
+
+        self.assertEqual(data["count"], 1)
+        self.assertEqual(facets["total"], 1)
+        self.assertEqual(
+            {item["value"]: item["count"] for item in facets["gender"]},
+            {"men": 1, "women": 2, "unisex": 0},
+        )
+        self.assertEqual(facets["in_stock"], 1)
+        self.assertEqual(facets["brand"], [{"value": "Acme", "count": 1}])
+
+    def test_category_filter_counts_subtree(self):
+        facets = self.get_facets(category="clothing")["facets"]
+
+        self.assertEqual(facets["total"], 3)
+        self.assertEqual(
+            {item["value"]: item["count"] for item in facets["gender"]},
+            {"men": 2, "women": 1, "unisex": 0},
+        )
+
+    def test_query_count_is_fixed(self):
+        with CaptureQueriesContext(connection) as context:
+            self.get_facets()
+        small = len(context.captured_queries)
+
+        for index in range(5):
+            self.create_product(f"EXTRA-{index}", self.shoes, "unisex", f"Brand {index}", "99.00", 1)
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            facets = self.get_facets()["facets"]
+
+        self.assertEqual(len(context.captured_queries), small)
+        self.assertEqual(len(facets["brand"]), 7)
+
+    def test_facets_are_cached_per_filter_signature(self):
+        self.get_facets(gender="men")
+        self.get_facets(gender="men", page=1, ordering="price")
+        self.get_facets(gender="women")
+
+        self.assertEqual(ProductCache.get_stats()["facets"], {"hit": 1, "miss": 2})
+
+        Product.objects.get(sku="MEN-2").delete()
+        self.assertEqual(self.get_facets(gender="men")["facets"]["total"], 1)
+
+    def test_list_without_facets_is_unchanged(self):
+        data = self.client.get(self.url).json()["data"]
+
+        self.assertNotIn("facets", data)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class StockAvailabilityFilterTests(TestCase):
+    """Tests for in-stock and size/color availability filters."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Shirts")
+        cls.blue_m = cls.create_product("BLUE-M", category, [("M", "Blue", 2), ("L", "Red", 0)])
+        cls.split = cls.create_product("SPLIT", category, [("M", "Red", 1), ("L", "Blue", 1)])
+        cls.sold_out = cls.create_product("SOLD-OUT", category, [("M", "Blue", 0)])
+        cls.many = cls.create_product(
+            "MANY", category, [("S", "Blue", 1), ("M", "Blue", 1), ("L", "Blue", 1)]
+        )
+        inactive = cls.create_product("INACTIVE-VARIANT", category, [("M", "Blue", 5)])
+        inactive.variants.update(is_active=False)
+        Product.refresh_stock([inactive.pk])
+        deleted = cls.create_product("DELETED-VARIANT", category, [("M", "Blue", 5)])
+        deleted.variants.get().delete()
+
+    @classmethod
+    def create_product(cls, sku, category, variants):
+        product = Product.objects.create(
+            name=sku, description="Product", category=category, price=Decimal("10.00"), sku=sku
+        )
+        for size, color, stock in variants:
+            ProductVariant.objects.create(
+                product=product,
+                size=size,
+                color=color,
+                sku=f"{sku}-{size}-{color}",
+                stock_quantity=stock,
+            )
+        return product
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse("products:product-list")
+
+    def get_skus(self, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        for query in context.captured_queries:
+            self.assertNotIn("DISTINCT", query["sql"].upper())
+        data = response.json()["data"]
+        skus = {product["name"] for product in data["results"]}
+        self.assertEqual(data["count"], len(skus))
+        return skus
+
+    def test_in_stock_uses_stock_flag(self):
+        self.assertEqual(self.get_skus(in_stock="true"), {"BLUE-M", "SPLIT", "MANY"})
+
+    def test_size_and_color_match_the_same_variant(self):
+        self.assertEqual(self.get_skus(size="M"), {"BLUE-M", "SPLIT", "MANY"})
+        self.assertEqual(self.get_skus(color="Blue"), {"BLUE-M", "SPLIT", "MANY"})
+        self.assertEqual(self.get_skus(size="M", color="Blue"), {"BLUE-M", "MANY"})
+        self.assertEqual(self.get_skus(size="S,L", color="Blue"), {"SPLIT", "MANY"})
+
+    def test_product_with_many_matching_variants_is_listed_once(self):
+        skus = self.get_skus(color="Blue", ordering="price")
+
+        self.assertEqual(skus, {"BLUE-M", "SPLIT", "MANY"})
+
+    def test_service_filters(self):
+        queryset = ProductService.get_products_queryset(
+            {"in_stock_only": True, "sizes": ["M"], "colors": ["Red"]}
+        )
+
+        self.assertEqual({product.sku for product in queryset}, {"SPLIT"})
+        self.assertFalse(queryset.query.distinct)
+
+
+class ImageDerivativeTests(TestCase):
+    """Tests for generated image derivatives and srcset data."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_settings = override_settings(
+            SECURE_SSL_REDIRECT=False,
+            MEDIA_ROOT=cls.media_root,
+            IMAGE_DERIVATIVES_EAGER=True,
+            IMAGE_DERIVATIVE_SIZES={"thumbnail": 200, "card": 400, "zoom": 1600},
+            IMAGE_DERIVATIVE_FORMATS=["webp", "jpeg"],
+        )
+        cls.media_settings.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Shirts")
+        cls.product = Product.objects.create(
+            name="Oxford Shirt",
+            description="Shirt",
+            category=cls.category,
+            price=Decimal("50.00"),
+            sku="OXFORD",
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def make_upload(self, name="photo.png", size=(1000, 800), mode="RGBA"):
+        buffer = BytesIO()
+        Image.new(mode, size, (200, 30, 30, 255) if mode == "RGBA" else (200, 30, 30)).save(
+            buffer, "PNG"
+        )
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+    def create_image(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return ProductImage.objects.create(
+                product=self.product, image=self.make_upload(**kwargs), is_primary=True
+            )
+
+    def test_derivatives_are_generated_after_upload(self):
+        image = self.create_image()
+        image.refresh_from_db()
+        meta = image.image_derivatives
+        storage = image.image.storage
+
+        self.assertEqual(meta["source"], image.image.name)
+        self.assertEqual((meta["width"], meta["height"]), (1000, 800))
+        self.assertEqual(
+            [(item["name"], item["width"], item["height"]) for item in meta["derivatives"]],
+            [("zoom", 1000, 800), ("card", 400, 320), ("thumbnail", 200, 160)],
+        )
+        for item in meta["derivatives"]:
+            self.assertEqual(set(item["files"]), {"webp", "jpeg"})
+            with storage.open(item["files"]["jpeg"]) as fileobj:
+                self.assertEqual(Image.open(fileobj).size, (item["width"], item["height"]))
+
+    def test_serializers_emit_srcset_without_storage_access(self):
+        image = self.create_image()
+        image.refresh_from_db()
+
+        url = reverse("products:product-detail", kwargs={"slug": self.product.slug})
+        detail = self.client.get(url).json()["data"]
+        sources = detail["images"][0]["sources"]
+        listing = self.client.get(reverse("products:product-list")).json()["data"]["results"]
+
+        self.assertEqual(sources["width"], 1000)
+        self.assertEqual(sources["sizes"]["card"]["width"], 400)
+        srcset = sources["srcset"]["webp"].split(", ")
+        self.assertEqual([entry.rsplit(" ", 1)[1] for entry in srcset], ["200w", "400w", "1000w"])
+        self.assertRegex(
+            listing[0]["primary_image"], r"^http://testserver/media/.*/card\.[0-9a-f]{16}\.jpg$"
+        )
+        self.assertEqual(listing[0]["primary_image_sources"], sources)
+
+    def test_replaced_upload_regenerates_and_removes_old_files(self):
+        image = self.create_image()
+        image.refresh_from_db()
+        storage = image.image.storage
+        old_files = ImageDerivatives.get_files(image.image_derivatives)
+
+        image.image = self.make_upload("other.jpg", size=(300, 300), mode="RGB")
+        with self.captureOnCommitCallbacks(execute=True):
+            image.save()
+        image.refresh_from_db()
+
+        self.assertEqual(image.image_derivatives["source"], image.image.name)
+        self.assertEqual(
+            [item["width"] for item in image.image_derivatives["derivatives"]], [300, 300, 200]
+        )
+        self.assertFalse(any(storage.exists(name) for name in old_files))
+
+    def test_listing_falls_back_to_original_until_generated(self):
+        with override_settings(IMAGE_DERIVATIVES_EAGER=False):
+            image = ProductImage.objects.create(
+                product=self.product, image=self.make_upload(), is_primary=True
+            )
+
+        listing = self.client.get(reverse("products:product-list")).json()["data"]["results"]
+
+        self.assertTrue(listing[0]["primary_image"].endswith(image.image.name))
+        self.assertIsNone(listing[0]["primary_image_sources"])
+
+    def test_backfill_command_processes_pending_images(self):
+        image = ProductImage.objects.create(product=self.product, image=self.make_upload())
+        self.category.image = self.make_upload("category.png")
+        self.category.save()
+        missing = ProductImage.objects.create(product=self.product, image="products/missing.jpg")
+
+        with self.assertRaises(CommandError):
+            call_command(
+                "generate_image_derivatives", "--workers", "0", stdout=StringIO(), stderr=StringIO()
+            )
+
+        image.refresh_from_db()
+        self.category.refresh_from_db()
+        missing.refresh_from_db()
+        self.assertEqual(image.image_derivatives["source"], image.image.name)
+        self.assertEqual(self.category.image_derivatives["source"], self.category.image.name)
+        self.assertEqual(missing.image_derivatives, {})
+
+        output = StringIO()
+        call_command(
+            "generate_image_derivatives", "products.Category", "--dry-run", stdout=output
+        )
+        self.assertIn("0 image(s) to process", output.getvalue())
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, PRODUCT_VIEWS_BUFFERED=False)
+class ConditionalGetTests(TestCase):
+    """Tests for ETag/Last-Modified revalidation of catalog endpoints."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Hats")
+        cls.product = Product.objects.create(
+            name="Beanie",
+            description="Beanie",
+            category=cls.category,
+            price=Decimal("12.00"),
+            sku="BEANIE",
+            is_featured=True,
+        )
+        cls.variant = ProductVariant.objects.create(
+            product=cls.product, size="OS", color="Grey", sku="BEANIE-OS", stock_quantity=4
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.urls = {
+            "list": reverse("products:product-list"),
+            "detail": reverse("products:product-detail", args=[self.product.slug]),
+            "categories": reverse("products:category-list"),
+            "featured": reverse("products:featured-products"),
+        }
+
+    def revalidate(self, url, **headers):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, **headers)
+        return response, context.captured_queries
+
+    def test_revalidation_returns_304_without_queries(self):
+        for name in ("list", "categories", "featured"):
+            first = self.client.get(self.urls[name])
+            self.assertEqual(first.status_code, 200)
+            self.assertIn("no-cache", first["Cache-Control"])
+
+            response, queries = self.revalidate(self.urls[name], HTTP_IF_NONE_MATCH=first["ETag"])
+            self.assertEqual(response.status_code, 304, name)
+            self.assertEqual(response["ETag"], first["ETag"])
+            self.assertEqual(response.content, b"")
+            # The fingerprint cached by the first request answers it
+            self.assertEqual(len(queries), 0, name)
+
+    def test_warm_list_hit_runs_no_queries(self):
+        self.client.get(self.urls["list"])
+
+        response, queries = self.revalidate(self.urls["list"])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 0)
+
+    def test_detail_revalidation_counts_view(self):
+        first = self.client.get(self.urls["detail"])
+
+        response, queries = self.revalidate(
+            self.urls["detail"], HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]
+        )
+
+        self.assertEqual(response.status_code, 304)
+        # The fingerprint and the view count update
+        self.assertEqual(len(queries), 2)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.views_count, 2)
+
+    def test_writes_change_the_validators(self):
+        etags = {name: self.client.get(url)["ETag"] for name, url in self.urls.items()}
+
+        self.variant.stock_quantity = 0
+        self.variant.save()
+
+        for name, url in self.urls.items():
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[name])
+            self.assertEqual(response.status_code, 200, name)
+            self.assertNotEqual(response["ETag"], etags[name])
+
+    def test_list_validators_depend_on_filters(self):
+        everything = self.client.get(self.urls["list"])
+        men = self.client.get(self.urls["list"], {"gender": "men"})
+
+        self.assertNotEqual(everything["ETag"], men["ETag"])
+
+    def test_unknown_product_is_not_found(self):
+        url = reverse("products:product-detail", args=["missing"])
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH="*").status_code, 404)
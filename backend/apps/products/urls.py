@@ -1,23 +1,27 @@
 from django.urls import path
 from .views import (
     CategoryListView,
+    CategoryTreeView,
     CategoryDetailView,
     ProductListView,
     ProductDetailView,
     FeaturedProductsView,
     RelatedProductsView,
     ProductSearchView,
+    ProductCacheStatsView,
 )
 
 app_name = "products"
 
 urlpatterns = [
     path("categories/", CategoryListView.as_view(), name="category-list"),
+    path("categories/tree/", CategoryTreeView.as_view(), name="category-tree"),
     path("categories/<slug:slug>/", CategoryDetailView.as_view(), name="category-detail"),
 
     path("", ProductListView.as_view(), name="product-list"),
     path("featured/", FeaturedProductsView.as_view(), name="featured-products"),
     path("search/", ProductSearchView.as_view(), name="product-search"),
+    path("cache-stats/", ProductCacheStatsView.as_view(), name="product-cache-stats"),
     path("<slug:slug>/", ProductDetailView.as_view(), name="product-detail"),
     path("<slug:slug>/related/", RelatedProductsView.as_view(), name="related-products"),
 ]
\ No newline at end of file
@@ -1,23 +1,25 @@
 from rest_framework import generics, status
 from rest_framework.views import APIView
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
-from django.views.decorators.cache import cache_page
-from django.utils.decorators import method_decorator
+from rest_framework.filters import OrderingFilter
+from rest_framework.response import Response
 from apps.core.responses import success_response
-from apps.core.pagination import CustomPageNumberPagination
+from apps.core.pagination import SelectablePagination
 from .models import Product, Category
 from .serializers import (
     ProductListSerializer,
     ProductDetailSerializer,
     CategorySerializer,
+    CategoryTreeSerializer,
 )
-from .services import ProductService, CategoryService
-from .filters import ProductFilter
+from .services import ProductService, CategoryService, ProductViewCounter
+from .cache import ProductCache
+from .facets import ProductFacets
+from .fingerprints import CatalogFingerprint
+from .filters import ProductFilter, ProductSearchFilter
 
 
-@method_decorator(cache_page(60 * 15), name='dispatch')
 class CategoryListView(generics.ListAPIView):
     """API view for listing categories."""
 
@@ -29,11 +31,46 @@ class CategoryListView(generics.ListAPIView):
         return CategoryService.get_categories_tree()
 
     def list(self, request, *args, **kwargs):
-        """List all categories."""
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
+        """List all categories, answering revalidations with 304."""
+        validators = CatalogFingerprint.cached(
+            "categories", request, CatalogFingerprint.for_categories
+        )
+        not_modified = validators.not_modified(request)
+        if not_modified is not None:
+            return not_modified
+
+        cache_key = ProductCache.list_key("categories", request)
+        data = ProductCache.get("categories", cache_key)
+        if data is None:
+            queryset = self.get_queryset()
+            data = self.get_serializer(queryset, many=True).data
+            ProductCache.set(cache_key, data)
+
+        return validators.apply(
+            success_response(data=data, message="Categories retrieved successfully")
+        )
+
+
+class CategoryTreeView(APIView):
+    """
+    API view returning the whole nested category tree.
+    """
+
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        """Get the category tree from one cached structure."""
+        cache_key = ProductCache.list_key("category-tree", request)
+        data = ProductCache.get("category-tree", cache_key)
+        if data is None:
+            roots = CategoryService.build_category_tree()
+            data = CategoryTreeSerializer(
+                roots, many=True, context={"request": request}
+            ).data
+            ProductCache.set(cache_key, data)
+
         return success_response(
-            data=serializer.data, message="Categories retrieved successfully"
+            data=data, message="Category tree retrieved successfully"
         )
 
 
@@ -48,7 +85,7 @@ class CategoryDetailView(generics.RetrieveAPIView):
 
     def get_queryset(self):
         """Get active categories."""
-        return Category.objects.filter(is_deleted=False, is_active=True)
+        return Category.objects.filter(is_active=True)
 
     def retrieve(self, request, *args, **kwargs):
         """Retrieve category details."""
@@ -64,10 +101,9 @@ class ProductListView(generics.ListAPIView):
 
     permission_classes = [AllowAny]
     serializer_class = ProductListSerializer
-    pagination_class = CustomPageNumberPagination
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    pagination_class = SelectablePagination
+    filter_backends = [DjangoFilterBackend, OrderingFilter, ProductSearchFilter]
     filterset_class = ProductFilter
-    search_fields = ["name", "description", "brand"]
     ordering_fields = ["price", "created_at", "name", "views_count"]
     ordering = ["-created_at"]
 
@@ -76,7 +112,40 @@ class ProductListView(generics.ListAPIView):
         return ProductService.get_products_queryset()
 
     def list(self, request, *args, **kwargs):
-        """List products with pagination."""
+        """
+        List products with pagination, served from the payload cache.
+        With ?facets=true the response data also holds facet counts for
+        the current filters, cached separately from the page itself.
+        Revalidations are answered with 304 from a cached fingerprint of
+        the filtered queryset, before any page is built.
+        """
+        validators = CatalogFingerprint.cached(
+            "list",
+            request,
+            lambda: CatalogFingerprint.for_products(
+                self.filter_queryset(self.get_queryset()), self.facets_requested(request)
+            ),
+        )
+        not_modified = validators.not_modified(request)
+        if not_modified is not None:
+            return not_modified
+
+        cache_key = ProductCache.list_key("list", request, exclude=["facets"])
+        data = ProductCache.get("list", cache_key)
+        if data is None:
+            data = self.build_list_response(request).data
+            ProductCache.set(cache_key, data)
+
+        if self.facets_requested(request):
+            data = {**data, "data": {**data["data"], "facets": ProductFacets.get(request)}}
+        return validators.apply(Response(data))
+
+    @staticmethod
+    def facets_requested(request):
+        return request.query_params.get("facets", "").lower() in ("1", "true", "yes")
+
+    def build_list_response(self, request):
+        """Build the paginated product list response."""
         queryset = self.filter_queryset(self.get_queryset())
         page = self.paginate_queryset(queryset)
 
@@ -105,16 +174,38 @@ class ProductDetailView(generics.RetrieveAPIView):
         return ProductService.get_product_by_slug(slug)
 
     def retrieve(self, request, *args, **kwargs):
-        """Retrieve product details."""
+        """
+        Retrieve product details, served from the payload cache.
+        A view is recorded on revalidations and cache hits as well as
+        misses.
+        """
+        product_id, validators = CatalogFingerprint.for_product(self.kwargs.get("slug"))
+        if validators is not None:
+            not_modified = validators.not_modified(request)
+            if not_modified is not None:
+                ProductViewCounter.record_view(product_id)
+                return not_modified
+
+        product_id, data = ProductCache.get_detail(self.kwargs.get("slug"), request)
+        if data is not None:
+            ProductViewCounter.record_view(product_id)
+            return self.apply_validators(
+                validators, success_response(data=data, message="Product retrieved successfully")
+            )
+
         instance = self.get_object()
-        serializer = self.get_serializer(instance)
-        return success_response(
-            data=serializer.data, message="Product retrieved successfully"
+        data = self.get_serializer(instance).data
+        ProductCache.set_product_id(instance.slug, instance.pk)
+        ProductCache.set(ProductCache.detail_key(instance.pk, request), data)
+        return self.apply_validators(
+            validators, success_response(data=data, message="Product retrieved successfully")
         )
 
+    @staticmethod
+    def apply_validators(validators, response):
+        return validators.apply(response) if validators is not None else response
+
 
-# кэширование на 30 минут
-@method_decorator(cache_page(60 * 30), name='dispatch')
 class FeaturedProductsView(APIView):
     """
     API view for featured products.
@@ -123,14 +214,30 @@ class FeaturedProductsView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request):
-        """Get featured products."""
-        limit = int(request.query_params.get("limit", 8))
-        products = ProductService.get_featured_products(limit=limit)
-        serializer = ProductListSerializer(
-            products, many=True, context={"request": request}
+        """Get featured products, answering revalidations with 304."""
+        validators = CatalogFingerprint.cached(
+            "featured",
+            request,
+            lambda: CatalogFingerprint.for_products(
+                ProductService.get_products_queryset({"is_featured": True})
+            ),
         )
-        return success_response(
-            data=serializer.data, message="Featured products retrieved successfully"
+        not_modified = validators.not_modified(request)
+        if not_modified is not None:
+            return not_modified
+
+        cache_key = ProductCache.list_key("featured", request)
+        data = ProductCache.get("featured", cache_key)
+        if data is None:
+            limit = int(request.query_params.get("limit", 8))
+            products = ProductService.get_featured_products(limit=limit)
+            data = ProductListSerializer(
+                products, many=True, context={"request": request}
+            ).data
+            ProductCache.set(cache_key, data)
+
+        return validators.apply(
+            success_response(data=data, message="Featured products retrieved successfully")
         )
 
 
@@ -155,18 +262,24 @@ class RelatedProductsView(APIView):
 
 
 class ProductSearchView(generics.ListAPIView):
-    """API view for product search with autocomplete."""
+    """
+    API view for product search with autocomplete.
+    Pass mode=autocomplete for prefix/trigram name suggestions.
+    """
 
     permission_classes = [AllowAny]
     serializer_class = ProductListSerializer
+    max_results = 10
 
     def get_queryset(self):
         """Get search results."""
-        query = self.request.query_params.get("q", "")
+        query = self.request.query_params.get("q", "").strip()
         if not query:
             return Product.objects.none()
 
-        return ProductService.get_products_queryset({"search": query})[:10]
+        if self.request.query_params.get("mode") == "autocomplete":
+            return ProductService.autocomplete_products(query, limit=self.max_results)
+        return ProductService.search_products(query, limit=self.max_results)
 
     def list(self, request, *args, **kwargs):
         """List search results."""
@@ -175,3 +288,17 @@ class ProductSearchView(generics.ListAPIView):
         return success_response(
             data=serializer.data, message="Search results retrieved successfully"
         )
+
+
+class ProductCacheStatsView(APIView):
+    """
+    API view exposing product payload cache hit/miss counters.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """Get cache counters per namespace."""
+        return success_response(
+            data=ProductCache.get_stats(), message="Cache statistics retrieved successfully"
+        )
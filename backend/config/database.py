@@ -0,0 +1,95 @@
+"""
+File: backend/config/database.py
+Purpose: Database settings built from environment variables
+"""
+
+from decouple import config
+
+ENGINES = {
+    "sqlite": "django.db.backends.sqlite3",
+    "postgresql": "django.db.backends.postgresql",
+}
+
+
+def csv(value):
+    return [s.strip() for s in value.split(",") if s.strip()]
+
+
+def get_default_database(base_dir):
+    """
+    Return the primary database settings.
+
+    DB_ENGINE selects SQLite (the default, for local development) or
+    PostgreSQL. Connections are kept open for DB_CONN_MAX_AGE seconds
+    and checked before reuse, so a worker opens a new connection only
+    after the previous one expired or broke. DB_PGBOUNCER disables
+    server-side cursors and session-level settings, which do not survive
+    pgbouncer's transaction pooling.
+    """
+    engine = config("DB_ENGINE", default="sqlite")
+    if engine not in ENGINES:
+        raise ValueError(f"DB_ENGINE must be one of {', '.join(ENGINES)}, not {engine!r}")
+
+    database = {
+        "ENGINE": ENGINES[engine],
+        # Seconds a connection is reused across requests; 0 closes it
+        # after every request
+        "CONN_MAX_AGE": config("DB_CONN_MAX_AGE", default=60, cast=int),
+        "CONN_HEALTH_CHECKS": config("DB_CONN_HEALTH_CHECKS", default=True, cast=bool),
+    }
+    if engine == "sqlite":
+        database["NAME"] = config("DB_NAME", default=str(base_dir / "db.sqlite3"))
+        return database
+
+    pgbouncer = config("DB_PGBOUNCER", default=False, cast=bool)
+    database.update(
+        {
+            "NAME": config("DB_NAME", default="mvs_clothing"),
+            "USER": config("DB_USER", default="postgres"),
+            "PASSWORD": config("DB_PASSWORD", default=""),
+            "HOST": config("DB_HOST", default="localhost"),
+            "PORT": config("DB_PORT", default="5432"),
+            "DISABLE_SERVER_SIDE_CURSORS": pgbouncer,
+            "OPTIONS": {
+                "connect_timeout": config("DB_CONNECT_TIMEOUT", default=5, cast=int),
+            },
+        }
+    )
+    # Default for work outside requests (tasks, commands); requests use
+    # DATABASE_STATEMENT_TIMEOUTS. pgbouncer rejects startup options, so
+    # set statement_timeout on the database role instead.
+    statement_timeout = config("DB_STATEMENT_TIMEOUT", default=0, cast=int)
+    if statement_timeout and not pgbouncer:
+        database["OPTIONS"]["options"] = f"-c statement_timeout={statement_timeout}"
+    return database
+
+
+def get_replica_databases(default):
+    """
+    Return replica aliases for the hosts in DB_REPLICA_HOSTS ("host" or
+    "host:port", comma separated), named replica_1, replica_2, ... and
+    sharing every other setting with the primary. Tests mirror them to
+    the primary rather than creating test databases of their own.
+    """
+    replicas = {}
+    for index, address in enumerate(csv(config("DB_REPLICA_HOSTS", default="")), start=1):
+        host, _, port = address.partition(":")
+        replicas[f"replica_{index}"] = {
+            **default,
+            "HOST": host,
+            "PORT": port or default.get("PORT", ""),
+            "TEST": {"MIRROR": "default"},
+        }
+    return replicas
+
+
+def get_databases(base_dir, testing=False):
+    default = get_default_database(base_dir)
+    databases = {"default": default, **get_replica_databases(default)}
+    if testing:
+        # Test-only stand-in replica with a database of its own, routed to
+        # only by the tests that list it in DATABASE_REPLICAS
+        databases["replica"] = {**default}
+        if default["ENGINE"] != ENGINES["sqlite"]:
+            databases["replica"]["TEST"] = {"NAME": f"test_{default['NAME']}_replica"}
+    return databases
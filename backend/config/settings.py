@@ -1,6 +1,8 @@
+import sys
 from pathlib import Path
 from datetime import timedelta
 from decouple import config
+from config.database import csv, get_databases
 
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -9,6 +11,9 @@ SECRET_KEY = config("SECRET_KEY")
 
 DEBUG = config("DEBUG", default=False, cast=bool)
 
+# Running under `manage.py test`
+TESTING = sys.argv[1:2] == ["test"]
+
 ALLOWED_HOSTS = config(
     "ALLOWED_HOSTS",
     default="localhost,127.0.0.1",
@@ -31,6 +36,7 @@ DJANGO_APPS = [
 THIRD_PARTY_APPS = [
     "rest_framework",
     "rest_framework_simplejwt",
+    "rest_framework_simplejwt.token_blacklist",
     "corsheaders",
     "django_filters",
     "drf_spectacular",
@@ -54,6 +60,9 @@ INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "apps.core.media.MediaMiddleware",  # Serves media before sessions and auth
+    "apps.core.replicas.ReplicaPinningMiddleware",
+    "apps.core.database.StatementTimeoutMiddleware",
     "corsheaders.middleware.CorsMiddleware",  # Must be before CommonMiddleware
     "django.middleware.common.CommonMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -98,11 +107,27 @@ TEMPLATES = [
 # DATABASE
 # ==============================================================================
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
+# Built from DB_* variables, see config/database.py. Run
+# `manage.py check --deploy --database default` at startup to verify
+# the configuration and that every database answers.
+DATABASES = get_databases(BASE_DIR, testing=TESTING)
+
+DATABASE_ROUTERS = ["apps.core.replicas.ReplicaRouter"]
+# Aliases serving catalog and order-history reads; defaults to the
+# DB_REPLICA_HOSTS aliases, empty reads from default
+DATABASE_REPLICAS = config(
+    "DATABASE_REPLICAS",
+    default=",".join(alias for alias in DATABASES if alias.startswith("replica_")),
+    cast=csv,
+)
+DATABASE_REPLICA_APPS = ["products", "orders"]
+# Seconds a client reads from the primary after writing
+DATABASE_PIN_SECONDS = config("DATABASE_PIN_SECONDS", default=10, cast=int)
+# PostgreSQL statement timeouts (milliseconds, 0 for none) by request class
+DATABASE_STATEMENT_TIMEOUTS = {
+    "read": config("DB_STATEMENT_TIMEOUT_READ", default=5000, cast=int),
+    "write": config("DB_STATEMENT_TIMEOUT_WRITE", default=15000, cast=int),
+    "admin": config("DB_STATEMENT_TIMEOUT_ADMIN", default=60000, cast=int),
 }
 
 
@@ -130,6 +155,24 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Login limits, checked before any password is hashed: attempts per
+# client IP and failed attempts per email, each over a sliding window
+LOGIN_IP_ATTEMPT_LIMIT = config("LOGIN_IP_ATTEMPT_LIMIT", default=30, cast=int)
+LOGIN_IP_WINDOW = config("LOGIN_IP_WINDOW", default=60 * 15, cast=int)
+LOGIN_EMAIL_FAILURE_LIMIT = config("LOGIN_EMAIL_FAILURE_LIMIT", default=5, cast=int)
+LOGIN_EMAIL_WINDOW = config("LOGIN_EMAIL_WINDOW", default=60 * 15, cast=int)
+
+# Password hashing pool per process: worker threads (0 = one per core),
+# jobs allowed to queue behind them before logins get a 503, and the
+# longest a login waits for its hash
+PASSWORD_HASH_WORKERS = config("PASSWORD_HASH_WORKERS", default=0, cast=int)
+PASSWORD_HASH_MAX_PENDING = config("PASSWORD_HASH_MAX_PENDING", default=16, cast=int)
+PASSWORD_HASH_TIMEOUT = config("PASSWORD_HASH_TIMEOUT", default=5, cast=int)
+
+# Used and expired reset/verification tokens are purged hourly, this
+# many rows per delete statement
+AUTH_TOKEN_PURGE_BATCH_SIZE = config("AUTH_TOKEN_PURGE_BATCH_SIZE", default=1000, cast=int)
+
 
 # ==============================================================================
 # INTERNATIONALIZATION
@@ -151,9 +194,26 @@ USE_TZ = True
 STATIC_URL = "static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
-MEDIA_URL = "media/"
+# An absolute MEDIA_URL (e.g. a CDN) lets serializers build media URLs
+# without resolving the request host
+MEDIA_URL = config("MEDIA_URL", default="media/")
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Uploads are stored under names embedding a digest of their content
+STORAGES = {
+    "default": {"BACKEND": "apps.core.storage.ContentHashStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+# Serve MEDIA_URL from MediaMiddleware; content-hashed files are cached
+# immutably, others for MEDIA_CACHE_MAX_AGE seconds
+MEDIA_SERVE = config("MEDIA_SERVE", default=DEBUG, cast=bool)
+MEDIA_CACHE_MAX_AGE = config("MEDIA_CACHE_MAX_AGE", default=60 * 60, cast=int)
+# Hand file bodies to the front server (e.g. X-Accel-Redirect for nginx,
+# X-Sendfile for Apache); the header value is MEDIA_SENDFILE_PREFIX + name
+MEDIA_SENDFILE_HEADER = config("MEDIA_SENDFILE_HEADER", default="")
+MEDIA_SENDFILE_PREFIX = config("MEDIA_SENDFILE_PREFIX", default="/protected-media/")
+
 
 # ==============================================================================
 # DEFAULT PRIMARY KEY FIELD TYPE
@@ -168,7 +228,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.authentication.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
@@ -215,8 +275,19 @@ SIMPLE_JWT = {
     "USER_ID_CLAIM": "user_id",
     "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
     "TOKEN_TYPE_CLAIM": "token_type",
+    "TOKEN_REFRESH_SERIALIZER": "apps.authentication.serializers.TokenRefreshSerializer",
 }
 
+# Authenticated users are resolved from the cache for this many seconds;
+# the entry is dropped whenever the user row is saved or deleted
+AUTH_USER_CACHE_TIMEOUT = config("AUTH_USER_CACHE_TIMEOUT", default=300, cast=int)
+
+# The in-process token blacklist filter is rebuilt at least this often
+# (and whenever a token is blacklisted) so expired entries drop out
+TOKEN_BLACKLIST_REBUILD_INTERVAL = config(
+    "TOKEN_BLACKLIST_REBUILD_INTERVAL", default=60 * 60, cast=int
+)
+
 
 # ==============================================================================
 # CORS
@@ -251,12 +322,13 @@ CORS_ALLOW_HEADERS = [
     "dnt",
     "origin",
     "user-agent",
+    "x-cart-token",
     "x-csrftoken",
     "x-requested-with",
 ]
 
 CORS_PREFLIGHT_MAX_AGE = 86400  # 24 hours
-CORS_EXPOSE_HEADERS = ["Content-Type", "X-CSRFToken"]
+CORS_EXPOSE_HEADERS = ["Content-Type", "X-CSRFToken", "X-Cart-Token"]
 
 
 # ==============================================================================
@@ -270,11 +342,77 @@ CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
+CELERY_BEAT_SCHEDULE = {
+    "flush-product-views": {
+        "task": "apps.products.tasks.flush_product_views",
+        "schedule": 60.0,
+    },
+    "flush-email-outbox": {
+        "task": "apps.core.tasks.flush_email_outbox",
+        "schedule": 300.0,
+    },
+    "purge-auth-tokens": {
+        "task": "apps.authentication.tasks.purge_auth_tokens",
+        "schedule": 60.0 * 60,
+    },
+}
+
+# ==============================================================================
+# PRODUCT SEARCH
+# ==============================================================================
+
+# Dotted path to a search backend; empty selects one from the database vendor
+PRODUCT_SEARCH_BACKEND = config("PRODUCT_SEARCH_BACKEND", default="")
+
+# Upper bounds of the price buckets in product listing facets
+PRODUCT_FACET_PRICE_BUCKETS = [25, 50, 100, 200]
+
+
+# ==============================================================================
+# PRODUCT IMAGES
+# ==============================================================================
+
+# Maximum width in pixels of each generated image derivative
+IMAGE_DERIVATIVE_SIZES = {"thumbnail": 200, "card": 400, "detail": 800, "zoom": 1600}
+# Output formats, best first; "avif" is used only if Pillow can encode it
+IMAGE_DERIVATIVE_FORMATS = config(
+    "IMAGE_DERIVATIVE_FORMATS",
+    default="webp,jpeg",
+    cast=lambda v: [s.strip() for s in v.split(",") if s.strip()],
+)
+# Derivative served as the product list's primary_image
+IMAGE_LIST_DERIVATIVE = "card"
+# Generate derivatives in-process right after commit (tests, no broker)
+IMAGE_DERIVATIVES_EAGER = config("IMAGE_DERIVATIVES_EAGER", default=False, cast=bool)
+
+
+# ==============================================================================
+# PRODUCT VIEW COUNTER
+# ==============================================================================
+
+# Buffer view counts in the cache and flush them periodically. Needs a
+# cache shared with the Celery worker (not LocMemCache or DummyCache)
+PRODUCT_VIEWS_BUFFERED = config("PRODUCT_VIEWS_BUFFERED", default=False, cast=bool)
+PRODUCT_VIEWS_FLUSH_INTERVAL = config("PRODUCT_VIEWS_FLUSH_INTERVAL", default=60, cast=int)
+
+
+# ==============================================================================
+# GUEST CART
+# ==============================================================================
+
+# Anonymous carts live in the cache under the X-Cart-Token header and
+# expire this many seconds after their last change
+GUEST_CART_TTL = config("GUEST_CART_TTL", default=60 * 60 * 24 * 7, cast=int)
+
 
 # ==============================================================================
 # CACHING
 # ==============================================================================
 
+# Lifetime of cached product list/detail payloads (they are also
+# invalidated on every catalog write)
+PRODUCT_CACHE_TIMEOUT = config("PRODUCT_CACHE_TIMEOUT", default=600, cast=int)
+
 CACHES = {
     "default": {
         "BACKEND": config(
@@ -284,6 +422,10 @@ CACHES = {
         "LOCATION": config("CACHE_LOCATION", default="unique-snowflake"),
     }
 }
+# Catalog invalidation, guest carts, login limits and token checks need
+# a cache every worker sees. Set this when a single process serves
+# requests (runserver) so a process-local cache counts as shared.
+CACHE_SINGLE_PROCESS = config("CACHE_SINGLE_PROCESS", default=TESTING, cast=bool)
 
 
 # ==============================================================================
@@ -301,6 +443,12 @@ EMAIL_HOST_USER = config("EMAIL_HOST_USER", default="")
 EMAIL_HOST_PASSWORD = config("EMAIL_HOST_PASSWORD", default="")
 DEFAULT_FROM_EMAIL = config("DEFAULT_FROM_EMAIL", default="noreply@mvsclothing.com")
 
+# Transactional emails go through the outbox table and Celery; eager mode
+# sends them in-process right after commit (tests, no broker)
+EMAIL_OUTBOX_EAGER = config("EMAIL_OUTBOX_EAGER", default=False, cast=bool)
+EMAIL_OUTBOX_BATCH_SIZE = config("EMAIL_OUTBOX_BATCH_SIZE", default=50, cast=int)
+EMAIL_OUTBOX_MAX_ATTEMPTS = config("EMAIL_OUTBOX_MAX_ATTEMPTS", default=5, cast=int)
+
 
 # ==============================================================================
 # STRIPE CONFIGURATION
@@ -309,6 +457,20 @@ DEFAULT_FROM_EMAIL = config("DEFAULT_FROM_EMAIL", default="noreply@mvsclothing.c
 STRIPE_PUBLIC_KEY = config("STRIPE_PUBLIC_KEY", default="")
 STRIPE_SECRET_KEY = config("STRIPE_SECRET_KEY", default="")
 STRIPE_WEBHOOK_SECRET = config("STRIPE_WEBHOOK_SECRET", default="")
+STRIPE_API_BASE = config("STRIPE_API_BASE", default="https://api.stripe.com")
+
+# Stripe HTTP client: timeouts in seconds, retries of failed network calls,
+# keep-alive pool size and the circuit breaker that fails fast when Stripe is down
+STRIPE_CONNECT_TIMEOUT = config("STRIPE_CONNECT_TIMEOUT", default=3, cast=float)
+STRIPE_READ_TIMEOUT = config("STRIPE_READ_TIMEOUT", default=10, cast=float)
+STRIPE_MAX_NETWORK_RETRIES = config("STRIPE_MAX_NETWORK_RETRIES", default=2, cast=int)
+STRIPE_POOL_SIZE = config("STRIPE_POOL_SIZE", default=10, cast=int)
+STRIPE_CIRCUIT_FAILURE_THRESHOLD = config("STRIPE_CIRCUIT_FAILURE_THRESHOLD", default=5, cast=int)
+STRIPE_CIRCUIT_RESET_TIMEOUT = config("STRIPE_CIRCUIT_RESET_TIMEOUT", default=30, cast=int)
+
+# Webhook events are stored and processed by Celery; eager mode processes
+# them in-process right after commit (tests, no broker)
+STRIPE_WEBHOOK_EAGER = config("STRIPE_WEBHOOK_EAGER", default=False, cast=bool)
 
 
 # ==============================================================================